@@ -0,0 +1,131 @@
+"""
+Import-time benchmark for the analytics entry points.
+
+Each entry point (the pipeline, the dashboard and the module CLIs) is imported in
+fresh interpreters and the fastest import is compared to its budget in config.py.
+The script exits with status 1 if any entry point is over budget or fails to
+import, and lists the slowest modules it pulled in (from python -X importtime),
+so a heavy library imported at module top shows up as soon as it is added.
+
+Usage:
+    python analytics/check_startup_time.py [ENTRY_POINT ...]
+"""
+import os
+import sys
+import argparse
+import subprocess
+import logging
+
+from config import (
+    PROJECT_ROOT,
+    IMPORT_TIME_BUDGETS,
+    IMPORT_TIME_RUNS
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Times the import inside the child, so interpreter startup is not counted
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+def _run_python(args):
+    """Run a fresh interpreter from the repository root with the analytics package importable."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PROJECT_ROOT), os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT.parent, env=env,
+                          capture_output=True, text=True)
+
+def measure_import_time(module, runs=IMPORT_TIME_RUNS):
+    """
+    Measure the cold import time of a module.
+    
+    Args:
+        module (str): Dotted module name, relative to the analytics directory
+        runs (int): Number of fresh interpreters to import the module in
+    
+    Returns:
+        float: Fastest import time in seconds
+    
+    Raises:
+        RuntimeError: If the module cannot be imported
+    """
+    timings = []
+    for _ in range(runs):
+        result = _run_python(['-c', IMPORT_SNIPPET.format(module=module)])
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()
+            raise RuntimeError(error[-1] if error else f"exit status {result.returncode}")
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+def slowest_imports(module, top_n=10):
+    """
+    List the modules whose own import time is largest when importing a module.
+    
+    Args:
+        module (str): Dotted module name, relative to the analytics directory
+        top_n (int): Number of modules returned
+    
+    Returns:
+        list: (module name, own seconds, cumulative seconds) tuples, slowest first
+    """
+    result = _run_python(['-X', 'importtime', '-c', f"import {module}"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        rows.append((fields[2].strip(), int(fields[0]) / 1e6, int(fields[1]) / 1e6))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top_n]
+
+def check_startup_time(budgets=IMPORT_TIME_BUDGETS, runs=IMPORT_TIME_RUNS):
+    """
+    Check the import time of every entry point against its budget.
+    
+    Args:
+        budgets (dict): Mapping of dotted module name to maximum import seconds
+        runs (int): Number of fresh interpreters per entry point
+    
+    Returns:
+        bool: True if every entry point imported within its budget
+    """
+    passed = True
+    for module, budget in budgets.items():
+        try:
+            seconds = measure_import_time(module, runs)
+        except RuntimeError as e:
+            logger.error(f"{module}: import failed ({str(e)})")
+            passed = False
+            continue
+        
+        if seconds <= budget:
+            logger.info(f"{module}: {seconds:.3f}s (budget {budget:.3f}s)")
+            continue
+        
+        passed = False
+        logger.error(f"{module}: {seconds:.3f}s exceeds its budget of {budget:.3f}s; slowest imports:")
+        for name, own_seconds, cumulative_seconds in slowest_imports(module):
+            logger.error(f"    {name}: {own_seconds:.3f}s own, {cumulative_seconds:.3f}s cumulative")
+    
+    return passed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the cold import time of the analytics entry points")
+    parser.add_argument("modules", nargs="*", metavar="ENTRY_POINT",
+                        help="Entry points to check (default: every entry point in IMPORT_TIME_BUDGETS)")
+    parser.add_argument("--runs", type=int, default=IMPORT_TIME_RUNS,
+                        help="Fresh interpreters per entry point; the fastest import is compared to the budget")
+    args = parser.parse_args()
+    
+    unknown = [module for module in args.modules if module not in IMPORT_TIME_BUDGETS]
+    if unknown:
+        parser.error(f"No import time budget for: {', '.join(unknown)}")
+    budgets = {module: IMPORT_TIME_BUDGETS[module] for module in args.modules} if args.modules else IMPORT_TIME_BUDGETS
+    
+    sys.exit(0 if check_startup_time(budgets, args.runs) else 1)
\ No newline at end of file
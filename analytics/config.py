@@ -7,7 +7,7 @@ from pathlib import Path
 # Base paths
 PROJECT_ROOT = Path(__file__).parent.absolute()
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-FORUM_DATA_DIR = os.path.join(PROJECT_ROOT.parent, "pohkim", "public")
+FORUM_DATA_DIR = os.environ.get("FORUM_DATA_DIR", os.path.join(PROJECT_ROOT.parent, "pohkim", "public"))  # Override to analyze another export (e.g. generated data)
 
 # Input data files
 FORUM_TOPICS_FILE = os.path.join(FORUM_DATA_DIR, "forum-topics.json")
@@ -30,8 +30,104 @@ DASHBOARD_DEBUG = True
 SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
 SENTIMENT_BATCH_SIZE = 16
 SENTIMENT_MAX_LENGTH = 512
+SENTIMENT_CHECKPOINT_TEXTS = 2048  # New texts scored between flushes of the score cache (resume point after a crash)
 
-# Create directories if they don't exist
-for directory in [DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR, REPORTS_DIR, 
-                  VISUALIZATIONS_DIR, DASHBOARD_ASSETS_DIR]:
-    os.makedirs(directory, exist_ok=True) 
\ No newline at end of file
+# Topic modeling settings
+TOPIC_OUT_OF_CORE = False            # Stream chunks through a hashing vectorizer instead of fitting in memory
+TOPIC_METHOD = "lda"                 # Incremental topic model for out-of-core mode ('lda' or 'nmf')
+TOPIC_CHUNK_SIZE = 5000              # Documents per chunk read from disk in out-of-core mode
+TOPIC_HASHING_N_FEATURES = 2 ** 18   # Number of hash buckets for the hashing vectorizer
+TOPIC_TRACKED_TERMS = 50000          # Frequent terms kept to map hash buckets back to words
+TOPIC_PER_CATEGORY = True            # Also fit one topic model per forum category
+TOPIC_CATEGORY_MIN_DOCS = 20         # Smaller categories fall back to the global topic model
+TOPIC_CATEGORY_WORKERS = None        # Worker processes for per-category models (None = CPU count)
+TOPIC_REFIT_DAYS = 7                 # Refit the topic model after this many days; new posts are assigned in between (None = every run)
+
+# Trend report settings
+REPORT_WORKERS = None      # Worker processes for report analyses and chart rendering (None = CPU count)
+REPORT_FORMATS = ("md", "html", "json")  # Output formats of the trend report
+REPORT_CACHE_ENABLED = True  # Reuse report section tables whose analysis inputs did not change
+FIGURE_CACHE_ENABLED = True  # Skip chart renders whose plotted data and parameters did not change
+TRENDING_HALF_LIFE_DAYS = 7  # Days after which topic engagement counts half as much for trending
+TRENDING_TOP_N = 50          # Topics kept in the trending top-N heaps (overall and per category)
+
+# Burst detection settings
+BURST_METHOD = "ewma"      # Baseline of each series: "rolling" (trailing-window z-score) or "ewma"
+BURST_WINDOW = 14          # Trailing periods in the rolling baseline
+BURST_EWMA_SPAN = 7        # Span in periods of the EWMA baseline
+BURST_MIN_PERIODS = 5      # Baseline periods required before a period can be flagged
+BURST_Z_THRESHOLD = 3.0    # Absolute z-score above which a period is flagged as a burst
+
+# Author analytics settings
+AUTHOR_SIMILAR_TOP_K = 10        # Most similar co-participants kept per author
+AUTHOR_MIN_SHARED_TOPICS = 1     # Topics two authors must share to count as similar
+AUTHOR_MAX_TOPIC_AUTHORS = 1000  # Topics with more participants are left out of similarity (keeps products sparse)
+AUTHOR_BLOCK_SIZE = 10000        # Authors per block of the sparse similarity product
+
+# Streaming keyword sketch settings
+SKETCH_WIDTH = 2 ** 16     # Count-Min Sketch counters per row
+SKETCH_DEPTH = 4           # Count-Min Sketch rows
+SKETCH_TOP_K = 200         # Heavy hitters tracked per sketch
+SKETCH_TDIGEST_COMPRESSION = 200  # t-digest accuracy for sentiment quantiles (about half as many centroids)
+SKETCH_HLL_PRECISION = 12         # HyperLogLog index bits for distinct authors (about 1.6% error)
+
+# Near-duplicate detection settings
+DEDUP_ENABLED = True       # Collapse near-duplicate posts to one representative downstream
+DEDUP_SHINGLE_SIZE = 3     # Words per shingle
+DEDUP_NUM_PERM = 128       # MinHash signature length
+DEDUP_LSH_BANDS = 16       # LSH bands (rows per band = DEDUP_NUM_PERM / DEDUP_LSH_BANDS)
+DEDUP_THRESHOLD = 0.8      # Minimum estimated Jaccard similarity for near-duplicates
+
+# Pipeline execution settings
+PIPELINE_WORKERS = None    # Worker processes for independent pipeline stages (None = number of CPUs)
+PIPELINE_CACHE_ENABLED = True  # Skip stages whose input files, config values and code did not change
+TELEMETRY_ENABLED = True       # Record per-stage metrics and a trace of every pipeline run
+PROFILE_TOP_N = 25             # Hottest functions and allocation sites reported per stage with --profile
+WATCH_POLL_SECONDS = 2.0       # Interval between checks of the forum export files in watch mode
+WATCH_DEBOUNCE_SECONDS = 5.0   # Quiet time after the last change to the export before the pipeline reruns
+
+# Memory budget settings (see modules/memory_budget.py)
+MEMORY_BUDGET_MB = None        # Approximate memory per stage; stages read, process and write their data in chunks that fit (None = load everything)
+MEMORY_CHUNK_FRACTION = 0.25   # Share of the budget one chunk of rows may take (the rest covers models, copies and derived columns)
+
+# Partitioned execution settings (run_pipeline --partitioned)
+PARTITION_PERIOD = 'month'          # Time shard size ('day', 'week' or 'month')
+PARTITION_WORKERS = None            # Local shard worker processes (None = number of CPUs)
+PARTITION_HEARTBEAT_SECONDS = 30.0  # Interval at which a worker marks its claimed shard as still in progress
+PARTITION_CLAIM_TIMEOUT = 600.0     # Seconds without a heartbeat after which another worker takes over a shard
+PARTITION_POLL_SECONDS = 5.0        # Interval between checks for shards processed by workers on other machines
+
+# Synthetic forum data settings (generate_forum_data.py)
+SYNTHETIC_DATA_DIR = os.path.join(DATA_DIR, "synthetic")  # Output directory of the generated export
+SYNTHETIC_TOPICS = 10000           # Topics generated
+SYNTHETIC_REPLIES_PER_TOPIC = 6.0  # Mean replies per topic (long-tailed; many topics get none)
+SYNTHETIC_DUPLICATE_RATE = 0.05    # Share of topics that are near-copies of a recent topic (reposts, spam waves)
+SYNTHETIC_DAYS = 365               # Days between the oldest topic and the time of generation
+SYNTHETIC_CATEGORY_SKEW = 1.0      # Zipf exponent of topics per category (0 = every category equally busy)
+SYNTHETIC_AUTHORS = 20000          # Size of the author pool (a few authors write most posts)
+SYNTHETIC_SEED = 42                # Random seed; the same settings generate the same files
+
+# Startup time budgets (checked by check_startup_time.py)
+IMPORT_TIME_BUDGETS = {          # Maximum seconds to import each entry point in a fresh interpreter
+    'config': 0.05,
+    'modules.data_ingestion': 0.6,
+    'modules.sentiment_analysis': 0.8,
+    'modules.topic_analysis': 0.8,
+    'modules.trend_analysis': 1.0,
+    'modules.partitioning': 0.8,
+    'generate_forum_data': 0.6,
+    'run_pipeline': 0.8,
+    'dashboard.app': 2.0
+}
+IMPORT_TIME_RUNS = 5             # Fresh interpreters per entry point; the fastest import is compared to the budget
+
+def ensure_directories():
+    """
+    Create the output directories if they don't exist.
+    
+    Importing this module has no side effects; entry points that write output call
+    this function once before they start.
+    """
+    for directory in [DATA_DIR, PROCESSED_DATA_DIR, MODELS_DIR, REPORTS_DIR, 
+                      VISUALIZATIONS_DIR, DASHBOARD_ASSETS_DIR]:
+        os.makedirs(directory, exist_ok=True) 
\ No newline at end of file
@@ -19,8 +19,10 @@ from config import (
     PROCESSED_DATA_DIR,
     DASHBOARD_ASSETS_DIR,
     DASHBOARD_PORT,
-    DASHBOARD_DEBUG
+    DASHBOARD_DEBUG,
+    ensure_directories
 )
+from modules.rollup_cube import load_cube, query_cube
 
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +50,17 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardHeader("Forum Activity Overview"),
                 dbc.CardBody([
+                    dcc.Dropdown(
+                        id="activity-period-dropdown",
+                        options=[
+                            {"label": "Daily", "value": "day"},
+                            {"label": "Weekly", "value": "week"},
+                            {"label": "Monthly", "value": "month"}
+                        ],
+                        value="week",
+                        clearable=False,
+                        className="mb-3 text-dark"
+                    ),
                     dcc.Graph(id="forum-activity-graph")
                 ])
             ], className="mb-4")
@@ -71,6 +84,7 @@ app.layout = dbc.Container([
                     dcc.Dropdown(
                         id="sentiment-period-dropdown",
                         options=[
+                            {"label": "Daily", "value": "day"},
                             {"label": "Weekly", "value": "week"},
                             {"label": "Monthly", "value": "month"}
                         ],
@@ -89,6 +103,16 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardHeader("Top Keywords"),
                 dbc.CardBody([
+                    dcc.Dropdown(
+                        id="keywords-type-dropdown",
+                        options=[
+                            {"label": "Keywords", "value": "keywords"},
+                            {"label": "Phrases", "value": "phrases"}
+                        ],
+                        value="keywords",
+                        clearable=False,
+                        className="mb-3 text-dark"
+                    ),
                     dcc.Graph(id="top-keywords-graph")
                 ])
             ], className="mb-4")
@@ -137,6 +161,34 @@ app.layout = dbc.Container([
         ], width=6)
     ]),
     
+    dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("Top Authors by Engagement"),
+                dbc.CardBody([
+                    dash_table.DataTable(
+                        id="top-authors-table",
+                        style_cell={
+                            'backgroundColor': '#303030',
+                            'color': 'white',
+                            'textAlign': 'left',
+                            'padding': '15px',
+                            'whiteSpace': 'normal',
+                            'height': 'auto',
+                        },
+                        style_header={
+                            'backgroundColor': '#404040',
+                            'fontWeight': 'bold',
+                            'border': '1px solid #505050'
+                        },
+                        sort_action='native',
+                        page_size=10
+                    )
+                ])
+            ], className="mb-4")
+        ], width=12)
+    ]),
+    
     dbc.Row([
         dbc.Col([
             html.P(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", 
@@ -154,15 +206,16 @@ app.layout = dbc.Container([
 
 @app.callback(
     Output("forum-activity-graph", "figure"),
-    Input("interval-component", "n_intervals")
+    [Input("activity-period-dropdown", "value"),
+     Input("interval-component", "n_intervals")]
 )
-def update_forum_activity_graph(n):
+def update_forum_activity_graph(period, n):
     try:
-        activity_file = os.path.join(PROCESSED_DATA_DIR, "activity_trends_week.csv")
-        if not os.path.exists(activity_file):
+        cube = load_cube()
+        if cube is None:
             return create_empty_figure("No activity data available")
             
-        df = pd.read_csv(activity_file)
+        df = query_cube(cube, period)
         
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         
@@ -188,7 +241,7 @@ def update_forum_activity_graph(n):
         )
         
         fig.update_layout(
-            title_text="Forum Activity Trends",
+            title_text=f"Forum Activity Trends ({period.capitalize()})",
             template="plotly_dark",
             plot_bgcolor='rgba(50, 50, 50, 0.8)',
             paper_bgcolor='rgba(0, 0, 0, 0)',
@@ -203,7 +256,7 @@ def update_forum_activity_graph(n):
             )
         )
         
-        fig.update_xaxes(title_text="Week")
+        fig.update_xaxes(title_text=period.capitalize())
         
         fig.update_yaxes(title_text="Number of Topics", secondary_y=False)
         fig.update_yaxes(title_text="Engagement Ratio (Replies/Topic)", secondary_y=True)
@@ -219,11 +272,16 @@ def update_forum_activity_graph(n):
 )
 def update_sentiment_category_graph(n):
     try:
-        sentiment_file = os.path.join(PROCESSED_DATA_DIR, "sentiment_by_category.csv")
-        if not os.path.exists(sentiment_file):
+        cube = load_cube()
+        categories_file = os.path.join(PROCESSED_DATA_DIR, "categories.csv")
+        if cube is None or not os.path.exists(categories_file):
             return create_empty_figure("No sentiment by category data available")
             
-        df = pd.read_csv(sentiment_file)
+        df = query_cube(cube, 'day', by=('category',))
+        df = df[df['sentiment_count'] > 0].copy()
+        category_names = pd.read_csv(categories_file).set_index('id')['name']
+        df['category'] = df['category'].map(category_names)
+        df = df.drop(columns='topic_count').rename(columns={'sentiment_count': 'topic_count'})
         
         df = df.sort_values('avg_sentiment', ascending=False)
         
@@ -263,11 +321,12 @@ def update_sentiment_category_graph(n):
 )
 def update_sentiment_trend_graph(period, n):
     try:
-        sentiment_file = os.path.join(PROCESSED_DATA_DIR, f"sentiment_trends_{period}.csv")
-        if not os.path.exists(sentiment_file):
+        cube = load_cube()
+        if cube is None:
             return create_empty_figure(f"No sentiment trends data available for {period}")
             
-        df = pd.read_csv(sentiment_file)
+        df = query_cube(cube, period)
+        df = df[df['sentiment_count'] > 0]
         
         fig = make_subplots(specs=[[{"secondary_y": True}]])
         
@@ -321,15 +380,17 @@ def update_sentiment_trend_graph(period, n):
 
 @app.callback(
     Output("top-keywords-graph", "figure"),
-    Input("interval-component", "n_intervals")
+    [Input("keywords-type-dropdown", "value"),
+     Input("interval-component", "n_intervals")]
 )
-def update_keywords_graph(n):
+def update_keywords_graph(keyword_type, n):
     try:
-        keywords_file = os.path.join(PROCESSED_DATA_DIR, "forum_top_keywords.csv")
+        keywords_file = os.path.join(PROCESSED_DATA_DIR, f"forum_top_{keyword_type}.csv")
         if not os.path.exists(keywords_file):
-            return create_empty_figure("No keywords data available")
+            return create_empty_figure(f"No {keyword_type} data available")
             
         df = pd.read_csv(keywords_file)
+        df = df.rename(columns={'phrase': 'keyword'})
         
         df = df.head(15)
         
@@ -388,6 +449,38 @@ def update_trending_topics_table(n):
         logger.error(f"Error creating trending topics table: {str(e)}")
         return [], []
 
+@app.callback(
+    Output("top-authors-table", "data"),
+    Output("top-authors-table", "columns"),
+    Input("interval-component", "n_intervals")
+)
+def update_top_authors_table(n):
+    try:
+        authors_file = os.path.join(PROCESSED_DATA_DIR, "author_stats.csv")
+        if not os.path.exists(authors_file):
+            return [], []
+            
+        df = pd.read_csv(authors_file, nrows=100)
+        
+        display_df = df[['author', 'post_count', 'topics_started', 'replies_written', 'topics_participated',
+                         'engagement_received', 'avg_sentiment', 'pct_positive']].round(2)
+        
+        columns = [
+            {"name": "Author", "id": "author"},
+            {"name": "Posts", "id": "post_count"},
+            {"name": "Topics Started", "id": "topics_started"},
+            {"name": "Replies Written", "id": "replies_written"},
+            {"name": "Topics Participated", "id": "topics_participated"},
+            {"name": "Engagement Received", "id": "engagement_received"},
+            {"name": "Avg Sentiment", "id": "avg_sentiment"},
+            {"name": "% Positive", "id": "pct_positive"}
+        ]
+        
+        return display_df.to_dict('records'), columns
+    except Exception as e:
+        logger.error(f"Error creating top authors table: {str(e)}")
+        return [], []
+
 def create_empty_figure(message):
     """Create an empty figure with a message."""
     fig = go.Figure()
@@ -411,6 +504,7 @@ def create_empty_figure(message):
     return fig
 
 def main():
+    ensure_directories()
     app.run(debug=DASHBOARD_DEBUG, port=DASHBOARD_PORT)
 
 if __name__ == "__main__":
@@ -0,0 +1,440 @@
+"""
+Synthetic forum export generator for scale testing.
+
+Writes forum-topics.json, forum-replies.json, forum-categories.json and
+forum-stats.json in the schemas of the export in pohkim/public, at any size.
+Topics and their replies are generated in blocks and streamed to disk, so memory
+stays flat up to tens of millions of posts. Post lengths are log-normal, reply
+counts and author activity are long-tailed, a share of topics are near-copies of
+recent topics, topics are spread over a time window and categories are Zipf-skewed.
+The same settings and seed always generate the same files, so benchmarks are
+repeatable.
+
+Run the pipeline on the generated export by pointing FORUM_DATA_DIR at it:
+    FORUM_DATA_DIR=analytics/data/synthetic python -m analytics.run_pipeline
+
+Usage:
+    python analytics/generate_forum_data.py [--topics N] [--output-dir DIR] [options]
+"""
+import os
+import json
+import random
+import argparse
+import time
+from collections import deque
+import numpy as np
+import logging
+
+from config import (
+    SYNTHETIC_DATA_DIR,
+    SYNTHETIC_TOPICS,
+    SYNTHETIC_REPLIES_PER_TOPIC,
+    SYNTHETIC_DUPLICATE_RATE,
+    SYNTHETIC_DAYS,
+    SYNTHETIC_CATEGORY_SKEW,
+    SYNTHETIC_AUTHORS,
+    SYNTHETIC_SEED
+)
+from modules.checkpoint import atomic_open
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Categories of the forum export, with words used to make up film titles in each
+CATEGORIES = [
+    {'id': 1, 'name': "Action & Adventure", 'description': "Discuss high-octane action films and adventure epics",
+     'icon': "\U0001F525", 'genre': "action", 'title_words': ["Strike", "Fury", "Velocity", "Outlaw", "Vendetta", "Raid", "Quest", "Siege"]},
+    {'id': 2, 'name': "Drama & Romance", 'description': "Share your thoughts on dramatic and romantic stories",
+     'icon': "\U0001F494", 'genre': "drama", 'title_words': ["Promise", "Letters", "Summer", "Heart", "Harbor", "Vows", "Memory", "Rain"]},
+    {'id': 3, 'name': "Sci-Fi & Fantasy", 'description': "Explore worlds beyond our own and magical realms",
+     'icon': "\U0001F680", 'genre': "sci-fi", 'title_words': ["Odyssey", "Nebula", "Realm", "Dragon", "Horizon", "Protocol", "Galaxy", "Rune"]},
+    {'id': 4, 'name': "Horror & Thriller", 'description': "For fans of spine-tingling and suspenseful content",
+     'icon': "\U0001F47B", 'genre': "horror", 'title_words': ["Shadows", "Cellar", "Whisper", "Hollow", "Ritual", "Night", "Asylum", "Stalker"]},
+    {'id': 5, 'name': "Comedy", 'description': "Laugh and discuss your favorite comedies",
+     'icon': "\U0001F602", 'genre': "comedy", 'title_words': ["Roommates", "Wedding", "Vacation", "Blunder", "Road Trip", "Neighbors", "Reunion", "Prank"]},
+    {'id': 6, 'name': "Documentary & Educational", 'description': "Learn and discuss informative content",
+     'icon': "\U0001F9E0", 'genre': "documentary", 'title_words': ["Planet", "Ocean", "Empire", "Frontier", "Machines", "Wilderness", "History", "Climate"]}
+]
+
+TITLE_PREFIXES = ["The", "Cosmic", "Silent", "Last", "Midnight", "Crimson", "Hidden", "Eternal", "Broken", "Golden"]
+EDITIONS = ["Blu-ray", "4K UHD disc", "collector's edition", "director's cut", "DVD box set", "steelbook", "extended edition", "remastered release"]
+ASPECTS = ["ending", "soundtrack", "cinematography", "plot twist", "lead performance", "special effects", "pacing",
+           "dialogue", "commentary track", "bonus features", "picture quality", "sound mix", "villain", "final scene"]
+OPINIONS = {
+    'positive': ["absolutely stunning", "brilliant", "incredible", "a masterpiece", "beautifully done", "so much fun",
+                 "really impressive", "worth every penny", "unforgettable", "excellent"],
+    'negative': ["disappointing", "a letdown", "badly rushed", "way too long", "confusing", "poorly done",
+                 "not worth the price", "forgettable", "boring", "a mess"]
+}
+TOPIC_TITLES = [
+    "What did everyone think of the {film} ending?",
+    "Is the {film} {edition} worth buying?",
+    "{film} {edition} review",
+    "Best {genre} films to add to my collection?",
+    "Just watched {film} for the first time",
+    "Thoughts on the {aspect} in {film}?",
+    "{film} vs the original: which is better?",
+    "Underrated {genre} movies like {film}",
+    "Problem with my {film} {edition}",
+    "Rewatching {film} this weekend"
+]
+SENTENCES = [
+    "I just finished watching {film} and the {aspect} was {opinion}.",
+    "The {edition} of {film} is {opinion}, especially the {aspect}.",
+    "Honestly the {aspect} was {opinion} and I did not expect that from a {genre} film.",
+    "I picked up the {edition} last week and the {aspect} is {opinion}.",
+    "Compared to other {genre} movies, {film} has a {aspect} that is {opinion}.",
+    "My friends thought the {aspect} was {opinion}, but I am still making up my mind.",
+    "The way the {aspect} comes together in the last act is {opinion}.",
+    "If you collect {genre} films, {film} is worth a look for the {aspect} alone.",
+    "Watched it twice now and the {aspect} is still {opinion}.",
+    "The {edition} includes a {aspect} featurette that is {opinion}."
+]
+TOPIC_CLOSINGS = ["What did everyone else think?", "Has anyone else seen it?", "Would love to hear your opinions.",
+                  "Should I get the {edition}?", "Any recommendations for similar {genre} films?"]
+REPLY_OPENINGS = ["I agree.", "Totally disagree with this.", "Good point!", "Same here.", "Interesting take.",
+                  "Thanks for sharing.", "Not sure about that.", "Exactly what I was thinking."]
+DUPLICATE_SUFFIXES = ["Thoughts?", "Please reply!", "Anyone?", "Reposting in case it got missed.", "Bump."]
+AUTHOR_ADJECTIVES = ["Space", "Cinema", "Film", "Movie", "Retro", "Midnight", "Silver", "Classic", "Indie", "Epic",
+                     "Popcorn", "Noir", "Cult", "Director", "Reel", "Screen"]
+AUTHOR_NOUNS = ["Explorer", "Buff", "Fan", "Critic", "Lover", "Collector", "Geek", "Dreamer", "Watcher", "Junkie",
+                "Guru", "Nerd", "Addict", "Enthusiast", "Scholar", "Hunter"]
+
+# Topics generated (and written) per block
+BLOCK_SIZE = 10000
+
+# Recent topics that near-duplicates are copied from
+DUPLICATE_SOURCES = 1000
+
+def author_name(index):
+    """
+    Get the unique name of an author in the pool.
+    
+    Args:
+        index (int): Index of the author in the pool
+    
+    Returns:
+        str: Author name like 'SpaceExplorer' or 'CinemaBuff42'
+    """
+    adjective = AUTHOR_ADJECTIVES[index % len(AUTHOR_ADJECTIVES)]
+    noun = AUTHOR_NOUNS[(index // len(AUTHOR_ADJECTIVES)) % len(AUTHOR_NOUNS)]
+    number = index // (len(AUTHOR_ADJECTIVES) * len(AUTHOR_NOUNS))
+    return f"{adjective}{noun}{number + 1 if number else ''}"
+
+def relative_date(age_minutes):
+    """
+    Format an age as the export's relative dates (e.g. '3 hours ago').
+    
+    Ages of a day or more are given in days, which data_ingestion.convert_time_to_datetime
+    parses for any count; month and year units would round old posts onto a few dates.
+    
+    Args:
+        age_minutes (float): Minutes between the post and the time of generation
+    
+    Returns:
+        str: Relative date
+    """
+    age_minutes = max(1, int(age_minutes))
+    for unit, minutes in [('day', 24 * 60), ('hour', 60)]:
+        if age_minutes >= minutes:
+            count = age_minutes // minutes
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+    return f"{age_minutes} minute{'s' if age_minutes != 1 else ''} ago"
+
+def zipf_weights(n, skew):
+    """Get normalized weights proportional to 1 / rank ** skew."""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+class ForumDataGenerator:
+    """
+    Class generating forum topics and replies block by block.
+    """
+    def __init__(self, n_topics=SYNTHETIC_TOPICS, replies_per_topic=SYNTHETIC_REPLIES_PER_TOPIC,
+                 duplicate_rate=SYNTHETIC_DUPLICATE_RATE, days=SYNTHETIC_DAYS,
+                 category_skew=SYNTHETIC_CATEGORY_SKEW, n_authors=SYNTHETIC_AUTHORS, seed=SYNTHETIC_SEED):
+        """
+        Initialize the generator.
+        
+        Args:
+            n_topics (int): Number of topics to generate
+            replies_per_topic (float): Mean number of replies per topic
+            duplicate_rate (float): Share of topics that are near-copies of a recent topic
+            days (float): Days between the oldest topic and the time of generation
+            category_skew (float): Zipf exponent of topics per category
+            n_authors (int): Size of the author pool
+            seed (int): Random seed
+        """
+        self.n_topics = n_topics
+        self.replies_per_topic = replies_per_topic
+        self.duplicate_rate = duplicate_rate
+        self.total_minutes = days * 24 * 60
+        self.rng = np.random.default_rng(seed)
+        self.random = random.Random(seed)
+        
+        # Busy categories and prolific authors are assigned at random ranks
+        self.category_order = self.rng.permutation(len(CATEGORIES))
+        self.category_weights = zipf_weights(len(CATEGORIES), category_skew)
+        self.author_order = self.rng.permutation(n_authors)
+        self.author_cdf = np.cumsum(zipf_weights(n_authors, 1.1))
+        
+        self.next_topic_id = 101
+        self.elapsed_minutes = 0.0
+        self.recent_topics = deque(maxlen=DUPLICATE_SOURCES)
+        
+        # Counters for the categories and stats files
+        self.authors_seen = np.zeros(n_authors, dtype=bool)
+        self.category_topics = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.category_posts = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.n_replies = 0
+    
+    def _authors(self, size):
+        """Draw author indices with long-tailed activity."""
+        ranks = np.minimum(np.searchsorted(self.author_cdf, self.rng.random(size)), len(self.author_cdf) - 1)
+        authors = self.author_order[ranks]
+        self.authors_seen[authors] = True
+        return authors
+    
+    def _fill(self, template, category, film, mood):
+        """Fill the slots of a title or sentence template."""
+        return template.format(film=film, genre=category['genre'], edition=self.random.choice(EDITIONS),
+                               aspect=self.random.choice(ASPECTS), opinion=self.random.choice(OPINIONS[mood]))
+    
+    def _film(self, category):
+        """Make up the title of a film in a category."""
+        return f"{self.random.choice(TITLE_PREFIXES)} {self.random.choice(category['title_words'])}"
+    
+    def _text(self, category, film, mood, n_sentences):
+        """Write a post of n_sentences sentences about a film."""
+        return " ".join(self._fill(self.random.choice(SENTENCES), category, film, mood) for _ in range(n_sentences))
+    
+    def _near_duplicate(self, source):
+        """Copy a recent topic with a small edit, as reposts and spam waves do."""
+        title, content, author, category_index = source
+        words = content.split()
+        edit = self.random.random()
+        if edit < 0.4:
+            content = f"{content} {self.random.choice(DUPLICATE_SUFFIXES)}"
+        elif edit < 0.8 and len(words) > 3:
+            words[self.random.randrange(len(words))] = self.random.choice(ASPECTS)
+            content = " ".join(words)
+        else:
+            title = f"{title} (repost)"
+        
+        # Half of the copies are posted by the same author
+        return title, content, author if self.random.random() < 0.5 else None, category_index
+    
+    def generate_block(self, size):
+        """
+        Generate the next block of topics with their replies, in chronological order.
+        
+        Args:
+            size (int): Number of topics in the block
+        
+        Returns:
+            list: (topic, replies) tuples in the export's schemas
+        """
+        rng = self.rng
+        
+        # Topics arrive as a Poisson process spread over the time window
+        gaps = rng.exponential(self.total_minutes / self.n_topics, size)
+        times = self.elapsed_minutes + np.cumsum(gaps)
+        self.elapsed_minutes = float(times[-1])
+        ages = np.maximum(self.total_minutes - times, 1.0)
+        
+        categories = self.category_order[np.searchsorted(np.cumsum(self.category_weights), rng.random(size))
+                                         .clip(max=len(CATEGORIES) - 1)]
+        authors = self._authors(size)
+        moods = np.where(rng.random(size) < 0.65, 'positive', 'negative')
+        is_duplicate = rng.random(size) < self.duplicate_rate
+        topic_sentences = np.clip(np.rint(rng.lognormal(1.3, 0.5, size)), 1, 60).astype(int)
+        
+        # Reply counts are negative binomial: many topics get none, a few get hundreds
+        dispersion = 0.6
+        n_replies = rng.negative_binomial(dispersion, dispersion / (dispersion + self.replies_per_topic), size) \
+            if self.replies_per_topic > 0 else np.zeros(size, dtype=int)
+        reply_authors = self._authors(int(n_replies.sum()))
+        reply_sentences = np.clip(np.rint(rng.lognormal(0.6, 0.6, int(n_replies.sum()))), 1, 30).astype(int)
+        reply_delays = rng.exponential(12 * 60, int(n_replies.sum()))
+        
+        block = []
+        reply_offset = 0
+        for i in range(size):
+            category_index = int(categories[i])
+            category = CATEGORIES[category_index]
+            author = author_name(int(authors[i]))
+            
+            if is_duplicate[i] and self.recent_topics:
+                title, content, source_author, category_index = self._near_duplicate(self.random.choice(self.recent_topics))
+                category = CATEGORIES[category_index]
+                author = source_author or author
+            else:
+                film = self._film(category)
+                mood = moods[i]
+                title = self._fill(self.random.choice(TOPIC_TITLES), category, film, mood)
+                content = self._text(category, film, mood, int(topic_sentences[i]))
+                content = f"{content} {self._fill(self.random.choice(TOPIC_CLOSINGS), category, film, mood)}"
+                self.recent_topics.append((title, content, author, category_index))
+            
+            # Replies follow their topic, most of them within the first day
+            count = int(n_replies[i])
+            reply_ages = ages[i] - np.cumsum(reply_delays[reply_offset:reply_offset + count])
+            replies = []
+            for j in range(count):
+                if reply_ages[j] < 1:
+                    break
+                reply_mood = 'positive' if self.random.random() < 0.6 else 'negative'
+                film = self._film(category)
+                reply_content = self._text(category, film, reply_mood, int(reply_sentences[reply_offset + j]))
+                replies.append({
+                    'id': j + 1,
+                    'author': author_name(int(reply_authors[reply_offset + j])),
+                    'date': relative_date(reply_ages[j]),
+                    'content': f"{self.random.choice(REPLY_OPENINGS)} {reply_content}"
+                })
+            reply_offset += count
+            
+            preview = content[:90].rsplit(' ', 1)[0] + "..." if len(content) > 90 else content
+            topic = {
+                'id': self.next_topic_id,
+                'title': title,
+                'author': author,
+                'date': relative_date(ages[i]),
+                'preview': preview,
+                'content': content,
+                'replies': len(replies),
+                'views': int(len(replies) * rng.lognormal(1.5, 0.5) + rng.lognormal(4.0, 0.8)),
+                'category': category['id']
+            }
+            block.append((topic, replies))
+            
+            self.next_topic_id += 1
+            self.n_replies += len(replies)
+            self.category_topics[category_index] += 1
+            self.category_posts[category_index] += 1 + len(replies)
+        
+        return block
+    
+    def categories(self):
+        """
+        Get the categories with the number of generated topics and posts.
+        
+        Returns:
+            list: Categories in the export's schema
+        """
+        return [{'id': category['id'], 'name': category['name'], 'description': category['description'],
+                 'icon': category['icon'], 'topics': int(self.category_topics[index]),
+                 'posts': int(self.category_posts[index])}
+                for index, category in enumerate(CATEGORIES)]
+    
+    def stats(self):
+        """
+        Get the forum statistics of the generated data.
+        
+        Returns:
+            dict: Stats in the export's schema
+        """
+        members = int(self.authors_seen.sum())
+        return {
+            'topics': self.next_topic_id - 101,
+            'posts': self.next_topic_id - 101 + self.n_replies,
+            'members': members,
+            'online': int(self.rng.integers(1, max(2, members // 50)))
+        }
+
+def generate_forum_data(output_dir=SYNTHETIC_DATA_DIR, n_topics=SYNTHETIC_TOPICS,
+                        replies_per_topic=SYNTHETIC_REPLIES_PER_TOPIC, duplicate_rate=SYNTHETIC_DUPLICATE_RATE,
+                        days=SYNTHETIC_DAYS, category_skew=SYNTHETIC_CATEGORY_SKEW, n_authors=SYNTHETIC_AUTHORS,
+                        seed=SYNTHETIC_SEED, block_size=BLOCK_SIZE):
+    """
+    Generate a synthetic forum export and write it to a directory.
+    
+    Topics and replies are written block by block as JSON arrays and objects with one
+    item per line; every file replaces its previous version only once it is complete.
+    
+    Args:
+        output_dir (str): Directory of the generated export files
+        n_topics (int): Number of topics
+        replies_per_topic (float): Mean number of replies per topic
+        duplicate_rate (float): Share of topics that are near-copies of a recent topic
+        days (float): Days between the oldest topic and now
+        category_skew (float): Zipf exponent of topics per category
+        n_authors (int): Size of the author pool
+        seed (int): Random seed
+        block_size (int): Topics generated and written at a time
+    
+    Returns:
+        dict: Forum stats of the generated export
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    generator = ForumDataGenerator(n_topics, replies_per_topic, duplicate_rate, days, category_skew, n_authors, seed)
+    
+    start_time = time.time()
+    topics_path = os.path.join(output_dir, "forum-topics.json")
+    replies_path = os.path.join(output_dir, "forum-replies.json")
+    with atomic_open(topics_path, 'w', encoding='utf-8') as topics_file, \
+            atomic_open(replies_path, 'w', encoding='utf-8') as replies_file:
+        topic_separator, reply_separator = "\n  ", "\n  "
+        topics_file.write("[")
+        replies_file.write("{")
+        
+        for block_start in range(0, n_topics, block_size):
+            topic_lines, reply_lines = [], []
+            for topic, replies in generator.generate_block(min(block_size, n_topics - block_start)):
+                topic_lines.append(topic_separator + json.dumps(topic))
+                topic_separator = ",\n  "
+                if replies:
+                    reply_lines.append(f"{reply_separator}{json.dumps(str(topic['id']))}: {json.dumps(replies)}")
+                    reply_separator = ",\n  "
+            topics_file.write("".join(topic_lines))
+            replies_file.write("".join(reply_lines))
+            
+            logger.info(f"Generated {generator.next_topic_id - 101} of {n_topics} topics " +
+                        f"({generator.n_replies} replies, {time.time() - start_time:.1f} seconds)")
+        
+        topics_file.write("\n]\n")
+        replies_file.write("\n}\n")
+    
+    with atomic_open(os.path.join(output_dir, "forum-categories.json"), 'w', encoding='utf-8') as f:
+        json.dump(generator.categories(), f, indent=2)
+    stats = generator.stats()
+    with atomic_open(os.path.join(output_dir, "forum-stats.json"), 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
+    
+    logger.info(f"Wrote {stats['topics']} topics and {stats['posts'] - stats['topics']} replies by " +
+                f"{stats['members']} authors to {output_dir} in {time.time() - start_time:.1f} seconds")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic forum export for scale testing")
+    parser.add_argument("--output-dir", default=SYNTHETIC_DATA_DIR,
+                        help="Directory of the generated export files")
+    parser.add_argument("--topics", type=int, default=SYNTHETIC_TOPICS,
+                        help="Number of topics (posts are topics plus replies)")
+    parser.add_argument("--replies-per-topic", type=float, default=SYNTHETIC_REPLIES_PER_TOPIC,
+                        help="Mean number of replies per topic")
+    parser.add_argument("--duplicate-rate", type=float, default=SYNTHETIC_DUPLICATE_RATE,
+                        help="Share of topics that are near-copies of a recent topic")
+    parser.add_argument("--days", type=float, default=SYNTHETIC_DAYS,
+                        help="Days between the oldest topic and now")
+    parser.add_argument("--category-skew", type=float, default=SYNTHETIC_CATEGORY_SKEW,
+                        help="Zipf exponent of topics per category (0 = uniform)")
+    parser.add_argument("--authors", type=int, default=SYNTHETIC_AUTHORS,
+                        help="Size of the author pool")
+    parser.add_argument("--seed", type=int, default=SYNTHETIC_SEED,
+                        help="Random seed; the same settings generate the same files")
+    args = parser.parse_args()
+    
+    if args.topics < 1 or args.authors < 1:
+        parser.error("--topics and --authors must be positive")
+    if not 0 <= args.duplicate_rate <= 1:
+        parser.error("--duplicate-rate must be between 0 and 1")
+    
+    stats = generate_forum_data(args.output_dir, args.topics, args.replies_per_topic, args.duplicate_rate,
+                                args.days, args.category_skew, args.authors, args.seed)
+    print(f"Generated {stats['topics']} topics and {stats['posts']} posts in {args.output_dir}")
+    print(f"Run the pipeline on them with: FORUM_DATA_DIR={args.output_dir} python -m analytics.run_pipeline")
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Author analysis module for forum posts.
+
+This module identifies the authors who drive forum engagement. Topics and replies
+are combined into a sparse author x topic interaction matrix, from which per-author
+activity and sentiment statistics and co-participation similarity between authors
+are computed without ever densifying the matrix.
+"""
+import os
+import sys
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    PROCESSED_DATA_DIR,
+    AUTHOR_SIMILAR_TOP_K,
+    AUTHOR_MIN_SHARED_TOPICS,
+    AUTHOR_MAX_TOPIC_AUTHORS,
+    AUTHOR_BLOCK_SIZE,
+    ensure_directories
+)
+from modules.trending import engagement_score
+from modules.telemetry import span
+from modules.checkpoint import atomic_path
+from modules.memory_budget import read_analysis_csv
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_posts(processed_dir=PROCESSED_DATA_DIR):
+    """
+    Load the processed topics and replies, preferring the files with sentiment scores.
+    
+    Post texts are not used by the author analytics and are skipped under a memory budget.
+    
+    Args:
+        processed_dir (str): Directory containing the processed data files
+    
+    Returns:
+        tuple: (topics_df, replies_df); either may be None if not found
+    """
+    frames = []
+    for filenames in [("topics_sentiment.csv", "topics.csv"), ("replies_sentiment.csv", "replies.csv")]:
+        paths = [os.path.join(processed_dir, filename) for filename in filenames]
+        existing = [path for path in paths if os.path.exists(path)]
+        frames.append(read_analysis_csv(existing[0]) if existing else None)
+    return tuple(frames)
+
+def build_interaction_matrix(topics_df, replies_df=None):
+    """
+    Build the sparse author x topic interaction matrix.
+    
+    Each entry counts the posts (the topic itself and its replies) an author wrote in a topic.
+    
+    Args:
+        topics_df (pandas.DataFrame): Topics with 'id' and 'author' columns
+        replies_df (pandas.DataFrame, optional): Replies with 'topic_id' and 'author' columns
+    
+    Returns:
+        tuple: (CSR matrix of shape (n_authors, n_topics), authors Index, topic ids Index)
+    """
+    posts = [topics_df[['author', 'id']].rename(columns={'id': 'topic_id'})]
+    if replies_df is not None and {'author', 'topic_id'} <= set(replies_df.columns):
+        posts.append(replies_df[['author', 'topic_id']])
+    posts = pd.concat(posts, ignore_index=True).dropna()
+    
+    author_codes, authors = pd.factorize(posts['author'])
+    topic_codes, topic_ids = pd.factorize(posts['topic_id'])
+    
+    # Duplicate (author, topic) pairs are summed on conversion to CSR
+    matrix = sp.coo_matrix(
+        (np.ones(len(posts), dtype=np.float32), (author_codes, topic_codes)),
+        shape=(len(authors), len(topic_ids))
+    ).tocsr()
+    
+    logger.info(f"Built author x topic matrix with {len(authors)} authors, {len(topic_ids)} topics " +
+                f"and {matrix.nnz} interactions")
+    return matrix, authors, topic_ids
+
+def compute_author_stats(matrix, authors, topics_df, replies_df=None):
+    """
+    Compute activity, engagement and sentiment statistics per author.
+    
+    Args:
+        matrix (scipy.sparse.csr_matrix): Author x topic interaction matrix
+        authors (pandas.Index): Authors in matrix row order
+        topics_df (pandas.DataFrame): Topics with 'author', 'replies' and 'views' columns
+        replies_df (pandas.DataFrame, optional): Replies with an 'author' column
+    
+    Returns:
+        pandas.DataFrame: Statistics per author, sorted by engagement received
+    """
+    author_stats = pd.DataFrame({
+        'author': authors,
+        'post_count': np.asarray(matrix.sum(axis=1)).ravel().astype(int),
+        'topics_participated': np.diff(matrix.indptr)
+    })
+    
+    # Topics started and the engagement they received
+    started = topics_df.assign(engagement=engagement_score(topics_df['replies'], topics_df['views']))
+    started = started.groupby('author').agg(
+        topics_started=('id', 'count'),
+        replies_received=('replies', 'sum'),
+        views_received=('views', 'sum'),
+        engagement_received=('engagement', 'sum')
+    )
+    author_stats = author_stats.join(started, on='author')
+    author_stats['replies_written'] = author_stats['post_count'] - author_stats['topics_started'].fillna(0).astype(int)
+    
+    # Sentiment and activity span over all posts of each author
+    posts = [topics_df]
+    if replies_df is not None and 'author' in replies_df.columns:
+        posts.append(replies_df)
+    posts = pd.concat([post.reindex(columns=['author', 'datetime', 'sentiment_score', 'sentiment_label']) for post in posts],
+                      ignore_index=True)
+    posts['datetime'] = pd.to_datetime(posts['datetime'])
+    posts['is_positive'] = (posts['sentiment_label'] == 'positive').astype(float).where(posts['sentiment_score'].notna())
+    
+    sentiment = posts.groupby('author').agg(
+        avg_sentiment=('sentiment_score', 'mean'),
+        pct_positive=('is_positive', 'mean'),
+        first_post=('datetime', 'min'),
+        last_post=('datetime', 'max')
+    )
+    sentiment['pct_positive'] = sentiment['pct_positive'] * 100
+    author_stats = author_stats.join(sentiment, on='author')
+    
+    fill_columns = ['topics_started', 'replies_received', 'views_received', 'engagement_received']
+    author_stats[fill_columns] = author_stats[fill_columns].fillna(0)
+    author_stats['topics_started'] = author_stats['topics_started'].astype(int)
+    
+    return author_stats.sort_values(['engagement_received', 'post_count', 'author'],
+                                    ascending=[False, False, True]).reset_index(drop=True)
+
+def co_participation_similarity(matrix, authors, top_k=AUTHOR_SIMILAR_TOP_K, min_shared=AUTHOR_MIN_SHARED_TOPICS,
+                                max_topic_authors=AUTHOR_MAX_TOPIC_AUTHORS, block_size=AUTHOR_BLOCK_SIZE):
+    """
+    Find the most similar co-participants of every author.
+    
+    Similarity is the cosine of the binary topic participation vectors, computed as
+    sparse products over blocks of authors. Topics with very many participants are left
+    out so the products stay sparse, and only the top-k neighbours of each author are kept.
+    
+    Args:
+        matrix (scipy.sparse.csr_matrix): Author x topic interaction matrix
+        authors (pandas.Index): Authors in matrix row order
+        top_k (int): Number of similar authors kept per author
+        min_shared (int): Minimum number of shared topics
+        max_topic_authors (int): Topics with more participants are ignored
+        block_size (int): Number of authors per sparse product block
+    
+    Returns:
+        pandas.DataFrame: Author pairs with 'shared_topics' and 'similarity' columns
+    """
+    participation = (matrix > 0).astype(np.float32).tocsc()
+    topic_authors = np.diff(participation.indptr)
+    participation = participation[:, topic_authors <= max_topic_authors].tocsr()
+    participation.eliminate_zeros()
+    
+    degree = np.diff(participation.indptr).astype(float)
+    participation_t = participation.T.tocsr()
+    
+    pairs = []
+    for start in range(0, participation.shape[0], block_size):
+        shared = (participation[start:start + block_size] @ participation_t).tocoo()
+        rows, cols, counts = shared.row + start, shared.col, shared.data
+        
+        keep = (rows != cols) & (counts >= min_shared)
+        rows, cols, counts = rows[keep], cols[keep], counts[keep]
+        similarity = counts / np.sqrt(degree[rows] * degree[cols])
+        
+        # Rank neighbours within each author: highest similarity first, ties by author order
+        order = np.lexsort((cols, -similarity, rows))
+        rows, cols, counts, similarity = rows[order], cols[order], counts[order], similarity[order]
+        run_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.array([], dtype=int)
+        rank = np.arange(len(rows)) - np.repeat(run_starts, np.diff(np.r_[run_starts, len(rows)]))
+        top = rank < top_k
+        
+        pairs.append(pd.DataFrame({
+            'author': authors[rows[top]],
+            'similar_author': authors[cols[top]],
+            'shared_topics': counts[top].astype(int),
+            'similarity': similarity[top]
+        }))
+    
+    if not pairs:
+        return pd.DataFrame(columns=['author', 'similar_author', 'shared_topics', 'similarity'])
+    return pd.concat(pairs, ignore_index=True)
+
+def analyze_authors():
+    """
+    Run author analytics and save the results.
+    
+    Returns:
+        dict: Dictionary with the 'author_stats' and 'author_similarity' DataFrames
+    """
+    topics_df, replies_df = load_posts()
+    if topics_df is None:
+        logger.error(f"Topics file not found in {PROCESSED_DATA_DIR}")
+        return None
+    logger.info(f"Loaded {len(topics_df)} topics and {len(replies_df) if replies_df is not None else 0} replies " +
+                "for author analysis")
+    
+    # Build the sparse author x topic matrix
+    with span('build_interaction_matrix', rows_in=len(topics_df) + (len(replies_df) if replies_df is not None else 0)) as record:
+        matrix, authors, topic_ids = build_interaction_matrix(topics_df, replies_df)
+        record.set_rows(rows_out=matrix.nnz)
+    
+    # Per-author statistics
+    with span('compute_author_stats', rows_in=matrix.shape[0]) as record:
+        author_stats = compute_author_stats(matrix, authors, topics_df, replies_df)
+        record.set_rows(rows_out=len(author_stats))
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "author_stats.csv")) as temp_path:
+        author_stats.to_csv(temp_path, index=False)
+    logger.info(f"Saved author statistics to {os.path.join(PROCESSED_DATA_DIR, 'author_stats.csv')}")
+    
+    # Co-participation similarity
+    with span('co_participation_similarity', rows_in=matrix.shape[0]) as record:
+        author_similarity = co_participation_similarity(matrix, authors)
+        record.set_rows(rows_out=len(author_similarity))
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "author_similarity.csv")) as temp_path:
+        author_similarity.to_csv(temp_path, index=False)
+    logger.info(f"Saved {len(author_similarity)} similar author pairs to " +
+                f"{os.path.join(PROCESSED_DATA_DIR, 'author_similarity.csv')}")
+    
+    return {
+        "author_stats": author_stats,
+        "author_similarity": author_similarity
+    }
+
+if __name__ == "__main__":
+    # Execute if run as a script
+    ensure_directories()
+    results = analyze_authors()
+    
+    if results is not None:
+        print("Top authors by engagement received:")
+        for _, row in results["author_stats"].head(10).iterrows():
+            print(f"{row['author']}: {row['post_count']} posts, {row['engagement_received']:.1f} engagement")
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Burst detection module for forum activity and sentiment.
+
+This module flags anomalous periods (e.g. a release causing a reply storm) in
+period x series matrices of activity and sentiment. Every series is scored at
+once with vectorized rolling z-scores or EWMA baselines, so thousands of
+category x metric series are handled without Python loops.
+"""
+import os
+import sys
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    BURST_METHOD,
+    BURST_WINDOW,
+    BURST_MIN_PERIODS,
+    BURST_EWMA_SPAN,
+    BURST_Z_THRESHOLD
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Pandas frequency of a complete period index per period
+PERIOD_FREQUENCIES = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}
+
+# Series scored per metric: (directions flagged, standard deviation floor)
+BURST_METRICS = {
+    'topic_count': ('spike', 1.0),
+    'reply_sum': ('spike', 1.0),
+    'avg_sentiment': ('both', 0.1)
+}
+
+def rolling_zscores(values, window=BURST_WINDOW, min_periods=BURST_MIN_PERIODS, min_std=0.0):
+    """
+    Score every series against the mean and standard deviation of its trailing window.
+    
+    The window excludes the scored period, so a burst does not inflate its own baseline.
+    Windowed sums come from cumulative sums, so the cost is linear in the matrix size.
+    
+    Args:
+        values (numpy.ndarray): Matrix of shape (n_periods, n_series); NaN marks missing values
+        window (int): Number of trailing periods in the baseline
+        min_periods (int): Minimum non-missing baseline periods required for a score
+        min_std (float or numpy.ndarray): Standard deviation floor (scalar or per series)
+    
+    Returns:
+        tuple: (zscores, baseline) matrices of the same shape as values
+    """
+    values = np.asarray(values, dtype=float)
+    observed = ~np.isnan(values)
+    filled = np.where(observed, values, 0.0)
+    
+    # Prefix sums with a leading zero row: sum over [lo, hi) = prefix[hi] - prefix[lo]
+    zeros = np.zeros((1, values.shape[1]))
+    prefix_sum = np.vstack([zeros, np.cumsum(filled, axis=0)])
+    prefix_sumsq = np.vstack([zeros, np.cumsum(filled ** 2, axis=0)])
+    prefix_count = np.vstack([zeros, np.cumsum(observed, axis=0)])
+    
+    hi = np.arange(values.shape[0])
+    lo = np.maximum(hi - window, 0)
+    n = prefix_count[hi] - prefix_count[lo]
+    total = prefix_sum[hi] - prefix_sum[lo]
+    total_sq = prefix_sumsq[hi] - prefix_sumsq[lo]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        baseline = total / n
+        variance = (total_sq - total ** 2 / n) / (n - 1)
+        std = np.maximum(np.sqrt(np.clip(variance, 0, None)), min_std)
+        zscores = (values - baseline) / std
+    
+    zscores[(n < min_periods) | ~observed] = np.nan
+    return zscores, baseline
+
+def ewma_zscores(values, span=BURST_EWMA_SPAN, min_periods=BURST_MIN_PERIODS, min_std=0.0):
+    """
+    Score every series against an exponentially weighted moving average baseline.
+    
+    The EWMA mean and standard deviation are taken up to the previous period, so a
+    burst does not inflate its own baseline.
+    
+    Args:
+        values (numpy.ndarray): Matrix of shape (n_periods, n_series); NaN marks missing values
+        span (int): EWMA span in periods
+        min_periods (int): Minimum non-missing baseline periods required for a score
+        min_std (float or numpy.ndarray): Standard deviation floor (scalar or per series)
+    
+    Returns:
+        tuple: (zscores, baseline) matrices of the same shape as values
+    """
+    values = np.asarray(values, dtype=float)
+    ewm = pd.DataFrame(values).ewm(span=span, min_periods=min_periods, ignore_na=True)
+    baseline = ewm.mean().shift(1).to_numpy()
+    std = np.maximum(ewm.std().shift(1).to_numpy(), min_std)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zscores = (values - baseline) / std
+    
+    return zscores, baseline
+
+def series_matrix(table, period, metrics, series='category'):
+    """
+    Pivot long period tables into a complete period x (metric, series) matrix.
+    
+    Periods without activity are filled with zero counts; averages stay missing.
+    
+    Args:
+        table (pandas.DataFrame): Table with 'period', series and metric columns
+        period (str): Time period of the table ('day', 'week', 'month')
+        metrics (list): Metric columns to pivot
+        series (str): Column identifying each series
+    
+    Returns:
+        pandas.DataFrame: Matrix indexed by period with (metric, series) columns
+    """
+    matrix = table.pivot(index='period', columns=series, values=metrics)
+    if matrix.empty:
+        return matrix
+    
+    periods = pd.date_range(matrix.index.min(), matrix.index.max(), freq=PERIOD_FREQUENCIES[period])
+    matrix = matrix.reindex(periods)
+    matrix.index.name = 'period'
+    
+    count_columns = [column for column in matrix.columns if column[0] != 'avg_sentiment']
+    matrix[count_columns] = matrix[count_columns].fillna(0)
+    return matrix
+
+def detect_bursts(matrix, method=BURST_METHOD, threshold=BURST_Z_THRESHOLD):
+    """
+    Detect bursts in every series of a period x (metric, series) matrix at once.
+    
+    Args:
+        matrix (pandas.DataFrame): Matrix from series_matrix
+        method (str): Baseline method ('rolling' or 'ewma')
+        threshold (float): Absolute z-score above which a period is flagged
+    
+    Returns:
+        pandas.DataFrame: Bursts with period, series, metric, value, baseline, zscore and
+            direction columns
+    """
+    columns = pd.DataFrame(matrix.columns.tolist(), columns=['metric', 'series'])
+    settings = columns['metric'].map(BURST_METRICS)
+    min_std = settings.str[1].to_numpy(dtype=float)
+    spikes_only = (settings.str[0] == 'spike').to_numpy()
+    
+    values = matrix.to_numpy(dtype=float)
+    if method == 'rolling':
+        zscores, baseline = rolling_zscores(values, min_std=min_std)
+    elif method == 'ewma':
+        zscores, baseline = ewma_zscores(values, min_std=min_std)
+    else:
+        raise ValueError(f"Invalid burst detection method: {method}")
+    
+    # Activity series only burst upwards; sentiment series may also drop
+    with np.errstate(invalid='ignore'):
+        flagged = np.where(spikes_only, zscores, np.abs(zscores)) >= threshold
+    rows, cols = np.nonzero(flagged)
+    
+    bursts = pd.DataFrame({
+        'period': matrix.index[rows],
+        'series': columns['series'].to_numpy()[cols],
+        'metric': columns['metric'].to_numpy()[cols],
+        'value': values[rows, cols],
+        'baseline': baseline[rows, cols],
+        'zscore': zscores[rows, cols],
+        'direction': np.where(zscores[rows, cols] > 0, 'spike', 'drop')
+    })
+    
+    logger.info(f"Detected {len(bursts)} bursts in {values.shape[1]} series over {values.shape[0]} periods")
+    return bursts.sort_values(['period', 'zscore'], ascending=[True, False]).reset_index(drop=True)
\ No newline at end of file
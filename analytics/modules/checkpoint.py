@@ -0,0 +1,156 @@
+"""
+Checkpoint module for the analytics pipeline.
+
+This module makes pipeline outputs crash-safe. Files are written to a temporary
+file next to their destination and renamed into place once complete, so a stage
+that dies mid-write leaves the previous output (or none) instead of a truncated
+one. The run checkpoint records which stages of the current run completed, so an
+interrupted or failed run can be continued with --resume instead of starting over.
+File contents are fingerprinted here as well, for the stage manifest and the report
+section cache.
+"""
+import os
+import sys
+import json
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    DATA_DIR
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Options and completed stages of the last run that did not finish
+RUN_CHECKPOINT_PATH = os.path.join(DATA_DIR, "pipeline_checkpoint.json")
+
+@contextmanager
+def atomic_path(path):
+    """
+    Write a file through a temporary path that replaces the destination once complete.
+    
+    The temporary file keeps the destination's extension, so writers that infer the
+    format from the file name (pandas, matplotlib) work unchanged. It is flushed to
+    disk before the rename and removed if the write fails.
+    
+    Args:
+        path (str): Destination path
+    
+    Yields:
+        str: Temporary path to write to
+    """
+    directory, filename = os.path.split(path)
+    stem, extension = os.path.splitext(filename)
+    temp_path = os.path.join(directory, f".{stem}.{os.getpid()}.tmp{extension}")
+    try:
+        yield temp_path
+        with open(temp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+@contextmanager
+def atomic_open(path, mode='w', encoding=None):
+    """
+    Open a file for writing through a temporary file (see atomic_path).
+    
+    Args:
+        path (str): Destination path
+        mode (str): Write mode ('w' or 'wb')
+        encoding (str, optional): Text encoding
+    
+    Yields:
+        file: File object of the temporary file
+    """
+    with atomic_path(path) as temp_path:
+        with open(temp_path, mode, encoding=encoding) as f:
+            yield f
+
+def file_fingerprint(path):
+    """
+    Hash the contents of a file.
+    
+    Args:
+        path (str): Path to the file
+    
+    Returns:
+        str or None: Hex digest, or None if the file does not exist
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_run_checkpoint(path=RUN_CHECKPOINT_PATH):
+    """
+    Load the checkpoint of the last run that did not finish.
+    
+    Args:
+        path (str): Path to the run checkpoint
+    
+    Returns:
+        dict or None: Checkpoint with 'started', 'force', 'only' and 'completed'
+            (mapping of stage name to fingerprint), or None if there is none
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read run checkpoint {path}: {str(e)}")
+        return None
+
+def new_run_checkpoint(force=False, only=None):
+    """
+    Create the checkpoint of a new run.
+    
+    Args:
+        force (bool): Whether the run reruns up-to-date stages
+        only (iterable, optional): Names of the stages selected for the run
+    
+    Returns:
+        dict: Checkpoint without completed stages
+    """
+    return {
+        'started': datetime.now().isoformat(),
+        'force': force,
+        'only': sorted(only) if only else None,
+        'completed': {}
+    }
+
+def save_run_checkpoint(checkpoint, path=RUN_CHECKPOINT_PATH):
+    """
+    Save the run checkpoint.
+    
+    Args:
+        checkpoint (dict): Run checkpoint
+        path (str): Output path
+    """
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+
+def clear_run_checkpoint(path=RUN_CHECKPOINT_PATH):
+    """
+    Remove the run checkpoint once a run has finished.
+    
+    Args:
+        path (str): Path to the run checkpoint
+    """
+    if os.path.exists(path):
+        os.remove(path)
\ No newline at end of file
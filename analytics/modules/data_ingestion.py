@@ -5,6 +5,7 @@ import json
 import pandas as pd
 import logging
 from datetime import datetime
+from itertools import chain
 import sys
 import os
 
@@ -15,8 +16,13 @@ from config import (
     FORUM_REPLIES_FILE, 
     FORUM_CATEGORIES_FILE, 
     FORUM_STATS_FILE,
-    PROCESSED_DATA_DIR
+    PROCESSED_DATA_DIR,
+    MEMORY_BUDGET_MB,
+    ensure_directories
 )
+from modules.telemetry import span
+from modules.checkpoint import atomic_path
+from modules.memory_budget import iter_processed_chunks, csv_chunk_writer
 
 # Configure logging
 logging.basicConfig(
@@ -31,7 +37,7 @@ def load_json_data(file_path):
     
     Args:
         file_path (str): Path to the JSON file
-        
+    
     Returns:
         dict or list: The loaded JSON data
     """
@@ -44,20 +50,107 @@ def load_json_data(file_path):
         logger.error(f"Error loading data from {file_path}: {str(e)}")
         return None
 
-def convert_time_to_datetime(time_str):
+class JsonStream:
+    """
+    Incremental reader for the items of a top-level JSON array or object.
+    
+    The file is read in blocks and each item is decoded as soon as it is complete, so
+    only one item (plus one block) is held in memory at a time.
+    """
+    def __init__(self, f, block_size=1 << 20):
+        """
+        Initialize the reader.
+        
+        Args:
+            f (file): Text file positioned at the start of the JSON document
+            block_size (int): Characters read from the file at a time
+        """
+        self.f = f
+        self.block_size = block_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _read_block(self):
+        """Append the next block of the file to the unparsed rest of the buffer."""
+        block = self.f.read(self.block_size)
+        self.eof = not block
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+    
+    def next_token(self, skip=' \t\r\n'):
+        """Skip the given characters and return the next one without consuming it ('' at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in skip:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._read_block()
+    
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be char."""
+        if self.next_token() != char:
+            raise ValueError(f"Expected '{char}' at character {self.pos} of the current block")
+        self.pos += 1
+    
+    def decode(self):
+        """Decode and consume the next JSON value."""
+        self.next_token()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next block
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_block()
+
+def iter_json_items(file_path):
+    """
+    Stream the items of a JSON file without loading the whole file.
+    
+    Args:
+        file_path (str): Path to a JSON file holding an array or an object
+    
+    Yields:
+        The array's elements, or (key, value) pairs of the object
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        stream = JsonStream(f)
+        opening = stream.next_token()
+        if opening not in ('[', '{'):
+            raise ValueError(f"Expected a JSON array or object in {file_path}")
+        closing = ']' if opening == '[' else '}'
+        stream.expect(opening)
+        
+        while stream.next_token(skip=' \t\r\n,') != closing:
+            if opening == '[':
+                yield stream.decode()
+            else:
+                key = stream.decode()
+                stream.expect(':')
+                yield key, stream.decode()
+
+def convert_time_to_datetime(time_str, now=None):
     """
     Convert time strings like '2 hours ago', '1 day ago' to datetime objects.
     
     Args:
         time_str (str): The time string to convert
-        
+        now (datetime, optional): Time the string is relative to (default: the current time)
+    
     Returns:
         datetime: The calculated datetime object
     """
     if not isinstance(time_str, str):
         return None
-        
-    now = datetime.now()
+    
+    if now is None:
+        now = datetime.now()
     
     if 'minute' in time_str:
         minutes = int(time_str.split()[0])
@@ -77,36 +170,77 @@ def convert_time_to_datetime(time_str):
     else:
         return None
 
-def process_topics_data(topics_data):
+def process_topics_data(topics_data, now=None):
     """
     Process topics data into a pandas DataFrame.
     
     Args:
         topics_data (list): The topics data
-        
+        now (datetime, optional): Time the relative post dates refer to (default: the current time)
+    
     Returns:
         pandas.DataFrame: The processed topics DataFrame
     """
     if not topics_data:
         return None
-        
+    
     df_topics = pd.DataFrame(topics_data)
     
     # Convert date strings to datetime objects
-    df_topics['datetime'] = df_topics['date'].apply(convert_time_to_datetime)
+    df_topics['datetime'] = df_topics['date'].apply(convert_time_to_datetime, now=now)
     
     # Process text data for analysis
     df_topics['text_for_analysis'] = df_topics['title'] + " " + df_topics['content']
     
     return df_topics
 
-def process_replies_data(replies_data):
+def flatten_topic_replies(replies_data):
+    """
+    Flatten replies grouped by topic into one row per reply.
+    
+    Args:
+        replies_data (dict): Mapping of topic id to the list of its replies
+    
+    Returns:
+        pandas.DataFrame: Replies with a 'topic_id' column
+    """
+    rows = []
+    for topic_id, replies in replies_data.items():
+        # Topic ids are JSON object keys, so restore numeric ids
+        topic_id = int(topic_id) if str(topic_id).isdigit() else topic_id
+        for reply in replies:
+            rows.append({'topic_id': topic_id, **reply})
+    
+    if not rows:
+        return pd.DataFrame(columns=['id', 'topic_id', 'author', 'content', 'date'])
+    
+    df_replies = pd.DataFrame(rows)
+    return df_replies[['id', 'topic_id'] + [column for column in df_replies.columns if column not in ('id', 'topic_id')]]
+
+def group_replies_by_topic(pairs):
+    """
+    Group (topic id, reply) pairs into the mapping of topic id to its replies.
+    
+    Args:
+        pairs (list): (topic id, reply) pairs, with the replies of a topic next to each other
+    
+    Returns:
+        dict: Mapping of topic id to the list of its replies
+    """
+    replies_data = {}
+    for topic_id, reply in pairs:
+        replies_data.setdefault(topic_id, []).append(reply)
+    return replies_data
+
+def process_replies_data(replies_data, now=None):
     """
     Process replies data into a pandas DataFrame.
     
     Args:
-        replies_data (list): The replies data
-        
+        replies_data (list or dict): The replies data, as a list of replies or a mapping of
+            topic id to the list of its replies
+        now (datetime, optional): Time the relative post dates refer to (default: the current time)
+    
     Returns:
         pandas.DataFrame: The processed replies DataFrame
     """
@@ -131,9 +265,16 @@ def process_replies_data(replies_data):
                         processed_reply[key] = value
                 
                 processed_data.append(processed_reply)
-                
-            df_replies = pd.DataFrame(processed_data)
             
+            df_replies = pd.DataFrame(processed_data)
+        
+        # If data maps topic ids to their lists of replies
+        elif isinstance(replies_data, dict) and all(
+            isinstance(value, list) and all(isinstance(reply, dict) for reply in value)
+            for value in replies_data.values()
+        ):
+            df_replies = flatten_topic_replies(replies_data)
+        
         # If data is in dictionary format (keys-values)
         elif isinstance(replies_data, dict):
             # Find the length of each array and ensure they're the same
@@ -156,13 +297,17 @@ def process_replies_data(replies_data):
         else:
             logger.error(f"Unexpected data type for replies: {type(replies_data)}")
             return None
-            
+        
         # Convert date strings to datetime objects
         if 'date' in df_replies.columns:
-            df_replies['datetime'] = df_replies['date'].apply(convert_time_to_datetime)
+            df_replies['datetime'] = df_replies['date'].apply(convert_time_to_datetime, now=now)
         
-        return df_replies
+        # Process text data for analysis
+        if 'content' in df_replies.columns:
+            df_replies['text_for_analysis'] = df_replies['content'].fillna('')
         
+        return df_replies
+    
     except Exception as e:
         logger.error(f"Error processing replies data: {str(e)}")
         logger.info(f"Sample of replies data: {str(replies_data)[:500] if replies_data else 'None'}")
@@ -175,51 +320,154 @@ def process_categories_data(categories_data):
     
     Args:
         categories_data (list): The categories data
-        
+    
     Returns:
         pandas.DataFrame: The processed categories DataFrame
     """
     if not categories_data:
         return None
-        
+    
     df_categories = pd.DataFrame(categories_data)
     return df_categories
 
-def get_forum_data():
+def ingest_in_chunks(records, process, output_path, span_name, budget_mb=MEMORY_BUDGET_MB):
     """
-    Load and process all forum data.
+    Process streamed records chunk by chunk and append the chunks to a CSV file.
+    
+    Args:
+        records (iterable): Records streamed from a JSON file
+        process (callable): Function turning a list of records into a DataFrame
+        output_path (str): Path of the processed CSV file
+        span_name (str): Name of the telemetry span
+        budget_mb (float): Memory budget in MB
     
     Returns:
-        tuple: A tuple containing (topics_df, replies_df, categories_df, stats_data)
+        pandas.DataFrame: 'id' column of the saved rows, or None if nothing was saved
     """
-    # Load data
-    topics_data = load_json_data(FORUM_TOPICS_FILE)
-    replies_data = load_json_data(FORUM_REPLIES_FILE)
-    categories_data = load_json_data(FORUM_CATEGORIES_FILE)
-    stats_data = load_json_data(FORUM_STATS_FILE)
+    try:
+        # Optional fields of the export may first appear in a later chunk
+        with span(span_name) as record, csv_chunk_writer(output_path, widen=True) as writer:
+            for chunk in iter_processed_chunks(records, process, budget_mb):
+                writer.write(chunk)
+            record.set_rows(rows_in=writer.rows, rows_out=writer.rows)
+    except Exception as e:
+        logger.error(f"Error ingesting data into {output_path}: {str(e)}")
+        return None
+    
+    if not writer.rows:
+        return None
+    logger.info(f"Saved {writer.rows} processed rows to {output_path} in chunks")
+    return pd.read_csv(output_path, usecols=['id'])
+
+def ingest_topics(topics_file=FORUM_TOPICS_FILE, budget_mb=MEMORY_BUDGET_MB):
+    """
+    Load, process and save the forum topics.
+    
+    Args:
+        topics_file (str): Path to the topics JSON file
+        budget_mb (float, optional): Memory budget in MB. If set, topics are streamed from the
+            file and processed in chunks that fit it.
+    
+    Returns:
+        pandas.DataFrame: The processed topics DataFrame (only its 'id' column under a memory
+            budget), or None if there are no topics
+    """
+    if budget_mb is not None:
+        # Relative dates of every chunk refer to the same time
+        now = datetime.now()
+        return ingest_in_chunks(iter_json_items(topics_file), lambda chunk: process_topics_data(chunk, now=now),
+                                os.path.join(PROCESSED_DATA_DIR, "topics.csv"), 'process_topics_data', budget_mb)
     
-    # Process data
-    topics_df = process_topics_data(topics_data)
-    replies_df = process_replies_data(replies_data)
-    categories_df = process_categories_data(categories_data)
+    topics_data = load_json_data(topics_file)
+    with span('process_topics_data', rows_in=len(topics_data or [])) as record:
+        topics_df = process_topics_data(topics_data)
+        record.set_rows(rows_out=len(topics_df) if topics_df is not None else 0)
     
-    # Save processed data to CSV
     if topics_df is not None:
-        topics_df.to_csv(os.path.join(PROCESSED_DATA_DIR, "topics.csv"), index=False)
+        with atomic_path(os.path.join(PROCESSED_DATA_DIR, "topics.csv")) as temp_path:
+            topics_df.to_csv(temp_path, index=False)
         logger.info(f"Saved processed topics data to {os.path.join(PROCESSED_DATA_DIR, 'topics.csv')}")
+    return topics_df
+
+def ingest_replies(replies_file=FORUM_REPLIES_FILE, budget_mb=MEMORY_BUDGET_MB):
+    """
+    Load, process and save the forum replies.
+    
+    Args:
+        replies_file (str): Path to the replies JSON file
+        budget_mb (float, optional): Memory budget in MB. If set, replies in list or topic-keyed
+            format are streamed from the file and processed in chunks that fit it.
+    
+    Returns:
+        pandas.DataFrame: The processed replies DataFrame (only its 'id' column under a memory
+            budget), or None if there are no replies
+    """
+    if budget_mb is not None:
+        now = datetime.now()
+        output_path = os.path.join(PROCESSED_DATA_DIR, "replies.csv")
+        items = iter_json_items(replies_file)
+        try:
+            first = next(items, None)
+        except Exception as e:
+            logger.error(f"Error loading data from {replies_file}: {str(e)}")
+            return None
+        if isinstance(first, dict):
+            return ingest_in_chunks(chain([first], items), lambda chunk: process_replies_data(chunk, now=now),
+                                    output_path, 'process_replies_data', budget_mb)
+        if isinstance(first, tuple) and isinstance(first[1], list) and all(isinstance(reply, dict) for reply in first[1]):
+            # Stream one (topic id, reply) pair at a time so large topics are split across chunks
+            pairs = ((topic_id, reply) for topic_id, replies in chain([first], items) for reply in replies)
+            return ingest_in_chunks(pairs, lambda chunk: process_replies_data(group_replies_by_topic(chunk), now=now),
+                                    output_path, 'process_replies_data', budget_mb)
+        items.close()
+        logger.warning("Replies are not in list or topic-keyed format, loading them without the memory budget")
+    
+    replies_data = load_json_data(replies_file)
+    with span('process_replies_data') as record:
+        replies_df = process_replies_data(replies_data)
+        record.set_rows(rows_out=len(replies_df) if replies_df is not None else 0)
     
     if replies_df is not None:
-        replies_df.to_csv(os.path.join(PROCESSED_DATA_DIR, "replies.csv"), index=False)
+        with atomic_path(os.path.join(PROCESSED_DATA_DIR, "replies.csv")) as temp_path:
+            replies_df.to_csv(temp_path, index=False)
         logger.info(f"Saved processed replies data to {os.path.join(PROCESSED_DATA_DIR, 'replies.csv')}")
+    return replies_df
+
+def ingest_categories(categories_file=FORUM_CATEGORIES_FILE):
+    """
+    Load, process and save the forum categories.
+    
+    Args:
+        categories_file (str): Path to the categories JSON file
+    
+    Returns:
+        pandas.DataFrame: The processed categories DataFrame, or None if there are no categories
+    """
+    categories_df = process_categories_data(load_json_data(categories_file))
     
     if categories_df is not None:
-        categories_df.to_csv(os.path.join(PROCESSED_DATA_DIR, "categories.csv"), index=False)
+        with atomic_path(os.path.join(PROCESSED_DATA_DIR, "categories.csv")) as temp_path:
+            categories_df.to_csv(temp_path, index=False)
         logger.info(f"Saved processed categories data to {os.path.join(PROCESSED_DATA_DIR, 'categories.csv')}")
+    return categories_df
+
+def get_forum_data():
+    """
+    Load and process all forum data.
+    
+    Returns:
+        tuple: A tuple containing (topics_df, replies_df, categories_df, stats_data)
+    """
+    topics_df = ingest_topics()
+    replies_df = ingest_replies()
+    categories_df = ingest_categories()
+    stats_data = load_json_data(FORUM_STATS_FILE)
     
     return topics_df, replies_df, categories_df, stats_data
 
 if __name__ == "__main__":
     # Execute if run as a script
+    ensure_directories()
     topics_df, replies_df, categories_df, stats_data = get_forum_data()
     
     # Print info about loaded data
@@ -0,0 +1,252 @@
+"""
+Near-duplicate detection module for forum posts.
+
+This module finds spam waves and copy-pasted posts using MinHash signatures over
+word shingles and a banded LSH index, so downstream stages can process one
+representative per cluster of near-duplicates.
+"""
+import os
+import sys
+import re
+import zlib
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    PROCESSED_DATA_DIR,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_NUM_PERM,
+    DEDUP_LSH_BANDS,
+    DEDUP_THRESHOLD,
+    ensure_directories
+)
+from modules.telemetry import span
+from modules.checkpoint import atomic_path
+from modules.memory_budget import read_csv_chunks, csv_chunk_writer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used for the universal hash family (products stay within uint64)
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+def shingle_text(text, k=DEDUP_SHINGLE_SIZE):
+    """
+    Split text into a set of word k-shingles.
+    
+    Args:
+        text (str): Text to shingle
+        k (int): Number of words per shingle
+    
+    Returns:
+        set: Set of shingles
+    """
+    if not isinstance(text, str):
+        return set()
+    
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < k:
+        return {' '.join(words)} if words else set()
+    
+    return {' '.join(words[i:i+k]) for i in range(len(words) - k + 1)}
+
+class MinHasher:
+    """
+    Class for computing MinHash signatures of shingle sets.
+    """
+    def __init__(self, num_perm=DEDUP_NUM_PERM, seed=42):
+        """
+        Initialize the MinHasher.
+        
+        Args:
+            num_perm (int): Number of hash permutations (signature length)
+            seed (int): Random seed for the hash family
+        """
+        self.num_perm = num_perm
+        
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm).astype(np.uint64)
+    
+    def signature(self, shingles):
+        """
+        Compute the MinHash signature of a set of shingles.
+        
+        Args:
+            shingles (set): Set of shingles
+        
+        Returns:
+            numpy.ndarray: Signature of length num_perm
+        """
+        if not shingles:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype=np.uint64) % MERSENNE_PRIME
+        
+        # Apply all permutations at once: (a * x + b) mod p, then take the minimum per permutation
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+    
+    def signatures(self, texts, k=DEDUP_SHINGLE_SIZE):
+        """
+        Compute MinHash signatures for a list of texts.
+        
+        Args:
+            texts (list): List of texts
+            k (int): Number of words per shingle
+        
+        Returns:
+            numpy.ndarray: Signature matrix of shape (len(texts), num_perm)
+        """
+        signatures = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+        for i, text in enumerate(texts):
+            signatures[i] = self.signature(shingle_text(text, k))
+        return signatures
+
+def find_near_duplicate_clusters(signatures, bands=DEDUP_LSH_BANDS, threshold=DEDUP_THRESHOLD):
+    """
+    Group near-duplicate documents using a banded LSH index over MinHash signatures.
+    
+    Documents sharing a band bucket are only compared with the first document of the
+    bucket, so the cost stays linear in the number of documents per band rather than
+    quadratic in the bucket size.
+    
+    Args:
+        signatures (numpy.ndarray): Signature matrix of shape (n_docs, num_perm)
+        bands (int): Number of LSH bands
+        threshold (float): Minimum estimated Jaccard similarity to merge two documents
+    
+    Returns:
+        numpy.ndarray: Cluster label per document (index of the cluster's first document)
+    """
+    n_docs, num_perm = signatures.shape
+    rows = num_perm // bands
+    
+    # Union-find over document indices
+    parent = np.arange(n_docs)
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for band in range(bands):
+        band_slice = signatures[:, band * rows:(band + 1) * rows]
+        buckets = {}
+        
+        for i in range(n_docs):
+            key = band_slice[i].tobytes()
+            head = buckets.setdefault(key, i)
+            if head == i:
+                continue
+            
+            root_head, root_i = find(head), find(i)
+            if root_head == root_i:
+                continue
+            
+            # Verify the LSH candidate with the estimated Jaccard similarity
+            similarity = np.mean(signatures[head] == signatures[i])
+            if similarity >= threshold:
+                parent[max(root_head, root_i)] = min(root_head, root_i)
+    
+    return np.array([find(i) for i in range(n_docs)])
+
+def select_representatives(df):
+    """
+    Select one representative post per near-duplicate cluster.
+    
+    Args:
+        df (pandas.DataFrame): Posts, optionally annotated by detect_near_duplicates
+    
+    Returns:
+        pandas.DataFrame: Representative posts with a 'cluster_size' weight column
+    """
+    if 'is_representative' not in df.columns:
+        return df.assign(cluster_size=1)
+    
+    return df[df['is_representative'].astype(bool)]
+
+def detect_near_duplicates():
+    """
+    Detect near-duplicate forum topics and annotate the processed topics data.
+    
+    Adds 'duplicate_cluster' (id of the cluster's representative topic), 'cluster_size'
+    and 'is_representative' columns to topics.csv. Topics are read in chunks that fit
+    the memory budget; only the ids and signatures of all topics are kept in memory.
+    
+    Returns:
+        pandas.DataFrame: 'id', 'duplicate_cluster', 'cluster_size' and 'is_representative'
+            of every topic
+    """
+    # Load processed topics
+    topics_path = os.path.join(PROCESSED_DATA_DIR, "topics.csv")
+    if not os.path.exists(topics_path):
+        logger.error(f"Topics file not found: {topics_path}")
+        return None
+    
+    # Compute MinHash signatures chunk by chunk and group near-duplicates
+    minhasher = MinHasher()
+    ids, signatures = [], []
+    with span('minhash_signatures') as record:
+        for chunk in read_csv_chunks(topics_path, usecols=['id', 'text_for_analysis']):
+            ids.append(chunk['id'].to_numpy())
+            # Signature values are below the 31-bit Mersenne prime, so 32 bits hold them
+            signatures.append(minhasher.signatures(chunk['text_for_analysis'].tolist()).astype(np.uint32))
+        ids = np.concatenate(ids)
+        signatures = np.concatenate(signatures)
+        record.set_rows(rows_in=len(ids), rows_out=len(signatures))
+    logger.info(f"Computed MinHash signatures for {len(ids)} topics")
+    
+    with span('find_near_duplicate_clusters', rows_in=len(signatures)) as record:
+        labels = find_near_duplicate_clusters(signatures)
+        record.set_rows(rows_out=len(np.unique(labels)))
+    
+    annotations = pd.DataFrame({
+        'id': ids,
+        'duplicate_cluster': ids[labels],
+        'cluster_size': np.bincount(labels, minlength=len(labels))[labels],
+        'is_representative': np.arange(len(labels)) == labels
+    })
+    
+    n_clusters = annotations['is_representative'].sum()
+    n_duplicates = len(annotations) - n_clusters
+    logger.info(f"Found {n_duplicates} near-duplicate topics ({n_clusters} unique clusters)")
+    
+    # Save annotated topics chunk by chunk, keeping the members of clusters for the cluster file
+    clusters = []
+    offset = 0
+    with csv_chunk_writer(topics_path) as writer:
+        for chunk in read_csv_chunks(topics_path):
+            chunk_annotations = annotations.iloc[offset:offset + len(chunk)]
+            offset += len(chunk)
+            for column in ['duplicate_cluster', 'cluster_size', 'is_representative']:
+                chunk[column] = chunk_annotations[column].to_numpy()
+            writer.write(chunk)
+            clusters.append(chunk[chunk['cluster_size'] > 1][['duplicate_cluster', 'id', 'title', 'author', 'cluster_size']])
+    logger.info(f"Saved near-duplicate annotations to {topics_path}")
+    
+    clusters = pd.concat(clusters, ignore_index=True)
+    clusters = clusters.sort_values(['cluster_size', 'duplicate_cluster', 'id'], ascending=[False, True, True])
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "near_duplicate_clusters.csv")) as temp_path:
+        clusters.to_csv(temp_path, index=False)
+    logger.info(f"Saved near-duplicate clusters to {os.path.join(PROCESSED_DATA_DIR, 'near_duplicate_clusters.csv')}")
+    
+    return annotations
+
+if __name__ == "__main__":
+    # Execute if run as a script
+    ensure_directories()
+    topics_df = detect_near_duplicates()
+    
+    if topics_df is not None:
+        n_clusters = topics_df['is_representative'].sum()
+        print(f"{len(topics_df)} topics in {n_clusters} clusters " +
+              f"({len(topics_df) - n_clusters} near-duplicates removed downstream)")
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Figure cache module for forum analytics charts.
+
+This module skips chart renders whose inputs did not change. Each saved PNG carries
+a hash of its plotted data and plot parameters in its metadata, so a chart is only
+re-rendered when that hash differs. Keeping the key inside the image means concurrent
+renders need no shared manifest and a deleted image is simply rendered again.
+"""
+import os
+import sys
+import hashlib
+import pandas as pd
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    FIGURE_CACHE_ENABLED
+)
+from modules.checkpoint import atomic_path
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# PNG text field holding the cache key of a rendered figure
+FIGURE_KEY_FIELD = 'FigureCacheKey'
+
+def get_pyplot():
+    """
+    Import pyplot on first use, with a backend that renders without a display.
+    
+    matplotlib is only imported once a chart is actually rendered, so importing the
+    analysis modules (e.g. from the dashboard or the ingestion CLI) stays fast.
+    
+    Returns:
+        module: matplotlib.pyplot
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Render charts without a display, also in worker processes
+    import matplotlib.pyplot as plt
+    return plt
+
+def close_figures():
+    """Close all open matplotlib figures (nothing to close if pyplot was never imported)."""
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+
+def figure_key(*data, **params):
+    """
+    Hash the plotted data and plot parameters of a figure.
+    
+    Args:
+        *data: Plotted data (DataFrames, Series, strings or other objects with a stable repr)
+        **params: Plot parameters (e.g. name, period, title)
+    
+    Returns:
+        str: Hex digest identifying the figure's inputs
+    """
+    digest = hashlib.sha256()
+    for item in data:
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            digest.update(repr(item.dtypes if isinstance(item, pd.DataFrame) else item.dtype).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(item, index=True).to_numpy().tobytes())
+        elif isinstance(item, str):
+            digest.update(item.encode('utf-8'))
+        else:
+            digest.update(repr(item).encode('utf-8'))
+    digest.update(repr(sorted(params.items())).encode('utf-8'))
+    return digest.hexdigest()
+
+def is_figure_current(output_path, key):
+    """
+    Check whether a rendered figure was produced from the same inputs.
+    
+    Args:
+        output_path (str): Path of the rendered PNG
+        key (str): Cache key of the figure's current inputs
+    
+    Returns:
+        bool: True if the figure is up to date and the render can be skipped
+    """
+    if not FIGURE_CACHE_ENABLED or not os.path.exists(output_path):
+        return False
+    
+    from PIL import Image
+    try:
+        with Image.open(output_path) as image:
+            cached_key = image.info.get(FIGURE_KEY_FIELD)
+    except Exception as e:
+        logger.warning(f"Could not read figure cache key from {output_path}: {str(e)}")
+        return False
+    
+    if cached_key != key:
+        return False
+    
+    logger.info(f"Figure cache hit, skipping render of {output_path}")
+    return True
+
+def save_figure(output_path, key, dpi=300):
+    """
+    Save the current matplotlib figure with its cache key and close it.
+    
+    Args:
+        output_path (str): Path to save the PNG
+        key (str): Cache key of the figure's inputs
+        dpi (int): Resolution of the saved image
+    """
+    plt = get_pyplot()
+    with atomic_path(output_path) as temp_path:
+        plt.savefig(temp_path, dpi=dpi, bbox_inches='tight', metadata={FIGURE_KEY_FIELD: key})
+    plt.close()
\ No newline at end of file
@@ -0,0 +1,312 @@
+"""
+Memory budget module for the analytics pipeline.
+
+When MEMORY_BUDGET_MB is set, stages read their inputs in chunks whose size is
+estimated from a sample of rows, write their outputs chunk by chunk, and spill the
+intermediates they need again later (e.g. preprocessed texts grouped by category)
+to disk instead of holding them in memory. Without a budget the same helpers hand
+out the whole input as a single chunk and keep intermediates in memory, so every
+stage has one code path for both modes.
+"""
+import os
+import sys
+import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+import pandas as pd
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    DATA_DIR,
+    MEMORY_BUDGET_MB,
+    MEMORY_CHUNK_FRACTION
+)
+from modules.checkpoint import atomic_path
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Temporary directories of spilled intermediates, removed when their stage finishes
+SPILL_DIR = os.path.join(DATA_DIR, "spill")
+
+# Rows read (or records processed) to estimate the memory of one row
+SAMPLE_ROWS = 1000
+
+# Long text columns that only ingestion, sentiment and topic analysis read
+TEXT_COLUMNS = ('content', 'preview', 'text_for_analysis', 'processed_text')
+
+def budget_rows(sample_df, budget_mb=MEMORY_BUDGET_MB, fraction=MEMORY_CHUNK_FRACTION):
+    """
+    Estimate how many rows like the sample fit in one chunk of the memory budget.
+    
+    Args:
+        sample_df (pandas.DataFrame): Sample of the rows to be chunked
+        budget_mb (float, optional): Memory budget in MB (None = no budget)
+        fraction (float): Share of the budget one chunk may take
+    
+    Returns:
+        int or None: Rows per chunk, or None if there is no budget
+    """
+    if budget_mb is None:
+        return None
+    if sample_df is None or sample_df.empty:
+        return SAMPLE_ROWS
+    
+    row_bytes = sample_df.memory_usage(index=False, deep=True).sum() / len(sample_df)
+    return max(1, int(budget_mb * 1024 * 1024 * fraction / max(row_bytes, 1)))
+
+def read_csv_chunks(path, usecols=None, budget_mb=MEMORY_BUDGET_MB, chunk_rows=None):
+    """
+    Read a CSV file in chunks that fit the memory budget.
+    
+    Args:
+        path (str): Path to the CSV file
+        usecols (list or callable, optional): Columns to read
+        budget_mb (float, optional): Memory budget in MB (None = read the whole file at once)
+        chunk_rows (int, optional): Fixed number of rows per chunk, used instead of the budget
+    
+    Yields:
+        pandas.DataFrame: Consecutive chunks of rows
+    """
+    if chunk_rows is not None:
+        yield from pd.read_csv(path, usecols=usecols, chunksize=chunk_rows)
+        return
+    if budget_mb is None:
+        yield pd.read_csv(path, usecols=usecols)
+        return
+    
+    chunk_rows = budget_rows(pd.read_csv(path, usecols=usecols, nrows=SAMPLE_ROWS), budget_mb)
+    logger.info(f"Reading {os.path.basename(path)} in chunks of {chunk_rows} rows ({budget_mb} MB budget)")
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunk_rows)
+
+def read_analysis_csv(path, budget_mb=MEMORY_BUDGET_MB):
+    """
+    Read a processed CSV file for analyses that do not look at the post texts.
+    
+    Under a memory budget the long text columns are skipped; they usually take most
+    of the memory of a posts table. The other columns are read whole, because author and
+    trend analysis join and aggregate across all posts.
+    
+    Args:
+        path (str): Path to the CSV file
+        budget_mb (float, optional): Memory budget in MB (None = read every column)
+    
+    Returns:
+        pandas.DataFrame: The file's rows
+    """
+    if budget_mb is None:
+        return pd.read_csv(path)
+    return pd.read_csv(path, usecols=lambda column: column not in TEXT_COLUMNS)
+
+def iter_processed_chunks(records, process, budget_mb=MEMORY_BUDGET_MB):
+    """
+    Process a stream of records in chunks that fit the memory budget.
+    
+    The first SAMPLE_ROWS records are processed on their own and the memory of the
+    resulting rows sizes the chunks that follow.
+    
+    Args:
+        records (iterable): Input records (e.g. posts streamed from a JSON file)
+        process (callable): Function turning a list of records into a DataFrame
+        budget_mb (float, optional): Memory budget in MB (None = process all records at once)
+    
+    Yields:
+        pandas.DataFrame: Processed chunks
+    """
+    records = iter(records)
+    chunk_rows = None if budget_mb is None else SAMPLE_ROWS
+    sampled = budget_mb is None
+    while True:
+        chunk = list(islice(records, chunk_rows))
+        if not chunk:
+            return
+        
+        df = process(chunk)
+        if not sampled:
+            chunk_rows = budget_rows(df, budget_mb)
+            sampled = True
+            logger.info(f"Processing records in chunks of {chunk_rows} ({budget_mb} MB budget)")
+        if df is not None:
+            yield df
+
+class CsvChunkWriter:
+    """
+    Appends DataFrame chunks to a CSV file with a fixed set of columns.
+    
+    The columns are declared up front or taken from the first chunk. Chunks lacking some
+    of them get empty values. A chunk with other columns raises a ValueError, unless the
+    writer widens the file to take them.
+    """
+    def __init__(self, path, columns=None, widen=False):
+        """
+        Initialize the writer.
+        
+        Args:
+            path (str): Path of the CSV file to write
+            columns (list, optional): Columns of the file. If None, the columns of the first chunk.
+            widen (bool): Add unexpected columns to the file (rewriting the rows written so far)
+                instead of raising
+        """
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.widen = widen
+        self.started = False
+        self.rows = 0
+        self.chunk_rows = 1
+    
+    def write(self, df):
+        """
+        Append a chunk of rows.
+        
+        Args:
+            df (pandas.DataFrame): Rows to append
+        
+        Raises:
+            ValueError: If the chunk has columns the file does not have and the writer does not widen
+        """
+        if self.columns is None:
+            self.columns = list(df.columns)
+        unexpected = [column for column in df.columns if column not in self.columns]
+        if unexpected:
+            if not self.widen:
+                raise ValueError("Chunk has columns the CSV file does not have: " +
+                                 ", ".join(str(column) for column in unexpected))
+            self._add_columns(unexpected)
+        
+        df.reindex(columns=self.columns).to_csv(self.path, mode='a' if self.started else 'w',
+                                                header=not self.started, index=False)
+        self.started = True
+        self.rows += len(df)
+        self.chunk_rows = max(self.chunk_rows, len(df))
+    
+    def _add_columns(self, columns):
+        """Add empty columns to the rows written so far, copying them chunk by chunk."""
+        if self.started:
+            widened_path = f"{self.path}.widen"
+            pd.DataFrame(columns=self.columns + columns).to_csv(widened_path, index=False)
+            # Read the values back as written, so the copy does not change their formatting
+            for chunk in pd.read_csv(self.path, dtype=str, keep_default_na=False, chunksize=self.chunk_rows):
+                chunk.reindex(columns=self.columns + columns).to_csv(widened_path, mode='a', header=False, index=False)
+            os.replace(widened_path, self.path)
+            logger.info(f"Added columns {', '.join(str(column) for column in columns)} to the {self.rows} rows written so far")
+        self.columns = self.columns + columns
+
+@contextmanager
+def csv_chunk_writer(path, columns=None, widen=False):
+    """
+    Write a CSV file chunk by chunk, replacing the destination once every chunk is written.
+    
+    Args:
+        path (str): Destination path
+        columns (list, optional): Columns of the file (see CsvChunkWriter)
+        widen (bool): Add columns first seen in later chunks instead of raising (see CsvChunkWriter)
+    
+    Yields:
+        CsvChunkWriter: Writer to append chunks with
+    """
+    with atomic_path(path) as temp_path:
+        writer = CsvChunkWriter(temp_path, columns, widen)
+        yield writer
+        if not writer.started:
+            # Nothing was written; leave an empty file rather than the previous output
+            open(temp_path, 'w').close()
+
+class SpillFile:
+    """
+    Chunks of an intermediate DataFrame, appended to a file on disk (or kept in memory
+    without a budget) and read back one chunk at a time.
+    """
+    def __init__(self, path=None):
+        """
+        Initialize the spill file.
+        
+        Args:
+            path (str, optional): File to spill to. If None, chunks are kept in memory.
+        """
+        self.path = path
+        self.chunks = []
+        self.rows = 0
+    
+    def append(self, df):
+        """
+        Add a chunk of rows.
+        
+        Args:
+            df (pandas.DataFrame): Rows to add
+        """
+        if self.path is None:
+            self.chunks.append(df)
+        else:
+            with open(self.path, 'ab') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.rows += len(df)
+    
+    def __len__(self):
+        return self.rows
+    
+    def __iter__(self):
+        if self.path is None:
+            yield from self.chunks
+            return
+        if not os.path.exists(self.path):
+            return
+        
+        with open(self.path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    
+    def read(self):
+        """
+        Read every chunk back into one DataFrame.
+        
+        Returns:
+            pandas.DataFrame: All rows, in the order they were added
+        """
+        chunks = list(self)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+class SpillDirectory:
+    """
+    Named spill files of one stage in a temporary directory that is removed on exit.
+    """
+    def __init__(self, name, budget_mb=MEMORY_BUDGET_MB, spill_dir=SPILL_DIR, on_disk=None):
+        """
+        Initialize the spill directory.
+        
+        Args:
+            name (str): Prefix of the temporary directory (e.g. the stage name)
+            budget_mb (float, optional): Memory budget in MB. If None, nothing is spilled to disk.
+            spill_dir (str): Parent directory of the temporary directories
+            on_disk (bool, optional): Spill to disk even without a budget (e.g. for out-of-core
+                processing); defaults to whether there is a budget
+        """
+        self.path = None
+        if on_disk or (on_disk is None and budget_mb is not None):
+            os.makedirs(spill_dir, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix=f"{name}.", dir=spill_dir)
+        self.files = {}
+    
+    def __getitem__(self, key):
+        if key not in self.files:
+            path = os.path.join(self.path, f"{len(self.files)}.pkl") if self.path is not None else None
+            self.files[key] = SpillFile(path)
+        return self.files[key]
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.files.clear()
\ No newline at end of file
@@ -0,0 +1,502 @@
+"""
+Partitioned execution module for the analytics pipeline.
+
+This module splits the forum export into time shards (by month by default) and runs
+ingestion, sentiment scoring and topic preprocessing per shard in worker processes.
+Workers claim shards through claim files created with O_EXCL in the shard directory,
+so workers on several machines sharing the data directory can process the same plan.
+A worker that stops sending heartbeats loses its claim to another worker. Once every
+shard is done, the shard outputs are merged in shard order into the processed files
+the rest of the pipeline reads, so the merged result does not depend on which worker
+processed which shard.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    DATA_DIR,
+    PROCESSED_DATA_DIR,
+    FORUM_TOPICS_FILE,
+    FORUM_REPLIES_FILE,
+    PARTITION_PERIOD,
+    PARTITION_WORKERS,
+    PARTITION_HEARTBEAT_SECONDS,
+    PARTITION_CLAIM_TIMEOUT,
+    PARTITION_POLL_SECONDS,
+    ensure_directories
+)
+from modules.data_ingestion import load_json_data, convert_time_to_datetime, process_topics_data, process_replies_data
+from modules.checkpoint import atomic_path, atomic_open
+from modules.telemetry import span, collect_spans, add_spans
+from modules.memory_budget import read_csv_chunks, csv_chunk_writer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Shard inputs, outputs and claim files of the current plan
+SHARD_DIR = os.path.join(DATA_DIR, "shards")
+PLAN_FILE = "plan.json"
+
+# Shard name of posts whose date could not be parsed
+UNDATED_SHARD = "undated"
+
+# strftime formats of the shard names per period
+SHARD_NAME_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%G-W%V',
+    'month': '%Y-%m'
+}
+
+def shard_names(datetimes, period=PARTITION_PERIOD):
+    """
+    Name the time shard of every post.
+    
+    Args:
+        datetimes (pandas.Series): Post datetimes (NaT for undated posts)
+        period (str): Shard size ('day', 'week' or 'month')
+    
+    Returns:
+        pandas.Series: Shard names that sort chronologically
+    """
+    if period not in SHARD_NAME_FORMATS:
+        raise ValueError(f"Invalid partition period: {period}")
+    return pd.to_datetime(datetimes).dt.strftime(SHARD_NAME_FORMATS[period]).fillna(UNDATED_SHARD)
+
+def plan_shards(topics_file=FORUM_TOPICS_FILE, replies_file=FORUM_REPLIES_FILE, shard_dir=SHARD_DIR,
+                period=PARTITION_PERIOD, timeout=PARTITION_CLAIM_TIMEOUT):
+    """
+    Split the forum export into time shards and write the input files of every shard.
+    
+    Replies go to the shard of their topic (replies of unknown topics to the undated shard).
+    Relative post dates ('2 days ago') are resolved against one reference time recorded in
+    the plan, so every worker computes the same dates.
+    Any previous plan in shard_dir is removed, unless a worker still holds a live claim
+    on one of its shards.
+    
+    Args:
+        topics_file (str): Path to the topics JSON file
+        replies_file (str): Path to the replies JSON file
+        shard_dir (str): Directory of the plan and its shards
+        period (str): Shard size ('day', 'week' or 'month')
+        timeout (float): Seconds without a heartbeat after which a claim is no longer live
+    
+    Returns:
+        dict: Plan with 'reference_time', 'period' and the sorted 'shards' names
+    """
+    claimed = live_claims(shard_dir, timeout)
+    if claimed:
+        raise RuntimeError(f"Shards of the current plan are still being processed: {', '.join(claimed)}")
+    
+    topics_data = load_json_data(topics_file)
+    if not topics_data:
+        raise RuntimeError(f"No topics to partition in {topics_file}")
+    replies_data = load_json_data(replies_file) or {}
+    if not isinstance(replies_data, dict):
+        raise RuntimeError("Partitioned execution needs replies grouped by topic id")
+    
+    reference_time = datetime.now().replace(microsecond=0)
+    dates = pd.Series([convert_time_to_datetime(topic.get('date'), now=reference_time) for topic in topics_data],
+                      dtype='datetime64[ns]')
+    names = shard_names(dates, period)
+    topic_shards = {str(topic.get('id')): name for topic, name in zip(topics_data, names)}
+    
+    reply_shards = {topic_id: topic_shards.get(str(topic_id), UNDATED_SHARD) for topic_id in replies_data}
+    
+    if os.path.exists(shard_dir):
+        shutil.rmtree(shard_dir)
+    shards = sorted(set(names) | set(reply_shards.values()))
+    for name in shards:
+        os.makedirs(os.path.join(shard_dir, name))
+    
+    # Keep the export order within every shard
+    for name in shards:
+        shard_topics = [topic for topic, topic_shard in zip(topics_data, names) if topic_shard == name]
+        shard_replies = {topic_id: replies for topic_id, replies in replies_data.items() if reply_shards[topic_id] == name}
+        with atomic_open(os.path.join(shard_dir, name, "topics.json"), 'w', encoding='utf-8') as f:
+            json.dump(shard_topics, f)
+        with atomic_open(os.path.join(shard_dir, name, "replies.json"), 'w', encoding='utf-8') as f:
+            json.dump(shard_replies, f)
+    
+    plan = {'reference_time': reference_time.isoformat(), 'period': period, 'shards': shards}
+    with atomic_open(os.path.join(shard_dir, PLAN_FILE), 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2)
+    logger.info(f"Partitioned {len(topics_data)} topics into {len(shards)} {period} shards in {shard_dir}")
+    return plan
+
+def load_plan(shard_dir=SHARD_DIR):
+    """
+    Load the current partition plan.
+    
+    Args:
+        shard_dir (str): Directory of the plan and its shards
+    
+    Returns:
+        dict or None: The plan, or None if there is none
+    """
+    path = os.path.join(shard_dir, PLAN_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def shard_state(shard_path):
+    """
+    Get the processing state of a shard.
+    
+    Args:
+        shard_path (str): Shard directory
+    
+    Returns:
+        str: 'done', 'failed', 'claimed' or 'pending'
+    """
+    if os.path.exists(os.path.join(shard_path, "done.json")):
+        return 'done'
+    if os.path.exists(os.path.join(shard_path, "failed.json")):
+        return 'failed'
+    if _claim_generations(shard_path):
+        return 'claimed'
+    return 'pending'
+
+def live_claims(shard_dir=SHARD_DIR, timeout=PARTITION_CLAIM_TIMEOUT):
+    """
+    Find the shards of the current plan claimed by a worker that is still sending heartbeats.
+    
+    Args:
+        shard_dir (str): Directory of the plan and its shards
+        timeout (float): Seconds without a heartbeat after which a claim is no longer live
+    
+    Returns:
+        list: Names of the shards with a live claim
+    """
+    plan = load_plan(shard_dir)
+    if plan is None:
+        return []
+    
+    claimed = []
+    for name in plan['shards']:
+        shard_path = os.path.join(shard_dir, name)
+        if not os.path.isdir(shard_path) or shard_state(shard_path) != 'claimed':
+            continue
+        heartbeat_age = _heartbeat_age(shard_path)
+        if heartbeat_age is not None and heartbeat_age < timeout:
+            claimed.append(name)
+    return claimed
+
+def _heartbeat_age(shard_path):
+    """Return the seconds since the last heartbeat of a shard's latest claim, or None if it has none."""
+    generations = _claim_generations(shard_path)
+    if not generations:
+        return None
+    try:
+        return time.time() - os.path.getmtime(os.path.join(shard_path, f"claim.{generations[-1]}"))
+    except FileNotFoundError:
+        return None
+
+def _claim_generations(shard_path):
+    """Return the generation numbers of the claim files of a shard, in increasing order."""
+    generations = []
+    for filename in os.listdir(shard_path):
+        prefix, _, generation = filename.partition('.')
+        if prefix == 'claim' and generation.isdigit():
+            generations.append(int(generation))
+    return sorted(generations)
+
+def claim_shard(shard_path, worker_id, timeout=PARTITION_CLAIM_TIMEOUT):
+    """
+    Claim a shard for processing.
+    
+    A claim is a file 'claim.<generation>' created with O_EXCL, which succeeds for exactly
+    one worker, also across machines sharing the directory. The owner touches its claim
+    file as a heartbeat; a claim whose heartbeat is older than timeout is taken over by
+    creating the next generation, so a crashed worker's shard is processed again.
+    
+    Args:
+        shard_path (str): Shard directory
+        worker_id (str): Identifier of the claiming worker (recorded in the claim)
+        timeout (float): Seconds without a heartbeat after which a claim is taken over
+    
+    Returns:
+        str or None: Path of the claim file, or None if the shard is done or claimed by another worker
+    """
+    if shard_state(shard_path) in ('done', 'failed'):
+        return None
+    
+    generations = _claim_generations(shard_path)
+    generation = 0
+    if generations:
+        try:
+            heartbeat_age = time.time() - os.path.getmtime(os.path.join(shard_path, f"claim.{generations[-1]}"))
+        except FileNotFoundError:
+            return None
+        if heartbeat_age < timeout:
+            return None
+        generation = generations[-1] + 1
+    
+    claim_path = os.path.join(shard_path, f"claim.{generation}")
+    try:
+        fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'worker': worker_id, 'claimed': datetime.now().isoformat()}, f)
+    
+    if generation:
+        logger.warning(f"Worker {worker_id} took over shard {os.path.basename(shard_path)} " +
+                       f"(no heartbeat for {heartbeat_age:.0f} seconds)")
+    return claim_path
+
+@contextmanager
+def _heartbeat(claim_path, interval=PARTITION_HEARTBEAT_SECONDS):
+    """Touch a claim file every interval seconds while the block runs."""
+    stopped = threading.Event()
+    
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                os.utime(claim_path)
+            except OSError:
+                pass
+    
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+def process_shard(shard_path, reference_time):
+    """
+    Ingest a shard, preprocess its topics for topic modeling and score its sentiment.
+    
+    Sentiment scores go to the shard's own score cache, seeded with the scores of the
+    shard's texts streamed from the main cache, so a worker that takes over a shard
+    continues after its last flushed batch and previously scored texts are not scored again.
+    
+    Args:
+        shard_path (str): Shard directory
+        reference_time (datetime): Time the relative post dates refer to
+    
+    Returns:
+        dict: Numbers of topics, replies and scored texts of the shard
+    """
+    # Imported here so the coordinator does not load the NLP libraries
+    from modules.sentiment_analysis import ScoreCache, score_texts
+    from modules.topic_analysis import download_nltk_resources, preprocess_text
+    
+    with span('ingest_shard') as record:
+        topics_df = process_topics_data(load_json_data(os.path.join(shard_path, "topics.json")), now=reference_time)
+        replies_df = process_replies_data(load_json_data(os.path.join(shard_path, "replies.json")), now=reference_time)
+        n_topics = len(topics_df) if topics_df is not None else 0
+        n_replies = len(replies_df) if replies_df is not None else 0
+        record.set_rows(rows_out=n_topics + n_replies)
+    
+    # Same texts as the sentiment stage scores, so the merged scores are cache hits there
+    texts = []
+    if topics_df is not None:
+        with span('preprocess_text', rows_in=n_topics):
+            download_nltk_resources()
+            topics_df['processed_text'] = topics_df['text_for_analysis'].apply(preprocess_text)
+        texts += topics_df['text_for_analysis'].tolist()
+    if replies_df is not None and not replies_df.empty:
+        text_column = 'text_for_analysis' if 'text_for_analysis' in replies_df.columns else 'content'
+        texts += replies_df[text_column].fillna('').astype(str).tolist()
+    
+    cache = ScoreCache(os.path.join(shard_path, "sentiment_scores"))
+    if not os.path.exists(cache.cache_dir):
+        hashes = pd.Index(np.unique(pd.util.hash_array(np.asarray(texts, dtype=object))))
+        known = [scores[scores.index.isin(hashes)] for scores in ScoreCache().iter_chunks()]
+        if known:
+            cache.append(pd.concat(known))
+    with span('score_sentiment', rows_in=len(texts)):
+        score_texts(texts, cache=cache)
+        cache.compact()
+    
+    if topics_df is not None:
+        with atomic_path(os.path.join(shard_path, "topics.csv")) as temp_path:
+            topics_df.to_csv(temp_path, index=False)
+    if replies_df is not None:
+        with atomic_path(os.path.join(shard_path, "replies.csv")) as temp_path:
+            replies_df.to_csv(temp_path, index=False)
+    
+    return {'topics': n_topics, 'replies': n_replies, 'texts_scored': len(texts)}
+
+def run_shard_worker(shard_dir=SHARD_DIR, timeout=PARTITION_CLAIM_TIMEOUT):
+    """
+    Process shards of the current plan until no shard is left to claim.
+    
+    Args:
+        shard_dir (str): Directory of the plan and its shards
+        timeout (float): Seconds without a heartbeat after which a claim is taken over
+    
+    Returns:
+        tuple: (names of the shards this worker processed, telemetry spans of the worker)
+    """
+    plan = load_plan(shard_dir)
+    if plan is None:
+        logger.info(f"No partition plan in {shard_dir}")
+        return [], []
+    
+    collect_spans()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    reference_time = datetime.fromisoformat(plan['reference_time'])
+    processed = []
+    
+    for name in plan['shards']:
+        shard_path = os.path.join(shard_dir, name)
+        claim_path = claim_shard(shard_path, worker_id, timeout)
+        if claim_path is None:
+            continue
+        
+        logger.info(f"Worker {worker_id} processing shard {name}")
+        start_time = time.time()
+        with _heartbeat(claim_path):
+            try:
+                with span(f"shard_{name}"):
+                    summary = process_shard(shard_path, reference_time)
+            except Exception as e:
+                logger.error(f"Shard {name} failed: {str(e)}")
+                with atomic_open(os.path.join(shard_path, "failed.json"), 'w', encoding='utf-8') as f:
+                    json.dump({'worker': worker_id, 'error': str(e)}, f)
+                continue
+        
+        summary.update(worker=worker_id, seconds=time.time() - start_time)
+        with atomic_open(os.path.join(shard_path, "done.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        processed.append(name)
+        logger.info(f"Worker {worker_id} completed shard {name} in {summary['seconds']:.2f} seconds")
+    
+    return processed, collect_spans()
+
+def _concat_csv_files(paths, output_path):
+    """Append CSV files to one output file in chunks, with the union of their columns."""
+    columns = []
+    for path in paths:
+        columns.extend(column for column in pd.read_csv(path, nrows=0).columns if column not in columns)
+    
+    with csv_chunk_writer(output_path) as writer:
+        for path in paths:
+            for chunk in read_csv_chunks(path):
+                writer.write(chunk.reindex(columns=columns))
+    return writer.rows
+
+def merge_shards(shard_dir=SHARD_DIR, output_dir=PROCESSED_DATA_DIR, score_cache=None):
+    """
+    Merge the shard outputs into the processed topics and replies files and the score cache.
+    
+    Shards are concatenated in name order (chronological), each in export order, so the
+    merged files are the same however the shards were distributed over workers. They are
+    appended in chunks that fit the memory budget rather than concatenated in memory.
+    
+    Args:
+        shard_dir (str): Directory of the plan and its shards
+        output_dir (str): Directory of the processed data files
+        score_cache (ScoreCache, optional): Cache to append the shard scores to (default:
+            the main score cache)
+    
+    Returns:
+        tuple: (number of merged topics, number of merged replies)
+    """
+    from modules.sentiment_analysis import ScoreCache
+    
+    plan = load_plan(shard_dir)
+    topic_files, reply_files = [], []
+    cache = score_cache if score_cache is not None else ScoreCache()
+    for name in plan['shards']:
+        shard_path = os.path.join(shard_dir, name)
+        if os.path.exists(os.path.join(shard_path, "topics.csv")):
+            topic_files.append(os.path.join(shard_path, "topics.csv"))
+        if os.path.exists(os.path.join(shard_path, "replies.csv")):
+            reply_files.append(os.path.join(shard_path, "replies.csv"))
+        # Shard scores are appended as new segments; the sentiment stage compacts the cache
+        for scores in ScoreCache(os.path.join(shard_path, "sentiment_scores")).iter_chunks():
+            cache.append(scores)
+    
+    n_topics = _concat_csv_files(topic_files, os.path.join(output_dir, "topics.csv"))
+    n_replies = _concat_csv_files(reply_files, os.path.join(output_dir, "replies.csv")) if reply_files else 0
+    
+    logger.info(f"Merged {len(plan['shards'])} shards into {n_topics} topics and {n_replies} replies")
+    return n_topics, n_replies
+
+def run_partitioned_ingestion(max_workers=PARTITION_WORKERS, shard_dir=SHARD_DIR, period=PARTITION_PERIOD,
+                              poll_seconds=PARTITION_POLL_SECONDS):
+    """
+    Plan the shards, process them with local worker processes and merge the results.
+    
+    Workers started on other machines (see __main__) help with the same plan. Once the
+    local workers find nothing left to claim, the coordinator waits for shards still being
+    processed elsewhere, restarting the local workers so they take over stalled shards.
+    
+    Args:
+        max_workers (int, optional): Local worker processes (None = number of CPUs)
+        shard_dir (str): Directory of the plan and its shards
+        period (str): Shard size ('day', 'week' or 'month')
+        poll_seconds (float): Interval between checks for shards processed elsewhere
+    
+    Returns:
+        tuple: (number of merged topics, number of merged replies)
+    """
+    plan = plan_shards(shard_dir=shard_dir, period=period)
+    workers = max_workers or os.cpu_count() or 1
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            futures = [executor.submit(run_shard_worker, shard_dir) for _ in range(min(workers, len(plan['shards'])))]
+            for future in as_completed(futures):
+                try:
+                    _, spans = future.result()
+                    add_spans(spans)
+                except Exception as e:
+                    logger.error(f"Shard worker failed: {str(e)}")
+            
+            states = {name: shard_state(os.path.join(shard_dir, name)) for name in plan['shards']}
+            unfinished = [name for name, state in states.items() if state not in ('done', 'failed')]
+            if not unfinished:
+                break
+            logger.info(f"Waiting for {len(unfinished)} shards processed by other workers: {', '.join(unfinished)}")
+            time.sleep(poll_seconds)
+    
+    failed = [name for name, state in states.items() if state == 'failed']
+    if failed:
+        raise RuntimeError(f"Shards failed: {', '.join(failed)} (see failed.json in their directories)")
+    
+    with span('merge_shards'):
+        return merge_shards(shard_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process shards of a partitioned pipeline run")
+    parser.add_argument("--worker", action="store_true",
+                        help="Process shards of the current plan (e.g. on another machine sharing the data directory)")
+    parser.add_argument("--status", action="store_true",
+                        help="Show the processing state of every shard of the current plan")
+    args = parser.parse_args()
+    ensure_directories()
+    
+    if args.worker:
+        processed, _ = run_shard_worker()
+        print(f"Processed {len(processed)} shards: {', '.join(processed) or 'none'}")
+    else:
+        plan = load_plan()
+        if plan is None:
+            print(f"No partition plan in {SHARD_DIR}")
+        else:
+            for name in plan['shards']:
+                print(f"{name}: {shard_state(os.path.join(SHARD_DIR, name))}")
\ No newline at end of file
@@ -0,0 +1,384 @@
+"""
+DAG execution module for the analytics pipeline.
+
+This module runs pipeline stages as a dependency graph. Stages declare the files
+they read and write; dependencies are derived from those declarations, independent
+stages run concurrently in separate processes, and the critical path through the
+graph is reported once all stages have finished. Each completed stage records a
+fingerprint of its input files, config values and code in a manifest, and stages
+whose fingerprint did not change since their last run are skipped. Completed stages
+are also recorded in a run checkpoint, so a run that failed or was interrupted can be
+resumed after its last completed stage.
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
+from config import (
+    DATA_DIR,
+    PIPELINE_CACHE_ENABLED,
+    MEMORY_BUDGET_MB
+)
+from modules.telemetry import span, collect_spans, reset_peak_rss
+from modules.checkpoint import (
+    RUN_CHECKPOINT_PATH,
+    atomic_open,
+    file_fingerprint,
+    load_run_checkpoint,
+    new_run_checkpoint,
+    save_run_checkpoint,
+    clear_run_checkpoint
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Fingerprints and summaries of the last completed run of every stage
+PIPELINE_MANIFEST_PATH = os.path.join(DATA_DIR, "pipeline_manifest.json")
+
+class Stage:
+    """
+    A pipeline stage with the files it reads and writes.
+    """
+    def __init__(self, name, func, inputs=(), outputs=(), config=(), code=(), resident=False):
+        """
+        Initialize the stage.
+        
+        Args:
+            name (str): Unique stage name
+            func (callable): Module-level function run in a worker process; returns a short summary
+            inputs (iterable): Paths of the files the stage reads
+            outputs (iterable): Paths of the files the stage writes
+            config (iterable): Names of the config.py settings the stage's results depend on
+            code (iterable): Paths of the source files implementing the stage
+            resident (bool): Whether the stage keeps a model loaded in its worker process;
+                such stages run in the resident executor of run_stages when one is given
+        """
+        self.name = name
+        self.func = func
+        self.inputs = set(inputs)
+        self.outputs = set(outputs)
+        self.config = tuple(config)
+        self.code = tuple(code)
+        self.resident = resident
+    
+    def fingerprint(self):
+        """
+        Hash the stage's input files, config values and code.
+        
+        Returns:
+            str: Hex digest identifying everything the stage's outputs depend on
+        """
+        payload = {
+            'inputs': {path: file_fingerprint(path) for path in sorted(self.inputs)},
+            'config': {name: repr(getattr(config, name)) for name in self.config},
+            'code': {path: file_fingerprint(path) for path in self.code}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def is_current(self, manifest):
+        """
+        Check whether the stage's last recorded run used the same inputs, config and code.
+        
+        Args:
+            manifest (dict): Pipeline manifest
+        
+        Returns:
+            bool: True if the stage's outputs exist and are up to date
+        """
+        entry = manifest.get(self.name)
+        if entry is None or not all(os.path.exists(path) for path in self.outputs):
+            return False
+        return entry.get('fingerprint') == self.fingerprint()
+
+def load_manifest(path=PIPELINE_MANIFEST_PATH):
+    """
+    Load the pipeline manifest.
+    
+    Args:
+        path (str): Path to the manifest
+    
+    Returns:
+        dict: Mapping of stage name to its last recorded run (empty if there is none)
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read pipeline manifest {path}: {str(e)}")
+        return {}
+
+def save_manifest(manifest, path=PIPELINE_MANIFEST_PATH):
+    """
+    Save the pipeline manifest.
+    
+    Args:
+        manifest (dict): Mapping of stage name to its last recorded run
+        path (str): Output path
+    """
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def resolve_dependencies(stages):
+    """
+    Derive stage dependencies from the declared inputs and outputs.
+    
+    Stages are taken in declaration order. A stage depends on the latest earlier stage
+    writing each file it reads or writes, and on earlier stages reading a file it
+    writes, so files updated in place are never read or written concurrently.
+    
+    Args:
+        stages (list): Stage objects in declaration order
+    
+    Returns:
+        dict: Mapping of stage name to the set of stage names it depends on
+    """
+    dependencies = {}
+    last_writer = {}
+    readers = {}
+    
+    for stage in stages:
+        depends_on = set()
+        for path in stage.inputs | stage.outputs:
+            if path in last_writer:
+                depends_on.add(last_writer[path])
+        for path in stage.outputs:
+            depends_on.update(readers.get(path, ()))
+        depends_on.discard(stage.name)
+        dependencies[stage.name] = depends_on
+        
+        for path in stage.inputs:
+            readers.setdefault(path, set()).add(stage.name)
+        for path in stage.outputs:
+            last_writer[path] = stage.name
+            readers[path] = set()
+    
+    return dependencies
+
+def _run_stage(name, func, profile_dir=None):
+    """Run a stage function in a worker process, timing it and collecting its spans and profile."""
+    reset_peak_rss()
+    collect_spans()
+    hot_functions = None
+    start = time.time()
+    with span(name, category='stage'):
+        if profile_dir is None:
+            summary = func()
+        else:
+            # Only imported in profiling mode, so normal runs carry no profiler overhead
+            from modules.profiling import profile_call
+            summary, hot_functions, peak_traced_mb = profile_call(name, func, profile_dir)
+            logger.info(f"Stage {name} peak traced memory: {peak_traced_mb:.1f} MB")
+    return summary, start, time.time(), collect_spans(), hot_functions
+
+def critical_path(dependencies, timings):
+    """
+    Find the longest chain of dependent stages.
+    
+    Args:
+        dependencies (dict): Mapping of stage name to the stage names it depends on
+        timings (dict): Mapping of stage name to its duration in seconds
+    
+    Returns:
+        tuple: (list of stage names on the critical path, total duration in seconds)
+    """
+    finish = {}
+    previous = {}
+    
+    def resolve(name):
+        if name not in finish:
+            preceding = [dependency for dependency in dependencies[name] if dependency in timings]
+            best = max(preceding, key=resolve, default=None)
+            previous[name] = best
+            finish[name] = timings[name] + (finish[best] if best is not None else 0.0)
+        return finish[name]
+    
+    if not timings:
+        return [], 0.0
+    
+    end = max(timings, key=resolve)
+    path = []
+    while end is not None:
+        path.append(end)
+        end = previous[end]
+    return path[::-1], finish[path[0]]
+
+def run_stages(stages, max_workers=None, force=False, only=None, profile_dir=None,
+               manifest_path=PIPELINE_MANIFEST_PATH, executor=None, resume=False,
+               checkpoint_path=RUN_CHECKPOINT_PATH, resident_executor=None):
+    """
+    Run pipeline stages as a DAG, running independent stages concurrently.
+    
+    A failed stage skips every stage that depends on it; independent stages still run.
+    A stage whose fingerprint matches the manifest is not run again and reuses its
+    recorded summary. The fingerprint is recorded after the stage ran, so stages that
+    update their inputs in place are also recognized as up to date on the next run.
+    
+    Every completed stage is added to the run checkpoint, which is removed once all
+    stages completed. Resuming reuses the options of the checkpointed run and does not
+    rerun its completed stages whose inputs, config and code are unchanged, even if the
+    run was forced or the stage cache is disabled.
+    
+    Args:
+        stages (list): Stage objects in declaration order
+        max_workers (int, optional): Number of worker processes (None = CPU count)
+        force (bool): Run the selected stages even if they are up to date
+        only (iterable, optional): Names of the stages to run; other stages are left
+            untouched and their current outputs are used
+        profile_dir (str, optional): Run every stage under cProfile and tracemalloc and
+            save the profiles in this directory
+        manifest_path (str): Path to the pipeline manifest
+        executor (ProcessPoolExecutor, optional): Pool to run the stages in, kept open by the
+            caller so its worker processes (and the models they loaded) outlive the run.
+            If None, a pool of max_workers processes is created for this run.
+        resume (bool): Continue the run recorded in the run checkpoint; force and only are
+            taken from the checkpoint. Starts a new run if there is no checkpoint.
+        checkpoint_path (str): Path to the run checkpoint
+        resident_executor (ProcessPoolExecutor, optional): Pool to run the resident stages in,
+            so a long-lived caller holds one copy of their models however many workers
+            executor has. If None, resident stages run in executor.
+    
+    Returns:
+        dict: Run summary with 'succeeded', 'cached', 'failed' and 'skipped' stage names,
+            the 'summaries' returned by the stages, stage 'timings' in seconds, telemetry
+            'spans' of every stage, the hottest functions of every profiled stage ('profiles'),
+            'critical_path', 'critical_path_seconds' and 'wall_seconds'
+    """
+    checkpoint = load_run_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is not None:
+        force, only = checkpoint['force'], checkpoint['only']
+        logger.info(f"Resuming the run started {checkpoint['started']} " +
+                    f"({len(checkpoint['completed'])} stages completed before it stopped)")
+    else:
+        if resume:
+            logger.info("No interrupted run to resume, starting a new run")
+        checkpoint = new_run_checkpoint(force, only)
+    completed = checkpoint['completed']
+    
+    dependencies = resolve_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    selected = set(only) if only else set(by_name)
+    unknown = selected - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+    manifest = load_manifest(manifest_path)
+    save_run_checkpoint(checkpoint, checkpoint_path)
+    for name, depends_on in dependencies.items():
+        if depends_on:
+            logger.info(f"Stage {name} depends on: {', '.join(sorted(depends_on))}")
+    
+    pending = [stage.name for stage in stages]
+    succeeded, cached, failed, skipped = [], [], [], []
+    timings = {}
+    summaries = {}
+    spans = []
+    profiles = {}
+    start_time = time.time()
+    
+    with ProcessPoolExecutor(max_workers=max_workers) if executor is None else nullcontext(executor) as executor:
+        running = {}
+        while pending or running:
+            # Skip stages whose dependencies failed, start the ones that are ready
+            for name in list(pending):
+                if dependencies[name] & set(failed + skipped):
+                    pending.remove(name)
+                    skipped.append(name)
+                    logger.warning(f"Skipping stage {name}: a stage it depends on did not complete")
+                elif dependencies[name] <= set(succeeded + cached):
+                    pending.remove(name)
+                    stage = by_name[name]
+                    if name not in selected:
+                        cached.append(name)
+                        summaries[name] = manifest.get(name, {}).get('summary')
+                        continue
+                    if name in completed and stage.is_current(completed):
+                        cached.append(name)
+                        summaries[name] = completed[name].get('summary')
+                        logger.info(f"Stage {name} completed before the run stopped, resuming after it")
+                        continue
+                    if PIPELINE_CACHE_ENABLED and not force and stage.is_current(manifest):
+                        cached.append(name)
+                        summaries[name] = manifest[name].get('summary')
+                        logger.info(f"Stage {name} is up to date, skipping")
+                        continue
+                    logger.info(f"Starting stage {name}")
+                    pool = resident_executor if stage.resident and resident_executor is not None else executor
+                    running[pool.submit(_run_stage, name, stage.func, profile_dir)] = name
+            
+            if not running:
+                continue
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    summary, stage_start, stage_end, stage_spans, hot_functions = future.result()
+                except Exception as e:
+                    failed.append(name)
+                    logger.error(f"Stage {name} failed: {str(e)}")
+                    continue
+                
+                timings[name] = stage_end - stage_start
+                summaries[name] = summary
+                spans.extend(stage_spans)
+                if hot_functions is not None:
+                    profiles[name] = hot_functions
+                succeeded.append(name)
+                stage_span = next((record for record in stage_spans if record['category'] == 'stage'), None)
+                usage = (f" (CPU {stage_span['cpu_seconds']:.2f} seconds, peak RSS {stage_span['peak_rss_mb'] or 0:.0f} MB)"
+                         if stage_span is not None else "")
+                logger.info(f"Completed stage {name} in {timings[name]:.2f} seconds{usage}" +
+                            (f": {summary}" if summary else ""))
+                if MEMORY_BUDGET_MB is not None and stage_span is not None and (stage_span['peak_rss_mb'] or 0) > MEMORY_BUDGET_MB:
+                    logger.warning(f"Stage {name} peaked at {stage_span['peak_rss_mb']:.0f} MB RSS, above the " +
+                                   f"memory budget of {MEMORY_BUDGET_MB} MB")
+                
+                manifest[name] = completed[name] = {
+                    'fingerprint': by_name[name].fingerprint(),
+                    'summary': summary,
+                    'completed': datetime.fromtimestamp(stage_end).isoformat()
+                }
+                save_manifest(manifest, manifest_path)
+                save_run_checkpoint(checkpoint, checkpoint_path)
+    
+    if failed or skipped:
+        logger.warning(f"Run checkpoint kept in {checkpoint_path}; use --resume to continue after the completed stages")
+    else:
+        clear_run_checkpoint(checkpoint_path)
+    
+    wall_seconds = time.time() - start_time
+    path, path_seconds = critical_path(dependencies, timings)
+    if not path:
+        logger.info(f"No stages ran ({len(cached)} up to date or not selected)")
+    else:
+        logger.info(f"Critical path: {' -> '.join(path)} ({path_seconds:.2f} seconds of {wall_seconds:.2f} seconds wall time, " +
+                    f"{sum(timings.values()):.2f} seconds of stage time)")
+    
+    return {
+        'succeeded': succeeded,
+        'cached': cached,
+        'failed': failed,
+        'skipped': skipped,
+        'summaries': summaries,
+        'timings': timings,
+        'spans': spans,
+        'profiles': profiles,
+        'critical_path': path,
+        'critical_path_seconds': path_seconds,
+        'wall_seconds': wall_seconds
+    }
\ No newline at end of file
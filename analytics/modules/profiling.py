@@ -0,0 +1,144 @@
+"""
+Profiling module for the analytics pipeline.
+
+This module runs a pipeline stage under cProfile and tracemalloc. Each profiled stage
+writes a pstats dump (open it with snakeviz or `python -m pstats`) and a list of its
+top allocation sites, and returns its hottest functions for a summary table. Nothing
+here is imported unless the pipeline runs with --profile, so normal runs pay nothing.
+"""
+import os
+import sys
+import cProfile
+import pstats
+import tracemalloc
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    REPORTS_DIR,
+    PROFILE_TOP_N
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(REPORTS_DIR, "profiles")
+
+_fork_hook_registered = False
+
+def _stop_profilers_in_child():
+    """Stop inherited profilers in processes forked by a profiled stage (e.g. its worker pools)."""
+    sys.setprofile(None)
+    tracemalloc.stop()
+
+def hottest_functions(stats, top_n=PROFILE_TOP_N):
+    """
+    List the functions with the most time spent in their own code.
+    
+    Args:
+        stats (pstats.Stats): Profile statistics
+        top_n (int): Number of functions returned
+    
+    Returns:
+        list: Dictionaries with 'function', 'calls', 'own_seconds' and 'cumulative_seconds'
+    """
+    rows = []
+    for (filename, line, function), (_, calls, own_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({function})",
+            'calls': calls,
+            'own_seconds': own_time,
+            'cumulative_seconds': cumulative_time
+        })
+    rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+    return rows[:top_n]
+
+def save_allocation_sites(snapshot, output_path, top_n=PROFILE_TOP_N):
+    """
+    Write the source lines that allocated the most memory still held at the end of a stage.
+    
+    Args:
+        snapshot (tracemalloc.Snapshot): Snapshot taken when the stage finished
+        output_path (str): Output text file
+        top_n (int): Number of allocation sites written
+    """
+    statistics = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+    ]).statistics('lineno')
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f"Top {top_n} allocation sites (memory held when the stage finished)\n")
+        for rank, statistic in enumerate(statistics[:top_n], start=1):
+            frame = statistic.traceback[0]
+            f.write(f"{rank:>3}. {frame.filename}:{frame.lineno}: {statistic.size / 1024:.1f} KiB in {statistic.count} blocks\n")
+
+def profile_call(name, func, output_dir, top_n=PROFILE_TOP_N):
+    """
+    Run a function under cProfile and tracemalloc and save the profiles.
+    
+    Args:
+        name (str): Name used for the output files (e.g. the stage name)
+        func (callable): Function to run
+        output_dir (str): Directory for the profile dump and allocation sites
+        top_n (int): Number of hot functions and allocation sites kept
+    
+    Returns:
+        tuple: (function result, list of hottest functions, peak traced memory in MB)
+    """
+    global _fork_hook_registered
+    if not _fork_hook_registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_stop_profilers_in_child)
+        _fork_hook_registered = True
+    
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        profiler.enable()
+        try:
+            result = func()
+        finally:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_traced = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    profile_path = os.path.join(output_dir, f"{name}.prof")
+    profiler.dump_stats(profile_path)
+    allocations_path = os.path.join(output_dir, f"{name}_allocations.txt")
+    save_allocation_sites(snapshot, allocations_path, top_n)
+    logger.info(f"Saved {name} profile to {profile_path} and allocation sites to {allocations_path}")
+    
+    return result, hottest_functions(pstats.Stats(profiler), top_n), peak_traced / (1024 * 1024)
+
+def format_profile_summary(stage_profiles, top_n=PROFILE_TOP_N):
+    """
+    Format the hottest functions of all profiled stages as a text table.
+    
+    Args:
+        stage_profiles (dict): Mapping of stage name to its list of hottest functions
+        top_n (int): Number of rows shown
+    
+    Returns:
+        str: Table of the functions with the most own time across stages
+    """
+    rows = [dict(row, stage=stage) for stage, functions in stage_profiles.items() for row in functions]
+    rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+    rows = rows[:top_n]
+    if not rows:
+        return "No stages were profiled."
+    
+    width = max(len(row['function']) for row in rows)
+    lines = [f"{'Stage':<14} {'Function':<{width}} {'Calls':>10} {'Own (s)':>9} {'Cum (s)':>9}"]
+    lines.append("-" * len(lines[0]))
+    for row in rows:
+        lines.append(f"{row['stage']:<14} {row['function']:<{width}} {row['calls']:>10} " +
+                     f"{row['own_seconds']:>9.3f} {row['cumulative_seconds']:>9.3f}")
+    return "\n".join(lines)
\ No newline at end of file
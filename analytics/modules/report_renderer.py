@@ -0,0 +1,337 @@
+"""
+Report rendering module for forum trend reports.
+
+This module renders precomputed analysis tables into markdown, HTML and JSON
+reports. Tables are formatted a column at a time rather than row by row, and the
+tables behind each report section are cached with a fingerprint of their inputs,
+so a report can be regenerated without recomputing unchanged analyses.
+"""
+import os
+import sys
+import json
+import hashlib
+import pickle
+import html
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    REPORTS_DIR,
+    REPORT_FORMATS,
+    REPORT_CACHE_ENABLED
+)
+from modules.checkpoint import atomic_open
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_DIR = os.path.join(REPORTS_DIR, "section_cache")
+
+class ReportSection:
+    """
+    A titled report section showing one table or a few lines of text.
+    """
+    def __init__(self, title, table=None, columns=None, empty_message="No data available.",
+                 sort_by=None, ascending=True, limit=None, other_columns=False, text=None):
+        """
+        Initialize the section.
+        
+        Args:
+            title (str): Section heading
+            table (str, optional): Name of the table shown in the section
+            columns (list, optional): (column, header, printf-style format or None) tuples
+            empty_message (str): Text shown when the table is missing or empty
+            sort_by (str, optional): Column to sort the table by
+            ascending (bool): Sort order
+            limit (int, optional): Maximum number of rows shown
+            other_columns (bool): Whether to append the table's remaining columns as-is
+            text (list, optional): Lines of text shown instead of a table
+        """
+        self.title = title
+        self.table = table
+        self.columns = columns or []
+        self.empty_message = empty_message
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self.limit = limit
+        self.other_columns = other_columns
+        self.text = text or []
+    
+    def select(self, table):
+        """
+        Sort, limit and select the displayed columns of a table.
+        
+        Args:
+            table (pandas.DataFrame): Table of the section
+        
+        Returns:
+            tuple: (displayed table, list of (column, header, format) tuples)
+        """
+        if self.sort_by is not None:
+            table = table.sort_values(self.sort_by, ascending=self.ascending)
+        if self.limit is not None:
+            table = table.head(self.limit)
+        
+        columns = [spec for spec in self.columns if spec[0] in table.columns]
+        if self.other_columns:
+            shown = {spec[0] for spec in columns}
+            columns += [(column, str(column), None) for column in table.columns if column not in shown]
+        return table, columns
+
+def format_column(values, fmt=None):
+    """
+    Format a whole column of values as strings.
+    
+    Args:
+        values (pandas.Series): Column values
+        fmt (str, optional): printf-style format (e.g. '%.4f', '%.1f%%'); None uses str()
+    
+    Returns:
+        numpy.ndarray: Formatted values
+    """
+    if fmt is None:
+        return values.astype(str).to_numpy()
+    return np.char.mod(fmt, values.to_numpy(dtype=float))
+
+def format_table(table, columns):
+    """
+    Format the displayed columns of a table.
+    
+    Args:
+        table (pandas.DataFrame): Table to format
+        columns (list): (column, header, format) tuples
+    
+    Returns:
+        pandas.DataFrame: String table with the headers as column names
+    """
+    return pd.DataFrame({header: format_column(table[column], fmt) for column, header, fmt in columns})
+
+def _join_cells(cells, before, separator, after):
+    """Join the cells of every row of a string table, one column at a time."""
+    rows = pd.Series(before, index=cells.index)
+    for i, column in enumerate(cells.columns):
+        rows = rows + (separator if i else "") + cells[column]
+    return (rows + after).tolist()
+
+def render_markdown(title, subtitle, sections, tables):
+    """
+    Render the report as markdown.
+    
+    Args:
+        title (str): Report title
+        subtitle (str): Line shown under the title
+        sections (list): ReportSection objects
+        tables (dict): Mapping of table name to DataFrame
+    
+    Returns:
+        str: Markdown report
+    """
+    lines = [f"# {title}", f"## {subtitle}\n"]
+    for section in sections:
+        lines.append(f"## {section.title}")
+        if section.table is None:
+            lines.extend(section.text)
+        elif tables.get(section.table) is None or tables[section.table].empty:
+            lines.append(section.empty_message)
+        else:
+            table, columns = section.select(tables[section.table])
+            cells = format_table(table, columns).apply(lambda column: column.str.replace("|", "\\|", regex=False))
+            headers = [header for _, header, _ in columns]
+            lines.append("| " + " | ".join(headers) + " |")
+            lines.append("|" + "|".join("-" * (len(header) + 2) for header in headers) + "|")
+            lines.extend(_join_cells(cells, "| ", " | ", " |"))
+        lines.append("")
+    return "\n".join(lines).rstrip("\n")
+
+def render_html(title, subtitle, sections, tables):
+    """
+    Render the report as a standalone HTML page.
+    
+    Args:
+        title (str): Report title
+        subtitle (str): Line shown under the title
+        sections (list): ReportSection objects
+        tables (dict): Mapping of table name to DataFrame
+    
+    Returns:
+        str: HTML report
+    """
+    parts = [
+        "<!DOCTYPE html>",
+        "<html>",
+        "<head>",
+        '<meta charset="utf-8">',
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#eee}</style>",
+        "</head>",
+        "<body>",
+        f"<h1>{html.escape(title)}</h1>",
+        f"<h2>{html.escape(subtitle)}</h2>"
+    ]
+    for section in sections:
+        parts.append(f"<h2>{html.escape(section.title)}</h2>")
+        if section.table is None:
+            parts.extend(f"<p>{html.escape(line)}</p>" for line in section.text if line)
+        elif tables.get(section.table) is None or tables[section.table].empty:
+            parts.append(f"<p>{html.escape(section.empty_message)}</p>")
+        else:
+            table, columns = section.select(tables[section.table])
+            cells = format_table(table, columns).apply(
+                lambda column: column.str.replace("&", "&amp;", regex=False)
+                                     .str.replace("<", "&lt;", regex=False)
+                                     .str.replace(">", "&gt;", regex=False))
+            parts.append("<table>")
+            parts.append("<tr>" + "".join(f"<th>{html.escape(header)}</th>" for _, header, _ in columns) + "</tr>")
+            parts.extend(_join_cells(cells, "<tr><td>", "</td><td>", "</td></tr>"))
+            parts.append("</table>")
+    parts.extend(["</body>", "</html>"])
+    return "\n".join(parts)
+
+def render_json(title, subtitle, sections, tables):
+    """
+    Render the report as JSON with the raw (unformatted) values of every section.
+    
+    Args:
+        title (str): Report title
+        subtitle (str): Line shown under the title
+        sections (list): ReportSection objects
+        tables (dict): Mapping of table name to DataFrame
+    
+    Returns:
+        str: JSON report
+    """
+    report = {"title": title, "subtitle": subtitle, "sections": []}
+    for section in sections:
+        entry = {"title": section.title}
+        if section.table is None:
+            entry["text"] = section.text
+        elif tables.get(section.table) is None or tables[section.table].empty:
+            entry["rows"] = []
+        else:
+            table, columns = section.select(tables[section.table])
+            table = table[[column for column, _, _ in columns]]
+            entry["columns"] = [str(column) for column in table.columns]
+            entry["rows"] = json.loads(table.to_json(orient="records", date_format="iso"))
+        report["sections"].append(entry)
+    return json.dumps(report, indent=2)
+
+RENDERERS = {
+    'md': render_markdown,
+    'html': render_html,
+    'json': render_json
+}
+
+def render_report(title, subtitle, sections, tables, output_stem, formats=REPORT_FORMATS):
+    """
+    Render the report in every requested format and save it.
+    
+    Args:
+        title (str): Report title
+        subtitle (str): Line shown under the title
+        sections (list): ReportSection objects
+        tables (dict): Mapping of table name to DataFrame
+        output_stem (str): Output path without extension
+        formats (tuple): Output formats ('md', 'html', 'json')
+    
+    Returns:
+        dict: Mapping of format to saved report path
+    """
+    paths = {}
+    for fmt in formats:
+        if fmt not in RENDERERS:
+            logger.error(f"Unsupported report format: {fmt}")
+            continue
+        
+        path = f"{output_stem}.{fmt}"
+        with atomic_open(path, 'w', encoding='utf-8') as f:
+            f.write(RENDERERS[fmt](title, subtitle, sections, tables))
+        paths[fmt] = path
+        logger.info(f"Saved {fmt} report to {path}")
+    return paths
+
+class SectionCache:
+    """
+    On-disk cache of report section tables keyed by a fingerprint of their inputs, settings and code.
+    """
+    def __init__(self, cache_dir=REPORT_CACHE_DIR, enabled=REPORT_CACHE_ENABLED):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir (str): Directory holding one cache file per section
+            enabled (bool): Whether cached tables are used
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def key(name, input_fingerprints, params=None, dependencies=None):
+        """
+        Build the cache key of a section.
+        
+        Args:
+            name (str): Section table name
+            input_fingerprints (dict): Mapping of input name to its fingerprint
+            params (dict, optional): Parameters of the analysis
+            dependencies (dict, optional): Fingerprints of the settings and code the analysis
+                depends on
+        
+        Returns:
+            str: Cache key
+        """
+        payload = json.dumps([name, sorted(input_fingerprints.items()), sorted((params or {}).items()),
+                              sorted((dependencies or {}).items())], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _path(self, name):
+        """Return the cache file of a section."""
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+    
+    def get(self, name, key):
+        """
+        Get a cached section table.
+        
+        Args:
+            name (str): Section table name
+            key (str): Cache key of the current inputs
+        
+        Returns:
+            pandas.DataFrame or None: The cached table, or None on a cache miss
+        """
+        if not self.enabled or not os.path.exists(self._path(name)):
+            return None
+        
+        try:
+            with open(self._path(name), 'rb') as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read cached {name} section: {str(e)}")
+            return None
+        
+        if entry.get('key') != key:
+            return None
+        logger.info(f"Report section cache hit for {name}")
+        return entry['table']
+    
+    def put(self, name, key, table):
+        """
+        Cache a section table.
+        
+        Args:
+            name (str): Section table name
+            key (str): Cache key of the table's inputs
+            table (pandas.DataFrame): Table to cache
+        """
+        if table is None:
+            return
+        with atomic_open(self._path(name), 'wb') as f:
+            pickle.dump({'key': key, 'table': table}, f, protocol=pickle.HIGHEST_PROTOCOL)
\ No newline at end of file
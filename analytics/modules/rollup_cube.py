@@ -0,0 +1,169 @@
+"""
+Rollup cube module for forum trend analysis.
+
+This module precomputes additive aggregates of forum activity and sentiment at
+(day, week, month) x category x sentiment label granularity. Coarser levels are
+derived from the day level, so any trend table or dashboard graph can be served
+from the cube without regrouping the raw posts.
+"""
+import os
+import sys
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    PROCESSED_DATA_DIR
+)
+from modules.checkpoint import atomic_path
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ROLLUP_CUBE_PATH = os.path.join(PROCESSED_DATA_DIR, "rollup_cube.csv")
+
+CUBE_LEVELS = ('day', 'week', 'month')
+CUBE_DIMENSIONS = ['level', 'period', 'category', 'sentiment_label']
+CUBE_MEASURES = ['topic_count', 'reply_sum', 'view_sum', 'sentiment_count',
+                 'sentiment_sum', 'sentiment_sumsq', 'positive_count']
+
+def build_day_cube(df):
+    """
+    Aggregate posts into the day level of the cube in one pass.
+    
+    Args:
+        df (pandas.DataFrame): Posts with parsed 'datetime', 'category', 'replies' and 'views'
+            columns and optional 'sentiment_score'/'sentiment_label' columns
+    
+    Returns:
+        pandas.DataFrame: Day-level cube rows
+    """
+    if 'sentiment_score' in df.columns:
+        score = df['sentiment_score'].astype(float)
+    else:
+        score = pd.Series(np.nan, index=df.index)
+    
+    if 'sentiment_label' in df.columns:
+        label = df['sentiment_label'].fillna('unscored')
+    else:
+        label = pd.Series('unscored', index=df.index)
+    
+    base = pd.DataFrame({
+        'period': df['datetime'].dt.normalize(),
+        'category': df['category'],
+        'sentiment_label': label,
+        'topic_count': 1,
+        'reply_sum': df['replies'],
+        'view_sum': df['views'],
+        'sentiment_count': score.notna().astype(int),
+        'sentiment_sum': score.fillna(0.0),
+        'sentiment_sumsq': score.fillna(0.0) ** 2,
+        'positive_count': (label == 'positive').astype(int)
+    })
+    
+    # Posts without a date are kept under a missing period so all-time aggregates stay complete
+    day_cube = base.groupby(CUBE_DIMENSIONS[1:], as_index=False, dropna=False)[CUBE_MEASURES].sum()
+    day_cube.insert(0, 'level', 'day')
+    return day_cube
+
+def roll_up(day_cube, level):
+    """
+    Derive a coarser cube level from the day level.
+    
+    Args:
+        day_cube (pandas.DataFrame): Day-level cube rows
+        level (str): Target level ('week' or 'month')
+    
+    Returns:
+        pandas.DataFrame: Cube rows at the requested level
+    """
+    if level == 'week':
+        periods = day_cube['period'].dt.to_period('W').dt.start_time
+    elif level == 'month':
+        periods = day_cube['period'].dt.to_period('M').dt.start_time
+    else:
+        raise ValueError(f"Invalid cube level: {level}")
+    
+    cube = day_cube.assign(period=periods).groupby(CUBE_DIMENSIONS[1:], as_index=False, dropna=False)[CUBE_MEASURES].sum()
+    cube.insert(0, 'level', level)
+    return cube
+
+def _from_day_cube(day_cube):
+    """Assemble the full cube from its day level."""
+    day_cube = day_cube.sort_values(CUBE_DIMENSIONS[1:]).reset_index(drop=True)
+    return pd.concat([day_cube, roll_up(day_cube, 'week'), roll_up(day_cube, 'month')], ignore_index=True)
+
+def build_cube(df):
+    """
+    Build the rollup cube for all levels.
+    
+    Args:
+        df (pandas.DataFrame): Posts (see build_day_cube)
+    
+    Returns:
+        pandas.DataFrame: Cube rows for every level
+    """
+    return _from_day_cube(build_day_cube(df))
+
+def query_cube(cube, level, by=('period',)):
+    """
+    Aggregate the cube at a level along the requested dimensions.
+    
+    Args:
+        cube (pandas.DataFrame): Rollup cube
+        level (str): Cube level ('day', 'week', 'month')
+        by (tuple): Dimensions to group by ('period', 'category', 'sentiment_label')
+    
+    Returns:
+        pandas.DataFrame: Summed measures plus derived avg_sentiment, std_sentiment,
+            pct_positive and engagement_ratio columns
+    """
+    if level not in CUBE_LEVELS:
+        raise ValueError(f"Invalid cube level: {level}")
+    
+    cube = cube[cube['level'] == level]
+    if 'period' in by:
+        cube = cube[cube['period'].notna()]
+    result = cube.groupby(list(by), as_index=False, dropna=False)[CUBE_MEASURES].sum()
+    
+    # Derive statistics from the additive measures (sample standard deviation, as pandas)
+    n = result['sentiment_count'].astype(float)
+    variance = (result['sentiment_sumsq'] - result['sentiment_sum'] ** 2 / n.where(n > 0)) / (n - 1).where(n > 1)
+    result['avg_sentiment'] = result['sentiment_sum'] / n.where(n > 0)
+    result['std_sentiment'] = np.sqrt(variance.clip(lower=0))
+    result['pct_positive'] = result['positive_count'] / n.where(n > 0) * 100
+    result['engagement_ratio'] = result['reply_sum'] / result['topic_count']
+    
+    return result
+
+def save_cube(cube, path=ROLLUP_CUBE_PATH):
+    """
+    Save the rollup cube to CSV.
+    
+    Args:
+        cube (pandas.DataFrame): Rollup cube
+        path (str): Output path
+    """
+    with atomic_path(path) as temp_path:
+        cube.to_csv(temp_path, index=False)
+    logger.info(f"Saved rollup cube ({len(cube)} rows) to {path}")
+
+def load_cube(path=ROLLUP_CUBE_PATH):
+    """
+    Load the rollup cube from CSV.
+    
+    Args:
+        path (str): Path to the saved cube
+    
+    Returns:
+        pandas.DataFrame or None: The cube, or None if it does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, parse_dates=['period'])
\ No newline at end of file
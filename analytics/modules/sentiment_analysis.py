@@ -6,10 +6,11 @@ on forum posts to determine customer sentiment about DVD titles and topics.
 """
 import os
 import sys
+import time
+import pickle
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import logging
 from tqdm import tqdm
 
@@ -19,9 +20,16 @@ from config import (
     SENTIMENT_MODEL, 
     SENTIMENT_BATCH_SIZE, 
     SENTIMENT_MAX_LENGTH,
+    SENTIMENT_CHECKPOINT_TEXTS,
     PROCESSED_DATA_DIR,
-    MODELS_DIR
+    MODELS_DIR,
+    DEDUP_ENABLED,
+    ensure_directories
 )
+from modules.deduplication import select_representatives
+from modules.telemetry import span
+from modules.checkpoint import atomic_open
+from modules.memory_budget import read_csv_chunks, csv_chunk_writer
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +38,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Sentiment of every text scored so far, keyed by a hash of the text (see ScoreCache)
+SENTIMENT_SCORE_CACHE_DIR = os.path.join(MODELS_DIR, "sentiment_scores")
+
+# Maximum number of scores per frame stored in a score cache segment
+SCORE_CACHE_FRAME_ROWS = 100000
+
 class SentimentAnalyzer:
     """
     Class for sentiment analysis of text using transformer models.
@@ -42,6 +56,7 @@ class SentimentAnalyzer:
             model_name (str): Name of the pre-trained model to use
             device (str, optional): Device to use ('cuda' or 'cpu'). If None, will use CUDA if available.
         """
+        import torch
         self.model_name = model_name
         
         # Set device
@@ -49,18 +64,19 @@ class SentimentAnalyzer:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
-            
+        
         logger.info(f"Using device: {self.device}")
         
         # Load tokenizer and model
         self.tokenizer = None
         self.model = None
         self._load_model()
-        
+    
     def _load_model(self):
         """
         Load the pre-trained tokenizer and model.
         """
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
         try:
             logger.info(f"Loading tokenizer and model: {self.model_name}")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
@@ -78,57 +94,255 @@ class SentimentAnalyzer:
         Args:
             texts (list): List of texts to analyze
             batch_size (int): Batch size for processing
-            
+        
         Returns:
             pandas.DataFrame: DataFrame with sentiment scores (negative, neutral, positive)
         """
         if not texts:
             return pd.DataFrame()
-            
+        
         if self.model is None or self.tokenizer is None:
             logger.error("Model or tokenizer not loaded")
             return pd.DataFrame()
         
+        import torch
         results = []
         
         # Process in batches
         logger.info(f"Analyzing sentiment for {len(texts)} texts")
-        for i in tqdm(range(0, len(texts), batch_size)):
-            batch_texts = texts[i:i+batch_size]
-            
-            # Tokenize
-            inputs = self.tokenizer(
-                batch_texts, 
-                padding=True, 
-                truncation=True, 
-                max_length=SENTIMENT_MAX_LENGTH, 
-                return_tensors="pt"
-            ).to(self.device)
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
+        with span('predict_sentiment', rows_in=len(texts)) as record:
+            for i in tqdm(range(0, len(texts), batch_size)):
+                batch_texts = texts[i:i+batch_size]
                 
-            # Process outputs
-            scores = torch.nn.functional.softmax(outputs.logits, dim=1)
-            scores_np = scores.cpu().numpy()
-            
-            for j, score in enumerate(scores_np):
-                sentiment_result = {
-                    'text': batch_texts[j][:100] + '...' if len(batch_texts[j]) > 100 else batch_texts[j],
-                    'sentiment_score': scores_np[j][1],  # Positive class probability
-                    'sentiment_label': 'positive' if scores_np[j][1] >= 0.6 else 'negative' if scores_np[j][1] <= 0.4 else 'neutral'
-                }
-                results.append(sentiment_result)
+                # Tokenize
+                inputs = self.tokenizer(
+                    batch_texts, 
+                    padding=True, 
+                    truncation=True, 
+                    max_length=SENTIMENT_MAX_LENGTH, 
+                    return_tensors="pt"
+                ).to(self.device)
+                
+                # Get predictions
+                with torch.no_grad():
+                    outputs = self.model(**inputs)
                 
+                # Process outputs
+                scores = torch.nn.functional.softmax(outputs.logits, dim=1)
+                scores_np = scores.cpu().numpy()
+                
+                for j, score in enumerate(scores_np):
+                    sentiment_result = {
+                        'text': batch_texts[j][:100] + '...' if len(batch_texts[j]) > 100 else batch_texts[j],
+                        'sentiment_score': scores_np[j][1],  # Positive class probability
+                        'sentiment_label': 'positive' if scores_np[j][1] >= 0.6 else 'negative' if scores_np[j][1] <= 0.4 else 'neutral'
+                    }
+                    results.append(sentiment_result)
+            
+            record.set_rows(rows_out=len(results))
+        
         return pd.DataFrame(results)
 
+@lru_cache(maxsize=1)
+def get_sentiment_analyzer():
+    """
+    Get the sentiment analyzer, loading the model once per process.
+    
+    Long-running processes (e.g. the pipeline's watch mode) keep the model loaded
+    between runs instead of reloading it for every batch of new posts.
+    
+    Returns:
+        SentimentAnalyzer: The shared analyzer
+    """
+    return SentimentAnalyzer()
+
+class ScoreCache:
+    """
+    Append-only on-disk cache of sentiment scores keyed by text hash.
+    
+    The cache is a directory of segment files. Every flush writes a new segment instead
+    of rewriting the cache, and compact merges all segments into one at the end of a
+    stage. Segments are written atomically and start with the model settings that
+    produced them; segments of a different model or maximum length are ignored.
+    """
+    def __init__(self, cache_dir=SENTIMENT_SCORE_CACHE_DIR):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir (str): Directory of the segment files
+        """
+        self.cache_dir = cache_dir
+        self._frames = None
+    
+    def _segments(self):
+        """Return the paths of the segment files, oldest first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [os.path.join(self.cache_dir, filename) for filename in sorted(os.listdir(self.cache_dir))
+                if filename.endswith('.pkl') and not filename.startswith('.')]
+    
+    def iter_chunks(self):
+        """
+        Stream the stored scores without loading the whole cache.
+        
+        Yields:
+            pandas.DataFrame: 'sentiment_score' and 'sentiment_label' indexed by text hash,
+                segment by segment, oldest first
+        """
+        for path in self._segments():
+            try:
+                with open(path, 'rb') as f:
+                    header = pickle.load(f)
+                    if header.get('model') != SENTIMENT_MODEL or header.get('max_length') != SENTIMENT_MAX_LENGTH:
+                        logger.info(f"Ignoring sentiment scores of other model settings in {path}")
+                        continue
+                    while True:
+                        try:
+                            frame = pickle.load(f)
+                        except EOFError:
+                            break
+                        yield frame
+            except (OSError, pickle.UnpicklingError) as e:
+                logger.warning(f"Could not read sentiment score cache segment {path}: {str(e)}")
+    
+    def _add(self, frame):
+        """Add a frame to the loaded cache, merging frames so there are O(log n) of them."""
+        self._frames.append(frame[~frame.index.duplicated()])
+        while len(self._frames) > 1 and len(self._frames[-2]) <= len(self._frames[-1]):
+            last = self._frames.pop()
+            merged = pd.concat([self._frames.pop(), last])
+            self._frames.append(merged[~merged.index.duplicated()])
+    
+    def load(self):
+        """Load the stored scores once; later lookups and appends use the loaded frames."""
+        if self._frames is None:
+            self._frames = []
+            for frame in self.iter_chunks():
+                self._add(frame)
+    
+    def get(self, hashes):
+        """
+        Look up the scores of texts.
+        
+        Args:
+            hashes (numpy.ndarray): Text hashes
+        
+        Returns:
+            tuple: ('sentiment_score' and 'sentiment_label' for every hash, NaN for texts
+                not in the cache; boolean array marking the hashes found)
+        """
+        self.load()
+        scores = np.full(len(hashes), np.nan)
+        labels = np.full(len(hashes), None, dtype=object)
+        found = np.zeros(len(hashes), dtype=bool)
+        for frame in self._frames:
+            positions = frame.index.get_indexer(hashes)
+            hit = (positions >= 0) & ~found
+            scores[hit] = frame['sentiment_score'].to_numpy()[positions[hit]]
+            labels[hit] = frame['sentiment_label'].to_numpy()[positions[hit]]
+            found |= hit
+        return pd.DataFrame({'sentiment_score': scores, 'sentiment_label': pd.Series(labels, dtype=object)}), found
+    
+    def _write_segment(self, frames):
+        """Write frames to a new segment file and return its path."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{time.time_ns():020d}_{os.getpid()}.pkl")
+        with atomic_open(path, 'wb') as f:
+            pickle.dump({'model': SENTIMENT_MODEL, 'max_length': SENTIMENT_MAX_LENGTH}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for frame in frames:
+                for start in range(0, len(frame), SCORE_CACHE_FRAME_ROWS):
+                    pickle.dump(frame.iloc[start:start + SCORE_CACHE_FRAME_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+    
+    def append(self, scores):
+        """
+        Flush new scores to a new segment.
+        
+        Args:
+            scores (pandas.DataFrame): 'sentiment_score' and 'sentiment_label' indexed by text hash
+        """
+        scores = scores[['sentiment_score', 'sentiment_label']]
+        self._write_segment([scores])
+        if self._frames is not None:
+            self._add(scores)
+    
+    def compact(self):
+        """
+        Merge all segments into one, keeping the first score of every text and dropping
+        segments of other model settings.
+        """
+        segments = self._segments()
+        if len(segments) <= 1:
+            return
+        
+        self.load()
+        merged = pd.concat(self._frames) if self._frames else pd.DataFrame(
+            {'sentiment_score': pd.Series(dtype=float), 'sentiment_label': pd.Series(dtype=object)},
+            index=pd.Index([], dtype=np.uint64))
+        self._frames = [merged[~merged.index.duplicated()]]
+        self._write_segment(self._frames)
+        for path in segments:
+            os.remove(path)
+        logger.info(f"Compacted {len(segments)} sentiment score cache segments into one with {len(self._frames[0])} scores")
+
+def score_texts(texts, analyzer=None, cache=None, checkpoint_texts=SENTIMENT_CHECKPOINT_TEXTS):
+    """
+    Score texts, running the model only on texts that were not scored before.
+    
+    New scores are flushed to the score cache every checkpoint_texts texts, so a run
+    that dies mid-corpus continues from the last flushed batch.
+    
+    Args:
+        texts (list): List of texts to analyze
+        analyzer (SentimentAnalyzer, optional): Loaded analyzer. If None, the shared analyzer
+            is loaded, and only if there are new texts.
+        cache (ScoreCache, optional): Score cache, loaded on first use. Pass the same cache
+            to every call of a stage so it is loaded once. If None, the main cache is used.
+        checkpoint_texts (int): Number of new texts scored between flushes of the cache
+    
+    Returns:
+        pandas.DataFrame: 'sentiment_score' and 'sentiment_label' for every text, in order
+    """
+    cache = cache if cache is not None else ScoreCache()
+    hashes = pd.util.hash_array(np.asarray(texts, dtype=object))
+    results, found = cache.get(hashes)
+    
+    is_new = ~found
+    new_hashes, first = np.unique(hashes[is_new], return_index=True)
+    logger.info(f"Reusing cached sentiment for {found.sum()} of {len(texts)} texts")
+    
+    if len(new_hashes):
+        new_texts = [texts[i] for i in np.flatnonzero(is_new)[first]]
+        analyzer = analyzer if analyzer is not None else get_sentiment_analyzer()
+        new_scores = []
+        for start in range(0, len(new_texts), checkpoint_texts):
+            batch_texts = new_texts[start:start + checkpoint_texts]
+            batch = analyzer.predict_sentiment(batch_texts)
+            if len(batch) != len(batch_texts):
+                raise RuntimeError("Sentiment model did not score every text")
+            
+            batch.index = new_hashes[start:start + checkpoint_texts]
+            cache.append(batch)
+            new_scores.append(batch[['sentiment_score', 'sentiment_label']])
+            logger.info(f"Checkpointed sentiment scores for {min(start + checkpoint_texts, len(new_texts))} of {len(new_texts)} new texts")
+        
+        new_scores = pd.concat(new_scores)
+        positions = new_scores.index.get_indexer(hashes[is_new])
+        results.loc[is_new, 'sentiment_score'] = new_scores['sentiment_score'].to_numpy()[positions]
+        results.loc[is_new, 'sentiment_label'] = new_scores['sentiment_label'].to_numpy()[positions]
+    
+    return results
+
 def analyze_forum_sentiment():
     """
     Run sentiment analysis on forum posts and save the results.
     
+    Topics are read, scored and written in chunks that fit the memory budget. The score
+    cache is loaded once for topics and replies and compacted at the end.
+    
     Returns:
-        pandas.DataFrame: DataFrame containing sentiment analysis results
+        pandas.DataFrame: 'id', 'sentiment_score' and 'sentiment_label' of every topic
     """
     # Load processed topics
     topics_path = os.path.join(PROCESSED_DATA_DIR, "topics.csv")
@@ -136,28 +350,90 @@ def analyze_forum_sentiment():
         logger.error(f"Topics file not found: {topics_path}")
         return None
     
-    topics_df = pd.read_csv(topics_path)
-    logger.info(f"Loaded {len(topics_df)} topics for sentiment analysis")
+    columns = pd.read_csv(topics_path, nrows=0).columns
+    cache = ScoreCache()
+    cluster_sentiment = None
+    if DEDUP_ENABLED and 'duplicate_cluster' in columns:
+        # Score one representative per near-duplicate cluster and share the result with its members
+        cluster_sentiment = []
+        for chunk in read_csv_chunks(topics_path, usecols=lambda column: column in {'text_for_analysis', 'duplicate_cluster', 'is_representative'}):
+            representatives = select_representatives(chunk)
+            logger.info(f"Analyzing {len(representatives)} representative posts of {len(chunk)} topics")
+            sentiment_results = score_texts(representatives['text_for_analysis'].tolist(), cache=cache)
+            sentiment_results.index = representatives['duplicate_cluster'].to_numpy()
+            cluster_sentiment.append(sentiment_results)
+        cluster_sentiment = pd.concat(cluster_sentiment)
     
-    # Initialize sentiment analyzer
-    analyzer = SentimentAnalyzer()
+    # Combine with original data and save the results
+    output_path = os.path.join(PROCESSED_DATA_DIR, "topics_sentiment.csv")
+    scored = []
+    with csv_chunk_writer(output_path) as writer:
+        for topics_df in read_csv_chunks(topics_path):
+            logger.info(f"Loaded {len(topics_df)} topics for sentiment analysis")
+            if cluster_sentiment is not None:
+                sentiment_results = cluster_sentiment.loc[topics_df['duplicate_cluster']].reset_index(drop=True)
+            else:
+                sentiment_results = score_texts(topics_df['text_for_analysis'].tolist(), cache=cache)
+            
+            result_df = pd.concat([topics_df.reset_index(drop=True), sentiment_results[['sentiment_score', 'sentiment_label']]], axis=1)
+            writer.write(result_df)
+            scored.append(result_df[['id', 'sentiment_score', 'sentiment_label']])
+    logger.info(f"Saved sentiment analysis results to {output_path}")
     
-    # Analyze texts
-    texts = topics_df['text_for_analysis'].tolist()
-    sentiment_results = analyzer.predict_sentiment(texts)
+    # Score the replies (the model, if it was needed, is already loaded)
+    analyze_reply_sentiment(cache=cache)
+    cache.compact()
     
-    # Combine with original data
-    result_df = pd.concat([topics_df.reset_index(drop=True), sentiment_results[['sentiment_score', 'sentiment_label']]], axis=1)
+    return pd.concat(scored, ignore_index=True)
+
+def analyze_reply_sentiment(analyzer=None, cache=None):
+    """
+    Run sentiment analysis on forum replies and save the results.
     
-    # Save results
-    output_path = os.path.join(PROCESSED_DATA_DIR, "topics_sentiment.csv")
-    result_df.to_csv(output_path, index=False)
-    logger.info(f"Saved sentiment analysis results to {output_path}")
+    Replies are read, scored and written in chunks that fit the memory budget.
+    
+    Args:
+        analyzer (SentimentAnalyzer, optional): Loaded analyzer. If None, the shared analyzer is used.
+        cache (ScoreCache, optional): Score cache shared with the caller, which compacts it.
+            If None, the main cache is loaded and compacted here.
+    
+    Returns:
+        pandas.DataFrame: 'id', 'sentiment_score' and 'sentiment_label' of every reply
+    """
+    # Load processed replies
+    replies_path = os.path.join(PROCESSED_DATA_DIR, "replies.csv")
+    if not os.path.exists(replies_path):
+        logger.warning(f"Replies file not found: {replies_path}")
+        return None
+    
+    replies_head = pd.read_csv(replies_path, nrows=1)
+    if replies_head.empty or 'topic_id' not in replies_head.columns:
+        logger.warning("No topic replies to analyze")
+        return None
+    text_column = 'text_for_analysis' if 'text_for_analysis' in replies_head.columns else 'content'
+    
+    # Analyze texts, combine with original data and save the results
+    output_path = os.path.join(PROCESSED_DATA_DIR, "replies_sentiment.csv")
+    owns_cache = cache is None
+    cache = cache if cache is not None else ScoreCache()
+    scored = []
+    with csv_chunk_writer(output_path) as writer:
+        for replies_df in read_csv_chunks(replies_path):
+            logger.info(f"Loaded {len(replies_df)} replies for sentiment analysis")
+            sentiment_results = score_texts(replies_df[text_column].fillna('').astype(str).tolist(), analyzer, cache)
+            
+            result_df = pd.concat([replies_df.reset_index(drop=True), sentiment_results[['sentiment_score', 'sentiment_label']]], axis=1)
+            writer.write(result_df)
+            scored.append(result_df[['id', 'sentiment_score', 'sentiment_label']])
+    logger.info(f"Saved reply sentiment analysis results to {output_path}")
+    if owns_cache:
+        cache.compact()
     
-    return result_df
+    return pd.concat(scored, ignore_index=True)
 
 if __name__ == "__main__":
     # Execute if run as a script
+    ensure_directories()
     result_df = analyze_forum_sentiment()
     
     if result_df is not None:
@@ -0,0 +1,398 @@
+"""
+Streaming sketch module for forum analytics.
+
+This module provides bounded-memory summaries that can be updated incrementally
+as new forum posts arrive and persisted between pipeline runs. Summaries of the
+same kind can be merged, so per-bucket summaries roll up to any coarser grouping.
+"""
+import os
+import sys
+import hashlib
+import heapq
+import pickle
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    SKETCH_WIDTH,
+    SKETCH_DEPTH,
+    SKETCH_TOP_K,
+    SKETCH_TDIGEST_COMPRESSION,
+    SKETCH_HLL_PRECISION
+)
+from modules.checkpoint import atomic_open
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class CountMinSketch:
+    """
+    Count-Min Sketch for approximate frequency counts in fixed memory.
+    """
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        """
+        Initialize the sketch.
+        
+        Args:
+            width (int): Number of counters per row
+            depth (int): Number of rows (independent hash functions)
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.rows = np.arange(depth)
+    
+    def _buckets(self, item):
+        """Hash an item to one bucket per row."""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+    
+    def add(self, item, count=1):
+        """
+        Add occurrences of an item and return its updated estimate.
+        
+        Args:
+            item (str): Item to count
+            count (int): Number of occurrences
+        
+        Returns:
+            int: Estimated frequency of the item
+        """
+        buckets = self._buckets(item)
+        self.table[self.rows, buckets] += count
+        return int(self.table[self.rows, buckets].min())
+    
+    def estimate(self, item):
+        """
+        Estimate the frequency of an item (never underestimates).
+        
+        Args:
+            item (str): Item to look up
+        
+        Returns:
+            int: Estimated frequency of the item
+        """
+        return int(self.table[self.rows, self._buckets(item)].min())
+
+class HeavyHitters:
+    """
+    Streaming top-k tracker combining a Count-Min Sketch with a Space-Saving style heap.
+    
+    Frequencies are estimated by the sketch; only the current top-k candidates are kept
+    in a min-heap, so memory is bounded regardless of vocabulary size.
+    """
+    def __init__(self, k=SKETCH_TOP_K, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        """
+        Initialize the tracker.
+        
+        Args:
+            k (int): Number of heavy hitters to track
+            width (int): Count-Min Sketch width
+            depth (int): Count-Min Sketch depth
+        """
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.counts = {}
+        self.heap = []
+    
+    def update(self, item, count=1):
+        """
+        Count occurrences of an item.
+        
+        Args:
+            item (str): Item to count
+            count (int): Number of occurrences
+        """
+        estimate = self.sketch.add(item, count)
+        
+        if item in self.counts or len(self.counts) < self.k:
+            self.counts[item] = estimate
+            heapq.heappush(self.heap, (estimate, item))
+        elif estimate > self._min_count():
+            # Evict the smallest candidate, as in Space-Saving
+            _, evicted = heapq.heappop(self.heap)
+            del self.counts[evicted]
+            self.counts[item] = estimate
+            heapq.heappush(self.heap, (estimate, item))
+        
+        # Heap entries go stale when counts grow; compact to keep memory bounded
+        if len(self.heap) > 4 * self.k:
+            self.heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self.heap)
+    
+    def update_many(self, counts):
+        """
+        Count occurrences of many items.
+        
+        Args:
+            counts (dict): Mapping of item to number of occurrences
+        """
+        for item, count in counts.items():
+            self.update(item, count)
+    
+    def _min_count(self):
+        """Return the smallest tracked count, dropping stale heap entries."""
+        while self.heap and self.counts.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else 0
+    
+    def top(self, n=None):
+        """
+        Get the current heavy hitters.
+        
+        Args:
+            n (int, optional): Number of items to return. If None, returns all tracked items.
+        
+        Returns:
+            list: List of (item, estimated frequency) tuples, most frequent first
+        """
+        return sorted(self.counts.items(), key=lambda x: (-x[1], x[0]))[:n]
+
+class TDigest:
+    """
+    Mergeable t-digest for approximate quantiles.
+    
+    Values are kept as weighted centroids that are small near the tails and larger near
+    the median, bounded by the compression parameter.
+    """
+    def __init__(self, compression=SKETCH_TDIGEST_COMPRESSION):
+        """
+        Initialize the digest.
+        
+        Args:
+            compression (int): Accuracy parameter; at most about compression / 2 centroids are kept
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+    
+    @property
+    def count(self):
+        """Total weight of the digest."""
+        return float(self.weights.sum())
+    
+    def update(self, values):
+        """
+        Add values to the digest.
+        
+        Args:
+            values (array-like): Values to add; NaNs are ignored
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+    
+    def merge(self, other):
+        """
+        Merge another digest into this one.
+        
+        Args:
+            other (TDigest): Digest to merge
+        """
+        if len(other.means) == 0:
+            return
+        
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+    
+    def _compress(self, means, weights):
+        """Merge sorted centroids that fall into the same unit of the k1 scale function."""
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        
+        # k1(q) = compression / (2 pi) * arcsin(2q - 1) at the middle of each centroid
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+    
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+        
+        Args:
+            q (float): Quantile in [0, 1]
+        
+        Returns:
+            float: Estimated quantile, or NaN if the digest is empty
+        """
+        if len(self.means) == 0:
+            return np.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        
+        # Interpolate between centroid midpoints, anchored at the observed extremes
+        cumulative = np.cumsum(self.weights)
+        positions = np.r_[0.0, cumulative - self.weights / 2, cumulative[-1]]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * cumulative[-1], positions, values))
+
+class WelfordAccumulator:
+    """
+    Mergeable running count, mean and variance (Welford / Chan et al.).
+    """
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, values):
+        """
+        Add values to the accumulator.
+        
+        Args:
+            values (array-like): Values to add; NaNs are ignored
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        
+        batch = WelfordAccumulator()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        self.merge(batch)
+    
+    def merge(self, other):
+        """
+        Merge another accumulator into this one.
+        
+        Args:
+            other (WelfordAccumulator): Accumulator to merge
+        """
+        if other.count == 0:
+            return
+        
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+    
+    @property
+    def std(self):
+        """Sample standard deviation, or NaN for fewer than two values."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+class HyperLogLog:
+    """
+    Mergeable HyperLogLog sketch for approximate distinct counts.
+    """
+    def __init__(self, precision=SKETCH_HLL_PRECISION):
+        """
+        Initialize the sketch.
+        
+        Args:
+            precision (int): Number of index bits; uses 2 ** precision one-byte registers
+                (relative error about 1.04 / sqrt(2 ** precision))
+        """
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+    
+    def update(self, items):
+        """
+        Add items to the sketch.
+        
+        Args:
+            items (array-like): Items to add (hashed by their string form)
+        """
+        items = np.asarray(pd.Series(items).dropna().astype(str), dtype=object)
+        if len(items) == 0:
+            return
+        
+        hashes = pd.util.hash_array(items)
+        index_bits = np.uint64(64 - self.precision)
+        indexes = (hashes >> index_bits).astype(np.int64)
+        
+        # Rank of the first set bit in the remaining bits
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        ranks = (64 - self.precision) - _bit_length(remaining) + 1
+        np.maximum.at(self.registers, indexes, ranks.astype(np.uint8))
+    
+    def merge(self, other):
+        """
+        Merge another sketch with the same precision into this one.
+        
+        Args:
+            other (HyperLogLog): Sketch to merge
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+    
+    def count(self):
+        """
+        Estimate the number of distinct items.
+        
+        Returns:
+            int: Estimated distinct count
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        
+        # Linear counting is more accurate for small cardinalities
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+def _bit_length(values):
+    """Vectorized bit length of unsigned 64-bit integers."""
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        large = values >= np.uint64(1 << shift)
+        values[large] >>= np.uint64(shift)
+        lengths[large] += shift
+    return lengths + (values > 0)
+
+def load_sketch_state(path):
+    """
+    Load persisted sketch state.
+    
+    Args:
+        path (str): Path to the pickled state
+    
+    Returns:
+        dict or None: The persisted state, or None if it does not exist or cannot be read
+    """
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.error(f"Error loading sketch state from {path}: {str(e)}")
+        return None
+
+def save_sketch_state(state, path):
+    """
+    Persist sketch state.
+    
+    Args:
+        state (dict): State to persist
+        path (str): Path to the pickled state
+    """
+    with atomic_open(path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info(f"Saved sketch state to {path}")
\ No newline at end of file
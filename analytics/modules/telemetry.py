@@ -0,0 +1,268 @@
+"""
+Telemetry module for the analytics pipeline.
+
+This module records wall time, CPU time, peak resident memory, rows in and out and
+throughput for pipeline stages and their substages. Spans are collected per process,
+shipped back with each stage's result, and written once per run as a JSON metrics
+file and as a Chrome trace-event file (open it in chrome://tracing or Perfetto).
+"""
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    REPORTS_DIR,
+    TELEMETRY_ENABLED
+)
+from modules.checkpoint import atomic_open
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TELEMETRY_DIR = os.path.join(REPORTS_DIR, "telemetry")
+
+# Completed spans of this process, and the spans currently open
+_completed = []
+_open = []
+
+class Span:
+    """
+    Metrics of one timed block of work.
+    """
+    def __init__(self, name, category, rows_in=None):
+        """
+        Initialize the span.
+        
+        Args:
+            name (str): Name of the stage or substage
+            category (str): Span category ('pipeline', 'stage' or 'substage')
+            rows_in (int, optional): Number of rows the block consumes
+        """
+        self.name = name
+        self.category = category
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.depth = len(_open)
+        self.pid = os.getpid()
+        self.start = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_mb = None
+    
+    def set_rows(self, rows_in=None, rows_out=None):
+        """
+        Record the rows the block consumed and produced.
+        
+        Args:
+            rows_in (int, optional): Number of rows consumed
+            rows_out (int, optional): Number of rows produced
+        """
+        if rows_in is not None:
+            self.rows_in = int(rows_in)
+        if rows_out is not None:
+            self.rows_out = int(rows_out)
+    
+    def to_dict(self):
+        """
+        Convert the span to a JSON-serializable dictionary.
+        
+        Returns:
+            dict: Span metrics, including rows_per_second when rows_in is known
+        """
+        throughput = None
+        if self.rows_in is not None and self.wall_seconds:
+            throughput = self.rows_in / self.wall_seconds
+        return {
+            'name': self.name,
+            'category': self.category,
+            'pid': self.pid,
+            'depth': self.depth,
+            'start': self.start,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_mb': self.peak_rss_mb,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_second': throughput
+        }
+
+class _DisabledSpan:
+    """Stand-in yielded by span() when telemetry is disabled."""
+    def set_rows(self, rows_in=None, rows_out=None):
+        pass
+
+class _CollectedSpan:
+    """Span collected in another process, kept as its dictionary."""
+    def __init__(self, record):
+        self.record = record
+    
+    def to_dict(self):
+        return self.record
+
+def peak_rss_mb():
+    """
+    Get the peak resident memory of the current process.
+    
+    Returns:
+        float or None: Peak RSS in MB, or None if it cannot be measured on this platform
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def reset_peak_rss():
+    """
+    Reset the peak resident memory of the current process where the OS allows it.
+    
+    Pipeline worker processes are reused across stages; resetting the high-water mark
+    at the start of each stage keeps its peak RSS from including earlier stages.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+@contextmanager
+def span(name, category='substage', rows_in=None):
+    """
+    Time a block of work and record its metrics.
+    
+    Args:
+        name (str): Name of the stage or substage
+        category (str): Span category ('pipeline', 'stage' or 'substage')
+        rows_in (int, optional): Number of rows the block consumes
+    
+    Yields:
+        Span: The span, whose set_rows() records rows consumed and produced
+    """
+    if not TELEMETRY_ENABLED:
+        yield _DisabledSpan()
+        return
+    
+    record = Span(name, category, rows_in)
+    _open.append(record)
+    record.start = time.time()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record.wall_seconds = time.perf_counter() - wall_start
+        record.cpu_seconds = time.process_time() - cpu_start
+        record.peak_rss_mb = peak_rss_mb()
+        _open.remove(record)
+        _completed.append(record)
+
+def current_span():
+    """
+    Get the innermost open span of the current process.
+    
+    Returns:
+        Span: The open span, or a stand-in whose set_rows() does nothing if none is open
+    """
+    return _open[-1] if _open else _DisabledSpan()
+
+def collect_spans():
+    """
+    Take the completed spans of the current process.
+    
+    Returns:
+        list: Span dictionaries, in completion order; the process's list is cleared
+    """
+    spans = [record.to_dict() for record in _completed]
+    _completed.clear()
+    return spans
+
+def add_spans(spans):
+    """
+    Add spans collected in another process (e.g. a pool worker) to the current process.
+    
+    Args:
+        spans (list): Span dictionaries returned by collect_spans() in the other process
+    """
+    _completed.extend(_CollectedSpan(record) for record in spans)
+
+def trace_events(spans):
+    """
+    Convert spans to Chrome trace events.
+    
+    Args:
+        spans (list): Span dictionaries
+    
+    Returns:
+        list: Complete ('X') events with timestamps in microseconds, plus process name events
+    """
+    events = []
+    for pid in sorted({record['pid'] for record in spans}):
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                       'args': {'name': f"pipeline process {pid}"}})
+    
+    for record in spans:
+        args = {key: record[key] for key in ['cpu_seconds', 'peak_rss_mb', 'rows_in', 'rows_out', 'rows_per_second']
+                if record[key] is not None}
+        events.append({
+            'name': record['name'],
+            'cat': record['category'],
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': record['pid'],
+            'tid': 0,
+            'args': args
+        })
+    return events
+
+def save_run_telemetry(spans, run_info=None, output_dir=TELEMETRY_DIR):
+    """
+    Write the metrics and the trace of a pipeline run.
+    
+    Args:
+        spans (list): Span dictionaries of every process in the run
+        run_info (dict, optional): Run-level fields added to the metrics file
+        output_dir (str): Directory for the metrics and trace files
+    
+    Returns:
+        tuple: (metrics path, trace path), or (None, None) if there are no spans
+    """
+    if not spans:
+        return None, None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    spans = sorted(spans, key=lambda record: record['start'])
+    run_id = time.strftime('%Y%m%d_%H%M%S', time.localtime(spans[0]['start']))
+    
+    metrics_path = os.path.join(output_dir, f"pipeline_metrics_{run_id}.json")
+    with atomic_open(metrics_path, 'w', encoding='utf-8') as f:
+        json.dump({'run_id': run_id, **(run_info or {}), 'spans': spans}, f, indent=2)
+    
+    trace_path = os.path.join(output_dir, f"pipeline_trace_{run_id}.json")
+    with atomic_open(trace_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace_events(spans), 'displayTimeUnit': 'ms'}, f)
+    
+    logger.info(f"Saved pipeline metrics to {metrics_path} and trace to {trace_path}")
+    return metrics_path, trace_path
\ No newline at end of file
@@ -8,24 +8,42 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
-from wordcloud import WordCloud
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 import logging
 import re
 import string
+import argparse
+import time
+import json
 from collections import Counter
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 
 # Add the parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import (
     PROCESSED_DATA_DIR,
-    VISUALIZATIONS_DIR
+    VISUALIZATIONS_DIR,
+    MODELS_DIR,
+    TOPIC_OUT_OF_CORE,
+    TOPIC_METHOD,
+    TOPIC_CHUNK_SIZE,
+    TOPIC_HASHING_N_FEATURES,
+    TOPIC_TRACKED_TERMS,
+    TOPIC_PER_CATEGORY,
+    TOPIC_CATEGORY_MIN_DOCS,
+    TOPIC_CATEGORY_WORKERS,
+    TOPIC_REFIT_DAYS,
+    DEDUP_ENABLED,
+    MEMORY_BUDGET_MB,
+    ensure_directories
 )
+from modules.deduplication import select_representatives
+from modules.sketches import HeavyHitters, load_sketch_state, save_sketch_state
+from modules.figure_cache import get_pyplot, figure_key, is_figure_current, save_figure
+from modules.telemetry import span
+from modules.checkpoint import atomic_open, atomic_path
+from modules.memory_budget import SpillDirectory, read_csv_chunks, csv_chunk_writer
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +55,7 @@ logger = logging.getLogger(__name__)
 # Download NLTK resources
 def download_nltk_resources():
     """Download required NLTK resources."""
+    import nltk
     try:
         nltk.download('punkt', quiet=True)
         nltk.download('stopwords', quiet=True)
@@ -44,6 +63,31 @@ def download_nltk_resources():
     except Exception as e:
         logger.error(f"Error downloading NLTK resources: {str(e)}")
 
+# Persisted topic model files
+TOPIC_VECTORIZER_PATH = os.path.join(MODELS_DIR, "topic_vectorizer.joblib")
+TOPIC_MODEL_PATH = os.path.join(MODELS_DIR, "topic_model.joblib")
+TOPIC_MODEL_INFO_PATH = os.path.join(MODELS_DIR, "topic_model_info.json")
+
+# Persisted streaming keyword/phrase counters
+KEYWORD_SKETCH_PATH = os.path.join(MODELS_DIR, "keyword_sketches.pkl")
+
+# Dominant topic of every processed post
+TOPIC_ASSIGNMENTS_PATH = os.path.join(PROCESSED_DATA_DIR, "topic_assignments.csv")
+
+@lru_cache(maxsize=1)
+def get_stop_words():
+    """
+    Get the stopword set used for preprocessing (built once per process).
+    
+    Returns:
+        frozenset: English stopwords plus domain-specific stopwords
+    """
+    from nltk.corpus import stopwords
+    stop_words = set(stopwords.words('english'))
+    additional_stopwords = {'film', 'movie', 'watch', 'scene', 'character', 'like', 'really', 'think', 'just', 'good', 'great', 'one', 'see', 'get', 'go', 'would', 'watch', 'watched', 'watching'}
+    stop_words.update(additional_stopwords)
+    return frozenset(stop_words)
+
 # Text preprocessing
 def preprocess_text(text):
     """
@@ -51,13 +95,14 @@ def preprocess_text(text):
     
     Args:
         text (str): Text to preprocess
-        
+    
     Returns:
         str: Preprocessed text
     """
+    from nltk.tokenize import word_tokenize
     if not isinstance(text, str):
         return ""
-        
+    
     # Convert to lowercase
     text = text.lower()
     
@@ -74,34 +119,45 @@ def preprocess_text(text):
     tokens = word_tokenize(text)
     
     # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    additional_stopwords = {'film', 'movie', 'watch', 'scene', 'character', 'like', 'really', 'think', 'just', 'good', 'great', 'one', 'see', 'get', 'go', 'would', 'watch', 'watched', 'watching'}
-    stop_words.update(additional_stopwords)
+    stop_words = get_stop_words()
     tokens = [token for token in tokens if token not in stop_words and len(token) > 2]
     
     # Join tokens
     return ' '.join(tokens)
 
-def generate_wordcloud(text, title, output_path):
+def generate_wordcloud(frequencies, title, output_path, max_words=100):
     """
-    Generate a word cloud from text.
+    Generate a word cloud from word frequencies.
     
     Args:
-        text (str): Text to generate word cloud from
+        frequencies (Counter): Frequency of the most frequent words (e.g. the keyword heavy hitters)
         title (str): Title of the word cloud
         output_path (str): Path to save the word cloud image
+        max_words (int): Number of most frequent words drawn
     """
+    # Only the drawn words affect the image
+    top_words = dict(frequencies.most_common(max_words))
+    key = figure_key(repr(sorted(top_words.items())), figure='wordcloud', title=title)
+    if is_figure_current(output_path, key):
+        return
+    if not top_words:
+        logger.warning("No words to draw in the word cloud")
+        return
+    
     try:
+        from wordcloud import WordCloud
+        plt = get_pyplot()
+        
         # Generate word cloud
         wordcloud = WordCloud(
             width=800, 
             height=400, 
             background_color='black',
             colormap='viridis',
-            max_words=100,
+            max_words=max_words,
             contour_width=3,
             contour_color='steelblue'
-        ).generate(text)
+        ).generate_from_frequencies(top_words)
         
         # Plot
         plt.figure(figsize=(10, 5))
@@ -111,13 +167,31 @@ def generate_wordcloud(text, title, output_path):
         plt.tight_layout(pad=0)
         
         # Save
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        save_figure(output_path, key)
         logger.info(f"Word cloud saved to {output_path}")
     except Exception as e:
         logger.error(f"Error generating word cloud: {str(e)}")
 
-def extract_key_topics(texts, n_topics=5, n_top_words=10):
+def weight_documents(dtm, weights=None):
+    """
+    Scale the term counts of every document of a document-term matrix by its weight.
+    
+    Topic models have no sample weights; scaled counts let a near-duplicate cluster's
+    representative count as much as the posts it stands for.
+    
+    Args:
+        dtm (scipy.sparse matrix): Document-term matrix
+        weights (list, optional): Weight per document (e.g. its near-duplicate cluster size)
+    
+    Returns:
+        scipy.sparse matrix: Weighted document-term matrix
+    """
+    if weights is None:
+        return dtm
+    from scipy.sparse import diags
+    return diags(np.asarray(weights, dtype=float)) @ dtm
+
+def extract_key_topics(texts, n_topics=5, n_top_words=10, weights=None):
     """
     Extract key topics from a list of texts using LDA.
     
@@ -125,10 +199,14 @@ def extract_key_topics(texts, n_topics=5, n_top_words=10):
         texts (list): List of preprocessed texts
         n_topics (int): Number of topics to extract
         n_top_words (int): Number of top words per topic to return
-        
+        weights (list, optional): Weight per text (e.g. its near-duplicate cluster size)
+    
     Returns:
         tuple: (topics_df, vectorizer, lda_model)
     """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation
+    
     # Create document-term matrix
     vectorizer = CountVectorizer(
         max_df=0.95,       # Ignore terms that appear in >95% of documents
@@ -138,7 +216,7 @@ def extract_key_topics(texts, n_topics=5, n_top_words=10):
     )
     
     try:
-        dtm = vectorizer.fit_transform(texts)
+        dtm = weight_documents(vectorizer.fit_transform(texts), weights)
         
         # Create and fit LDA model
         lda_model = LatentDirichletAllocation(
@@ -159,16 +237,584 @@ def extract_key_topics(texts, n_topics=5, n_top_words=10):
             top_words_idx = topic.argsort()[:-n_top_words-1:-1]
             top_words = [feature_names[i] for i in top_words_idx]
             topics_df[f'Topic {topic_idx+1}'] = top_words
-            
+        
         return topics_df, vectorizer, lda_model
     except Exception as e:
         logger.error(f"Error in topic extraction: {str(e)}")
         return pd.DataFrame(), None, None
 
-def analyze_forum_topics():
+def iter_preprocessed_chunks(topic_chunks, chunk_size=TOPIC_CHUNK_SIZE):
+    """
+    Regroup streamed preprocessed forum texts into chunks of a fixed number of documents.
+    
+    Args:
+        topic_chunks (iterable): DataFrames with a 'processed_text' and an optional
+            'cluster_size' column (e.g. a SpillFile)
+        chunk_size (int): Number of documents per chunk
+    
+    Yields:
+        tuple: (preprocessed texts, weights) of one chunk; the weights are the cluster sizes
+    """
+    texts, weights = [], []
+    for chunk in topic_chunks:
+        texts.extend(chunk['processed_text'].tolist())
+        weights.extend(chunk['cluster_size'].tolist() if 'cluster_size' in chunk.columns else [1] * len(chunk))
+        while len(texts) >= chunk_size:
+            yield texts[:chunk_size], weights[:chunk_size]
+            texts, weights = texts[chunk_size:], weights[chunk_size:]
+    if texts:
+        yield texts, weights
+
+def recover_hashed_feature_names(vectorizer, term_counts):
+    """
+    Map hash buckets of a hashing vectorizer back to the most frequent term seen in each bucket.
+    
+    Args:
+        vectorizer (HashingVectorizer): The vectorizer used to hash documents
+        term_counts (Counter): Frequencies of terms observed while streaming
+    
+    Returns:
+        dict: Mapping of bucket index to term
+    """
+    if not term_counts:
+        return {}
+    
+    # Hash every tracked term once; the most frequent term wins a colliding bucket
+    terms = [term for term, _ in term_counts.most_common()]
+    term_matrix = vectorizer.transform(terms).tocsr()
+    
+    bucket_names = {}
+    for row, term in enumerate(terms):
+        for bucket in term_matrix.indices[term_matrix.indptr[row]:term_matrix.indptr[row + 1]]:
+            bucket_names.setdefault(int(bucket), term)
+    
+    return bucket_names
+
+def extract_key_topics_out_of_core(text_chunks, n_topics=5, n_top_words=10, method=TOPIC_METHOD,
+                                   n_features=TOPIC_HASHING_N_FEATURES, tracked_terms=TOPIC_TRACKED_TERMS):
+    """
+    Extract key topics from a stream of text chunks without holding the corpus in memory.
+    
+    A stateless hashing vectorizer turns each chunk into a document-term matrix that is fed
+    to an incremental topic model. Term frequencies are tracked on the side (pruned to the
+    most frequent terms) so hash buckets can be mapped back to words for the topic table.
+    
+    Args:
+        text_chunks (iterable): Iterable of lists of preprocessed texts, or of (texts, weights)
+            tuples whose weights scale the term counts of each text (see weight_documents)
+        n_topics (int): Number of topics to extract
+        n_top_words (int): Number of top words per topic to return
+        method (str): Incremental topic model to use ('lda' or 'nmf')
+        n_features (int): Number of hash buckets
+        tracked_terms (int): Number of frequent terms kept for feature name recovery
+    
+    Returns:
+        tuple: (topics_df, vectorizer, topic_model)
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation, MiniBatchNMF
+    
+    vectorizer = HashingVectorizer(
+        n_features=n_features,
+        alternate_sign=False,  # Keep counts non-negative for LDA/NMF
+        norm=None,
+        stop_words='english'
+    )
+    
+    if method == 'lda':
+        topic_model = LatentDirichletAllocation(
+            n_components=n_topics,
+            random_state=42,
+            learning_method='online'
+        )
+    elif method == 'nmf':
+        topic_model = MiniBatchNMF(
+            n_components=n_topics,
+            random_state=42
+        )
+    else:
+        logger.error(f"Invalid topic model method: {method}")
+        return pd.DataFrame(), None, None
+    
+    analyzer = vectorizer.build_analyzer()
+    term_counts = Counter()
+    
+    try:
+        n_docs = 0
+        for chunk_idx, chunk in enumerate(text_chunks):
+            texts, weights = chunk if isinstance(chunk, tuple) else (chunk, [1] * len(chunk))
+            weights = [weight for text, weight in zip(texts, weights) if text]
+            texts = [text for text in texts if text]
+            if not texts:
+                continue
+            
+            topic_model.partial_fit(weight_documents(vectorizer.transform(texts), weights))
+            
+            for text, weight in zip(texts, weights):
+                term_counts.update({term: count * weight for term, count in Counter(analyzer(text)).items()})
+            if len(term_counts) > 2 * tracked_terms:
+                term_counts = Counter(dict(term_counts.most_common(tracked_terms)))
+            
+            n_docs += len(texts)
+            logger.info(f"Processed chunk {chunk_idx + 1} ({n_docs} documents so far)")
+        
+        if n_docs == 0:
+            logger.warning("No documents available for out-of-core topic extraction")
+            return pd.DataFrame(), None, None
+        
+        # Only buckets with a recovered term can be shown in the topic table
+        bucket_names = recover_hashed_feature_names(vectorizer, term_counts)
+        named_buckets = np.array(sorted(bucket_names))
+        n_words = min(n_top_words, len(named_buckets))
+        
+        topics_df = pd.DataFrame()
+        
+        for topic_idx, topic in enumerate(topic_model.components_):
+            top_buckets = named_buckets[topic[named_buckets].argsort()[:-n_words-1:-1]]
+            topics_df[f'Topic {topic_idx+1}'] = [bucket_names[bucket] for bucket in top_buckets]
+        
+        return topics_df, vectorizer, topic_model
+    except Exception as e:
+        logger.error(f"Error in out-of-core topic extraction: {str(e)}")
+        return pd.DataFrame(), None, None
+
+def topic_model_settings(out_of_core):
+    """Get the settings a topic model is fitted with, to tell whether a saved model still applies."""
+    settings = {'out_of_core': out_of_core, 'dedup_enabled': DEDUP_ENABLED, 'per_category': TOPIC_PER_CATEGORY,
+                'category_min_docs': TOPIC_CATEGORY_MIN_DOCS}
+    if out_of_core:
+        settings.update(method=TOPIC_METHOD, chunk_size=TOPIC_CHUNK_SIZE,
+                        hashing_n_features=TOPIC_HASHING_N_FEATURES, tracked_terms=TOPIC_TRACKED_TERMS)
+    return settings
+
+def save_topic_model(vectorizer, topic_model, settings=None):
+    """
+    Persist the fitted vectorizer and topic model for later topic assignment.
+    
+    Args:
+        vectorizer: Fitted CountVectorizer or HashingVectorizer
+        topic_model: Fitted LDA or NMF model
+        settings (dict, optional): Settings the model was fitted with (see topic_model_settings)
+    """
+    import joblib
+    with atomic_path(TOPIC_VECTORIZER_PATH) as temp_path:
+        joblib.dump(vectorizer, temp_path)
+    with atomic_path(TOPIC_MODEL_PATH) as temp_path:
+        joblib.dump(topic_model, temp_path)
+    # Written last, so a model is only reused once all of its files are complete
+    with atomic_open(TOPIC_MODEL_INFO_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'fitted': datetime.now().isoformat(), 'settings': settings}, f, indent=2)
+    logger.info(f"Saved topic vectorizer and model to {MODELS_DIR}")
+
+def load_topic_model_info(info_path=TOPIC_MODEL_INFO_PATH):
+    """
+    Load when and with which settings the saved topic model was fitted.
+    
+    Args:
+        info_path (str): Path to the topic model info
+    
+    Returns:
+        dict: 'fitted' time (ISO format) and 'settings', or None if no complete model was saved
+    """
+    if not all(os.path.exists(path) for path in [info_path, TOPIC_VECTORIZER_PATH, TOPIC_MODEL_PATH]):
+        return None
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read topic model info {info_path}: {str(e)}")
+        return None
+
+def topic_refit_reason(settings, refit_days=TOPIC_REFIT_DAYS):
+    """
+    Tell whether the topic model has to be refitted instead of reusing the saved one.
+    
+    Args:
+        settings (dict): Settings of the current run (see topic_model_settings)
+        refit_days (float, optional): Maximum age of the saved model in days (None = always refit)
+    
+    Returns:
+        str: Reason to refit, or None if the saved model can be reused
+    """
+    if refit_days is None:
+        return "refitting on every run"
+    info = load_topic_model_info()
+    if info is None or not os.path.exists(os.path.join(PROCESSED_DATA_DIR, "forum_key_topics.csv")):
+        return "no saved topic model"
+    if info['settings'] != settings:
+        return "topic model settings changed"
+    if datetime.now() - datetime.fromisoformat(info['fitted']) > timedelta(days=refit_days):
+        return f"saved topic model is older than {refit_days} days"
+    return None
+
+class TopicAssigner:
+    """
+    Class for assigning topics to new posts using a persisted vectorizer and topic model.
+    """
+    def __init__(self, vectorizer_path=TOPIC_VECTORIZER_PATH, model_path=TOPIC_MODEL_PATH,
+                 vectorizer=None, topic_model=None):
+        """
+        Initialize the topic assigner by loading the persisted models once.
+        
+        Args:
+            vectorizer_path (str): Path to the persisted vectorizer
+            model_path (str): Path to the persisted topic model
+            vectorizer (optional): Fitted vectorizer already in memory; skips loading
+            topic_model (optional): Fitted topic model already in memory; skips loading
+        """
+        if vectorizer is not None and topic_model is not None:
+            self.vectorizer = vectorizer
+            self.topic_model = topic_model
+        else:
+            import joblib
+            self.vectorizer = joblib.load(vectorizer_path)
+            self.topic_model = joblib.load(model_path)
+            logger.info(f"Loaded topic model from {model_path}")
+        self.topic_names = [f'Topic {i+1}' for i in range(self.topic_model.n_components)]
+    
+    def transform(self, texts, preprocess=True):
+        """
+        Assign topic distributions to a batch of texts.
+        
+        Args:
+            texts (list): List of texts to assign topics to
+            preprocess (bool): Whether the texts still need preprocessing
+        
+        Returns:
+            pandas.DataFrame: Topic distribution per text plus 'dominant_topic' (1-based)
+                and 'topic_probability' columns
+        """
+        if preprocess:
+            texts = [preprocess_text(text) for text in texts]
+        
+        distributions = self.topic_model.transform(self.vectorizer.transform(texts))
+        
+        # NMF weights are not normalized; rescale so every row is a distribution
+        totals = distributions.sum(axis=1, keepdims=True)
+        distributions = np.divide(distributions, totals, out=np.zeros_like(distributions), where=totals > 0)
+        
+        result = pd.DataFrame(distributions, columns=self.topic_names)
+        result['dominant_topic'] = distributions.argmax(axis=1) + 1
+        result['topic_probability'] = distributions.max(axis=1)
+        
+        return result
+
+@lru_cache(maxsize=1)
+def _load_topic_assigner(fitted):
+    """Load the saved topic model once per fit (see get_topic_assigner)."""
+    return TopicAssigner()
+
+def get_topic_assigner():
+    """
+    Get an assigner for the saved topic model.
+    
+    The assigner is kept for the life of the process and reloaded after the model is
+    refitted, so a long-lived worker (see watch_pipeline) loads each model once.
+    
+    Returns:
+        TopicAssigner: The assigner
+    """
+    info = load_topic_model_info()
+    return _load_topic_assigner(info['fitted'] if info is not None else None)
+
+def load_topic_assignments(path=TOPIC_ASSIGNMENTS_PATH):
+    """
+    Load the saved topic assignments.
+    
+    Args:
+        path (str): Path to the topic assignments
+    
+    Returns:
+        pandas.DataFrame: 'dominant_topic' and 'topic_probability' indexed by post id,
+            or None if there are no assignments
+    """
+    if not os.path.exists(path):
+        return None
+    assignments = pd.read_csv(path).drop_duplicates('id').set_index('id')
+    return assignments[['dominant_topic', 'topic_probability']]
+
+def assign_topics_to_posts(texts, assigner=None, previous=None):
+    """
+    Assign the dominant topic to every forum post and save the assignments.
+    
+    Assignments are written to their own file rather than into topics.csv, so topic
+    analysis never rewrites files that other pipeline stages read concurrently. The
+    texts preprocessed for topic modeling are reused; near-duplicates share the topic
+    of their cluster's representative and are written in the order of topics.csv.
+    
+    Args:
+        texts (pandas.DataFrame or iterable): Preprocessed posts with 'id', 'processed_text'
+            and optional 'duplicate_cluster' columns, or an iterable of such chunks (e.g. a SpillFile)
+        assigner (TopicAssigner, optional): Loaded assigner. If None, uses the saved model (see get_topic_assigner).
+        previous (pandas.DataFrame, optional): Earlier assignments of the same model (see
+            load_topic_assignments). Only posts without one are assigned.
+    
+    Returns:
+        int: Number of posts with an assigned topic
+    """
+    if isinstance(texts, pd.DataFrame):
+        texts = [texts]
+    
+    # Assign topics chunk by chunk so only one chunk of texts is held in memory
+    cluster_topics = []
+    n_new = 0
+    with csv_chunk_writer(TOPIC_ASSIGNMENTS_PATH) as writer:
+        for chunk in texts:
+            if previous is not None:
+                assignments = previous.reindex(chunk['id'].to_numpy()).reset_index(drop=True)
+            else:
+                assignments = pd.DataFrame({'dominant_topic': np.nan, 'topic_probability': np.nan}, index=range(len(chunk)))
+            new = assignments['dominant_topic'].isna().to_numpy()
+            if new.any():
+                if assigner is None:
+                    assigner = get_topic_assigner()
+                fresh = assigner.transform(chunk['processed_text'][new].tolist(), preprocess=False)
+                assignments.loc[new, 'dominant_topic'] = fresh['dominant_topic'].to_numpy()
+                assignments.loc[new, 'topic_probability'] = fresh['topic_probability'].to_numpy()
+                n_new += int(new.sum())
+            assignments['dominant_topic'] = assignments['dominant_topic'].astype(int)
+            
+            if 'duplicate_cluster' in chunk.columns:
+                cluster_topics.append(assignments[['dominant_topic', 'topic_probability']].set_index(
+                    chunk['duplicate_cluster'].to_numpy()))
+            else:
+                writer.write(pd.DataFrame({
+                    'id': chunk['id'].to_numpy(),
+                    'dominant_topic': assignments['dominant_topic'].to_numpy(),
+                    'topic_probability': assignments['topic_probability'].to_numpy()
+                }))
+        
+        if cluster_topics:
+            cluster_topics = pd.concat(cluster_topics)
+            topics_path = os.path.join(PROCESSED_DATA_DIR, "topics.csv")
+            for topics_df in read_csv_chunks(topics_path, usecols=['id', 'duplicate_cluster']):
+                shared = cluster_topics.loc[topics_df['duplicate_cluster']]
+                writer.write(pd.DataFrame({
+                    'id': topics_df['id'].to_numpy(),
+                    'dominant_topic': shared['dominant_topic'].to_numpy(),
+                    'topic_probability': shared['topic_probability'].to_numpy()
+                }))
+    logger.info(f"Saved dominant topics for {writer.rows} posts to {TOPIC_ASSIGNMENTS_PATH} " +
+                f"({n_new} texts newly assigned)")
+    
+    return writer.rows
+
+def _spilled_corpus(source):
+    """
+    Get preprocessed texts and their weights from a list (unweighted) or from chunks with
+    'processed_text' and 'cluster_size' columns (e.g. a SpillFile).
+    """
+    if isinstance(source, list):
+        return source, None
+    chunks = list(source)
+    texts = [text for chunk in chunks for text in chunk['processed_text'].tolist()]
+    weights = [weight for chunk in chunks for weight in
+               (chunk['cluster_size'].tolist() if 'cluster_size' in chunk.columns else [1] * len(chunk))]
+    return texts, weights
+
+def _extract_category_topics(source, n_topics, n_top_words):
+    """Fit a topic model for one category in a worker process and return only its topic table."""
+    texts, weights = _spilled_corpus(source)
+    topics_df, _, _ = extract_key_topics(texts, n_topics=n_topics, n_top_words=n_top_words, weights=weights)
+    return topics_df
+
+def rank_global_topics(texts, global_topics, vectorizer, topic_model, n_topics=5, weights=None):
+    """
+    Rank the global topics by their weight in a set of documents.
+    
+    Used as the fallback for categories too small to fit their own model.
+    
+    Args:
+        texts (list): List of preprocessed texts of the category
+        global_topics (pandas.DataFrame): Global topic table
+        vectorizer: Fitted global vectorizer
+        topic_model: Fitted global topic model
+        n_topics (int): Number of topics to return
+        weights (list, optional): Weight per text (e.g. its near-duplicate cluster size)
+    
+    Returns:
+        pandas.DataFrame: Global topic table restricted to the category's top topics
+    """
+    distributions = topic_model.transform(vectorizer.transform(texts))
+    if weights is not None:
+        distributions = distributions * np.asarray(weights, dtype=float)[:, None]
+    top_topics = distributions.sum(axis=0).argsort()[::-1][:n_topics]
+    return global_topics[[f'Topic {topic_idx+1}' for topic_idx in top_topics]]
+
+def analyze_topics_by_category(category_texts, global_topics, vectorizer, topic_model, n_topics=5, n_top_words=10,
+                               min_docs=TOPIC_CATEGORY_MIN_DOCS, max_workers=TOPIC_CATEGORY_WORKERS):
+    """
+    Extract key topics per forum category, fitting the category models in parallel.
+    
+    Categories with fewer than min_docs posts (or whose model cannot be fitted) fall back
+    to the global topics ranked by their weight in the category.
+    
+    Args:
+        category_texts (dict): Mapping of category id to its preprocessed texts, either as a
+            list or as a SpillFile of chunks with a 'processed_text' column and an optional
+            'cluster_size' weight column (read by the worker that fits the category, so the
+            parent never holds every category's texts)
+        global_topics (pandas.DataFrame): Global topic table
+        vectorizer: Fitted global vectorizer
+        topic_model: Fitted global topic model
+        n_topics (int): Number of topics to extract per category
+        n_top_words (int): Number of top words per topic to return
+        min_docs (int): Minimum number of posts to fit a dedicated category model
+        max_workers (int, optional): Number of worker processes
+    
+    Returns:
+        dict: Mapping of category id to its topic table
+    """
+    category_topics = {}
+    fallback_categories = {}
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for category, source in sorted(category_texts.items()):
+            if len(source) < min_docs:
+                fallback_categories[category] = source
+            else:
+                futures[executor.submit(_extract_category_topics, source, n_topics, n_top_words)] = (category, source)
+        
+        for future in as_completed(futures):
+            category, source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Error fitting topic model for category {category}: {str(e)}")
+                result = pd.DataFrame()
+            
+            if result.empty:
+                fallback_categories[category] = source
+            else:
+                category_topics[category] = result
+                logger.info(f"Fitted topic model for category {category} ({len(source)} posts)")
+    
+    for category, source in fallback_categories.items():
+        if topic_model is None or global_topics.empty:
+            logger.warning(f"No topic model available for category {category}")
+            continue
+        texts, weights = _spilled_corpus(source)
+        category_topics[category] = rank_global_topics(texts, global_topics, vectorizer, topic_model, n_topics, weights)
+        logger.info(f"Using global topic model for category {category} ({len(source)} posts)")
+    
+    # Save per-category topic tables next to the global one
+    for category, result in sorted(category_topics.items()):
+        output_path = os.path.join(PROCESSED_DATA_DIR, f"forum_key_topics_category_{category}.csv")
+        with atomic_path(output_path) as temp_path:
+            result.to_csv(temp_path, index=False)
+    logger.info(f"Saved key topics for {len(category_topics)} categories to {PROCESSED_DATA_DIR}")
+    
+    return category_topics
+
+def load_keyword_sketches(sketch_path=KEYWORD_SKETCH_PATH):
+    """
+    Load the persisted keyword and phrase heavy-hitter sketches, or create empty ones.
+    
+    Args:
+        sketch_path (str): Path to the persisted sketch state
+    
+    Returns:
+        dict: Sketch state with 'keywords' and 'phrases' HeavyHitters and 'max_id', the
+            highest post id counted so far (None before the first run)
+    """
+    state = load_sketch_state(sketch_path)
+    if state is None:
+        return {'keywords': HeavyHitters(), 'phrases': HeavyHitters(), 'max_id': None}
+    if 'seen_ids' in state:
+        # Earlier states listed every counted post id
+        seen_ids = state.pop('seen_ids')
+        state['max_id'] = max(seen_ids) if seen_ids else None
+    return state
+
+def new_duplicate_clusters(topics_df, max_id):
+    """
+    Get the near-duplicate clusters of posts newer than a high-water mark.
+    
+    Args:
+        topics_df (pandas.DataFrame): Posts with 'id' and optional 'duplicate_cluster' and
+            'cluster_size' columns, before representatives are selected
+        max_id (int, optional): Highest post id counted before (None = every post is new)
+    
+    Returns:
+        numpy.ndarray: Cluster of every new post that belongs to a cluster of several posts
+    """
+    if 'duplicate_cluster' not in topics_df.columns:
+        return np.empty(0, dtype=np.int64)
+    is_new = topics_df['id'] > max_id if max_id is not None else True
+    return topics_df.loc[is_new & (topics_df['cluster_size'] > 1), 'duplicate_cluster'].to_numpy()
+
+def update_keyword_sketches(state, topic_chunks, max_id, new_duplicates=None, sketch_path=KEYWORD_SKETCH_PATH):
+    """
+    Count the posts newer than the state's high-water mark into the keyword and phrase
+    sketches and persist them.
+    
+    Forum post ids increase, so the highest counted id marks which posts are new and the
+    corpus is never recounted. Every new post is counted once with the text of its cluster's
+    representative: a representative counts once for each new post of its cluster, which
+    includes near-duplicates posted after the representative itself was counted.
+    
+    Args:
+        state (dict): Sketch state (see load_keyword_sketches)
+        topic_chunks (pandas.DataFrame or iterable): Representative topics with 'id',
+            'processed_text' and optional 'duplicate_cluster' and 'cluster_size' columns, or
+            an iterable of such chunks (e.g. a SpillFile)
+        max_id (int): Highest id of all current posts, including the non-representatives;
+            becomes the new high-water mark
+        new_duplicates (numpy.ndarray, optional): Clusters of the new posts in clusters of
+            several posts (see new_duplicate_clusters)
+        sketch_path (str): Path to the persisted sketch state
+    
+    Returns:
+        dict: The updated sketch state
+    """
+    if isinstance(topic_chunks, pd.DataFrame):
+        topic_chunks = [topic_chunks]
+    clusters, counts = np.unique(new_duplicates if new_duplicates is not None else [], return_counts=True)
+    new_members = pd.Series(counts, index=clusters, dtype=np.int64)
+    
+    n_new = 0
+    for topics_df in topic_chunks:
+        weights = (topics_df['id'] > state['max_id'] if state['max_id'] is not None else
+                   pd.Series(True, index=topics_df.index)).astype(np.int64)
+        if 'duplicate_cluster' in topics_df.columns:
+            clustered = topics_df['cluster_size'] > 1
+            weights = weights.where(~clustered, topics_df['duplicate_cluster'].map(new_members).fillna(0).astype(np.int64))
+        
+        for text, weight in zip(topics_df['processed_text'][weights > 0], weights[weights > 0]):
+            tokens = text.split()
+            state['keywords'].update_many({token: count * weight for token, count in Counter(tokens).items()})
+            state['phrases'].update_many({phrase: count * weight for phrase, count in
+                                          Counter(' '.join(pair) for pair in zip(tokens, tokens[1:])).items()})
+        n_new += int(weights.sum())
+    
+    if max_id is not None:
+        state['max_id'] = max_id if state['max_id'] is None else max(state['max_id'], max_id)
+    logger.info(f"Updated keyword sketches with {n_new} new posts (high-water mark: post {state['max_id']})")
+    save_sketch_state(state, sketch_path)
+    
+    return state
+
+def analyze_forum_topics(out_of_core=TOPIC_OUT_OF_CORE, budget_mb=MEMORY_BUDGET_MB, refit=False):
     """
     Analyze forum topics to identify key themes and generate visualizations.
     
+    Topics are preprocessed in chunks that fit the memory budget (or of TOPIC_CHUNK_SIZE
+    topics out of core). The preprocessed texts are kept for the later steps in a spill
+    directory (on disk under a budget or out of core, in memory otherwise), and the word
+    cloud is drawn from word counts accumulated per chunk.
+    
+    The topic models are refitted every TOPIC_REFIT_DAYS days or when their settings
+    change. In between, the saved global model assigns topics to the new posts only, and
+    the key topics of the last fit are kept.
+    
+    Args:
+        out_of_core (bool): Stream topics from disk into an incremental model instead of
+            loading the corpus and fitting the vocabulary on it in memory
+        budget_mb (float, optional): Memory budget in MB. If set, topics are always extracted
+            out of core.
+        refit (bool): Refit the topic models even if the saved ones can be reused
+    
     Returns:
         dict: Dictionary containing analysis results
     """
@@ -178,65 +824,174 @@ def analyze_forum_topics():
         logger.error(f"Topics file not found: {topics_path}")
         return None
     
-    topics_df = pd.read_csv(topics_path)
-    logger.info(f"Loaded {len(topics_df)} topics for text analysis")
-    
     # Download NLTK resources
     download_nltk_resources()
     
-    # Preprocess texts
-    logger.info("Preprocessing forum texts")
-    topics_df['processed_text'] = topics_df['text_for_analysis'].apply(preprocess_text)
-    
-    # Generate overall word cloud
-    all_text = ' '.join(topics_df['processed_text'].tolist())
-    wordcloud_path = os.path.join(VISUALIZATIONS_DIR, "forum_topics_wordcloud.png")
-    generate_wordcloud(all_text, "DVD Forum Topics Word Cloud", wordcloud_path)
+    columns = {'id', 'category', 'text_for_analysis', 'processed_text', 'is_representative', 'cluster_size',
+               'duplicate_cluster'}
+    per_category = TOPIC_PER_CATEGORY and 'category' in pd.read_csv(topics_path, nrows=0).columns
+    out_of_core = out_of_core or budget_mb is not None
+    # Without a budget, out-of-core runs read the topics in chunks of the topic model's size
+    chunk_rows = TOPIC_CHUNK_SIZE if out_of_core and budget_mb is None else None
+    n_loaded = 0
     
-    # Extract topics
-    logger.info("Extracting key topics from forum posts")
-    topics_result, vectorizer, lda_model = extract_key_topics(topics_df['processed_text'].tolist())
+    settings = topic_model_settings(out_of_core)
+    refit_reason = "refit requested" if refit else topic_refit_reason(settings)
+    if refit_reason is None:
+        logger.info(f"Reusing the topic model fitted {load_topic_model_info()['fitted']} for new posts")
+        per_category = False
+    else:
+        logger.info(f"Fitting the topic models ({refit_reason})")
     
-    # Save topics to CSV
-    if not topics_result.empty:
-        topics_result.to_csv(os.path.join(PROCESSED_DATA_DIR, "forum_key_topics.csv"), index=False)
-        logger.info(f"Saved key topics to {os.path.join(PROCESSED_DATA_DIR, 'forum_key_topics.csv')}")
+    # Only posts above the high-water mark of the keyword sketches are counted into them
+    sketches = load_keyword_sketches()
+    max_id = None
+    new_duplicates = []
     
-    # Extract keyword frequency
-    keywords = []
-    for text in topics_df['processed_text'].tolist():
-        keywords.extend(text.split())
+    with SpillDirectory('topics', budget_mb, on_disk=out_of_core) as spill:
+        texts = spill['texts']
+        category_texts = {}
+        
+        # Preprocess texts (partitioned runs preprocess them per shard, see modules/partitioning.py)
+        with span('preprocess_text') as record:
+            for chunk in read_csv_chunks(topics_path, usecols=lambda column: column in columns, budget_mb=budget_mb,
+                                         chunk_rows=chunk_rows):
+                n_loaded += len(chunk)
+                if len(chunk):
+                    max_id = int(chunk['id'].max()) if max_id is None else max(max_id, int(chunk['id'].max()))
+                # Collapse near-duplicates into representatives weighted by their cluster size, so
+                # spam waves are processed once but still count as often as they were posted
+                if DEDUP_ENABLED:
+                    new_duplicates.append(new_duplicate_clusters(chunk, sketches['max_id']))
+                    chunk = select_representatives(chunk)
+                else:
+                    chunk = chunk.drop(columns='duplicate_cluster', errors='ignore').assign(cluster_size=1)
+                
+                if 'processed_text' in chunk.columns:
+                    processed = chunk['processed_text'].fillna('').astype(str)
+                else:
+                    processed = chunk['text_for_analysis'].apply(preprocess_text)
+                chunk = chunk.assign(processed_text=processed)
+                
+                texts.append(chunk[[column for column in ['id', 'processed_text', 'cluster_size', 'duplicate_cluster']
+                                    if column in chunk.columns]])
+                if per_category:
+                    for category, group in chunk.groupby('category'):
+                        category_texts.setdefault(category, spill[f"category_{category}"]).append(group[['processed_text', 'cluster_size']])
+            record.set_rows(rows_in=n_loaded, rows_out=len(texts))
+        logger.info(f"Preprocessed {len(texts)} of {n_loaded} topics for text analysis" +
+                    (" (near-duplicates weighted by cluster size)" if DEDUP_ENABLED else ""))
+        
+        if refit_reason is None:
+            topics_result = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, "forum_key_topics.csv"))
+            with span('assign_topics_to_posts') as record:
+                n_assigned = assign_topics_to_posts(texts, previous=load_topic_assignments())
+                record.set_rows(rows_in=n_assigned, rows_out=n_assigned)
+        else:
+            # Extract topics
+            logger.info("Extracting key topics from forum posts")
+            with span('extract_key_topics', rows_in=len(texts)) as record:
+                if out_of_core:
+                    logger.info(f"Using out-of-core topic extraction ({TOPIC_METHOD}, chunks of {TOPIC_CHUNK_SIZE})")
+                    topics_result, vectorizer, lda_model = extract_key_topics_out_of_core(iter_preprocessed_chunks(texts))
+                else:
+                    corpus, weights = _spilled_corpus(texts)
+                    topics_result, vectorizer, lda_model = extract_key_topics(corpus, weights=weights)
+                record.set_rows(rows_out=len(topics_result.columns))
+            
+            # Save topics to CSV
+            if not topics_result.empty:
+                with atomic_path(os.path.join(PROCESSED_DATA_DIR, "forum_key_topics.csv")) as temp_path:
+                    topics_result.to_csv(temp_path, index=False)
+                logger.info(f"Saved key topics to {os.path.join(PROCESSED_DATA_DIR, 'forum_key_topics.csv')}")
+            
+            # Persist the model and assign a dominant topic to every post
+            if lda_model is not None:
+                save_topic_model(vectorizer, lda_model, settings)
+                with span('assign_topics_to_posts') as record:
+                    # Assign with the fitted model still in memory instead of reloading it
+                    n_assigned = assign_topics_to_posts(texts, TopicAssigner(vectorizer=vectorizer, topic_model=lda_model))
+                    record.set_rows(rows_in=n_assigned, rows_out=n_assigned)
+        
+        # Extract topics per category
+        category_topics = {}
+        if per_category:
+            logger.info("Extracting key topics per forum category")
+            with span('analyze_topics_by_category', rows_in=len(texts)) as record:
+                category_topics = analyze_topics_by_category(category_texts, topics_result, vectorizer, lda_model)
+                record.set_rows(rows_out=len(category_topics))
+        
+        # Extract keyword and phrase frequency from the streaming sketches
+        with span('update_keyword_sketches', rows_in=len(texts)):
+            sketches = update_keyword_sketches(sketches, texts, max_id, np.concatenate(new_duplicates) if new_duplicates else None)
+        
+        # Generate overall word cloud from the keyword heavy hitters, so no full vocabulary is counted
+        wordcloud_path = os.path.join(VISUALIZATIONS_DIR, "forum_topics_wordcloud.png")
+        with span('generate_wordcloud'):
+            generate_wordcloud(Counter(dict(sketches['keywords'].top())), "DVD Forum Topics Word Cloud", wordcloud_path)
     
-    keyword_counter = Counter(keywords)
-    top_keywords = pd.DataFrame(keyword_counter.most_common(30), columns=['keyword', 'frequency'])
-    top_keywords.to_csv(os.path.join(PROCESSED_DATA_DIR, "forum_top_keywords.csv"), index=False)
+    top_keywords = pd.DataFrame(sketches['keywords'].top(30), columns=['keyword', 'frequency'])
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "forum_top_keywords.csv")) as temp_path:
+        top_keywords.to_csv(temp_path, index=False)
+    top_phrases = pd.DataFrame(sketches['phrases'].top(30), columns=['phrase', 'frequency'])
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "forum_top_phrases.csv")) as temp_path:
+        top_phrases.to_csv(temp_path, index=False)
+    logger.info(f"Saved top keywords and phrases to {PROCESSED_DATA_DIR}")
     
     # Create keyword frequency plot
-    plt.figure(figsize=(12, 8))
-    plt.barh(top_keywords['keyword'][:15], top_keywords['frequency'][:15], color='steelblue')
-    plt.xlabel('Frequency')
-    plt.ylabel('Keyword')
-    plt.title('Top 15 Keywords in Forum Discussions')
-    plt.tight_layout()
-    plt.savefig(os.path.join(VISUALIZATIONS_DIR, "forum_keyword_frequency.png"), dpi=300, bbox_inches='tight')
-    plt.close()
+    keyword_plot_path = os.path.join(VISUALIZATIONS_DIR, "forum_keyword_frequency.png")
+    keyword_plot_key = figure_key(top_keywords.head(15), figure='keyword_frequency')
+    if not is_figure_current(keyword_plot_path, keyword_plot_key):
+        plt = get_pyplot()
+        plt.figure(figsize=(12, 8))
+        plt.barh(top_keywords['keyword'][:15], top_keywords['frequency'][:15], color='steelblue')
+        plt.xlabel('Frequency')
+        plt.ylabel('Keyword')
+        plt.title('Top 15 Keywords in Forum Discussions')
+        plt.tight_layout()
+        save_figure(keyword_plot_path, keyword_plot_key)
     
     return {
         "topics_result": topics_result,
         "top_keywords": top_keywords,
+        "top_phrases": top_phrases,
+        "category_topics": category_topics,
         "wordcloud_path": wordcloud_path
     }
 
 if __name__ == "__main__":
-    # Execute if run as a script
-    results = analyze_forum_topics()
-    
-    if results is not None and 'topics_result' in results and not results['topics_result'].empty:
-        print("\nKey Topics Identified:")
-        for col in results['topics_result'].columns:
-            print(f"\n{col}:")
-            print(", ".join(results['topics_result'][col].tolist()))
+    parser = argparse.ArgumentParser(description="Topic modeling and text analysis for forum posts")
+    parser.add_argument("--assign", nargs="+", metavar="TEXT",
+                        help="Assign topics to the given texts using the saved topic model")
+    parser.add_argument("--assign-file", metavar="PATH",
+                        help="Assign topics to texts in a file (one post per line) using the saved topic model")
+    args = parser.parse_args()
+    ensure_directories()
+    
+    if args.assign or args.assign_file:
+        texts = list(args.assign or [])
+        if args.assign_file:
+            with open(args.assign_file, 'r', encoding='utf-8') as f:
+                texts.extend(line.strip() for line in f if line.strip())
+        
+        assigner = TopicAssigner()
+        start_time = time.time()
+        assignments = assigner.transform(texts)
+        elapsed_ms = (time.time() - start_time) * 1000
+        
+        for text, topic, probability in zip(texts, assignments['dominant_topic'], assignments['topic_probability']):
+            print(f"Topic {topic} ({probability:.2f}): {text[:80]}")
+        print(f"\nAssigned topics to {len(texts)} texts in {elapsed_ms:.1f} ms")
+    else:
+        # Execute if run as a script
+        results = analyze_forum_topics()
+        
+        if results is not None and 'topics_result' in results and not results['topics_result'].empty:
+            print("\nKey Topics Identified:")
+            for col in results['topics_result'].columns:
+                print(f"\n{col}:")
+                print(", ".join(results['topics_result'][col].tolist()))
             
-        print("\nTop 10 Keywords:")
-        for _, row in results['top_keywords'].head(10).iterrows():
-            print(f"{row['keyword']}: {row['frequency']}") 
\ No newline at end of file
+            print("\nTop 10 Keywords:")
+            for _, row in results['top_keywords'].head(10).iterrows():
+                print(f"{row['keyword']}: {row['frequency']}")
\ No newline at end of file
@@ -8,18 +8,31 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
 
 # Add the parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import config
 from config import (
     PROCESSED_DATA_DIR,
     VISUALIZATIONS_DIR,
-    REPORTS_DIR
+    REPORTS_DIR,
+    REPORT_WORKERS,
+    REPORT_FORMATS,
+    TRENDING_TOP_N,
+    ensure_directories
 )
+from modules.rollup_cube import ROLLUP_CUBE_PATH, build_cube, query_cube, save_cube
+from modules.trending import TrendingEngine, engagement_score
+from modules.figure_cache import get_pyplot, close_figures, figure_key, is_figure_current, save_figure
+from modules.trend_sketches import TrendSketches, posts_for_sketches
+from modules.report_renderer import ReportSection, SectionCache, render_report
+from modules.burst_detection import BURST_METRICS, series_matrix, detect_bursts
+from modules.telemetry import span, collect_spans, add_spans
+from modules.checkpoint import atomic_path, file_fingerprint
+from modules.memory_budget import read_analysis_csv
 
 # Configure logging
 logging.basicConfig(
@@ -28,42 +41,246 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def analyze_sentiment_by_category():
+# Time periods supported by the trend analyses
+PERIODS = ('day', 'week', 'month')
+
+# Settings and analysis modules the cached report sections depend on besides their inputs
+REPORT_CONFIG = ('TRENDING_HALF_LIFE_DAYS', 'TRENDING_TOP_N', 'BURST_METHOD', 'BURST_WINDOW', 'BURST_EWMA_SPAN',
+                 'BURST_MIN_PERIODS', 'BURST_Z_THRESHOLD', 'SKETCH_TDIGEST_COMPRESSION', 'SKETCH_HLL_PRECISION')
+REPORT_CODE = ('trend_analysis', 'rollup_cube', 'trending', 'trend_sketches', 'sketches', 'burst_detection',
+               'report_renderer')
+
+def report_dependencies():
     """
-    Analyze sentiment distribution across different forum categories.
+    Fingerprint the settings and analysis code behind the report sections.
     
     Returns:
-        pandas.DataFrame: DataFrame with sentiment analysis by category
+        dict: Mapping of each setting and module to its value or source hash
     """
-    # Load processed data
-    sentiment_path = os.path.join(PROCESSED_DATA_DIR, "topics_sentiment.csv")
-    categories_path = os.path.join(PROCESSED_DATA_DIR, "categories.csv")
+    dependencies = {f"config:{name}": repr(getattr(config, name, None)) for name in REPORT_CONFIG}
+    for name in REPORT_CODE:
+        dependencies[f"code:{name}"] = file_fingerprint(os.path.join(os.path.dirname(__file__), f"{name}.py"))
+    return dependencies
+
+def bucket_periods(datetimes, period):
+    """
+    Bucket datetimes into time periods.
     
-    if not os.path.exists(sentiment_path) or not os.path.exists(categories_path):
-        logger.error("Required files for sentiment by category analysis not found")
-        return None
-        
-    sentiment_df = pd.read_csv(sentiment_path)
-    categories_df = pd.read_csv(categories_path)
+    Args:
+        datetimes (pandas.Series): Datetime series
+        period (str): Time period ('day', 'week', 'month')
     
-    # Merge data
-    sentiment_df = sentiment_df.merge(categories_df, left_on='category', right_on='id', how='left')
+    Returns:
+        pandas.Series: Start date of the period for each datetime
+    """
+    if period == 'day':
+        return datetimes.dt.date
+    elif period == 'week':
+        return datetimes.dt.to_period('W').dt.start_time.dt.date
+    elif period == 'month':
+        return datetimes.dt.to_period('M').dt.start_time.dt.date
+    raise ValueError(f"Invalid period: {period}")
+
+class AnalysisContext:
+    """
+    Loaded-once, typed and pre-bucketed forum data shared by all trend analyses.
     
-    # Group by category and calculate sentiment statistics
-    sentiment_by_category = sentiment_df.groupby('name').agg({
-        'sentiment_score': ['mean', 'median', 'std', 'count'],
-        'sentiment_label': lambda x: (x == 'positive').mean() * 100,  # % positive
-    }).reset_index()
+    Datetimes are parsed once, every supported period is bucketed into a 'period_<name>'
+    column, and the category names are merged into the sentiment data. Replies are
+    sorted by topic and carry the category and title of their topic.
+    """
+    def __init__(self, topics_df=None, sentiment_df=None, categories_df=None, replies_df=None):
+        """
+        Initialize the analysis context.
+        
+        Args:
+            topics_df (pandas.DataFrame, optional): Processed topics
+            sentiment_df (pandas.DataFrame, optional): Processed topics with sentiment
+            categories_df (pandas.DataFrame, optional): Forum categories
+            replies_df (pandas.DataFrame, optional): Processed replies, with sentiment if available
+        """
+        self.categories_df = categories_df
+        self.topics_df = self._prepare(topics_df)
+        self.sentiment_df = self._prepare(sentiment_df)
+        
+        if self.sentiment_df is not None and categories_df is not None:
+            category_names = categories_df[['id', 'name']].rename(columns={'id': 'category', 'name': 'category_name'})
+            self.sentiment_df = self.sentiment_df.merge(category_names, on='category', how='left')
+        
+        self.replies_df = self._index_replies(self._prepare(replies_df))
+        self.input_files = {}
+        self._cube = None
+        self._sketches = None
+    
+    def _scored_topics(self):
+        """Topics joined with their sentiment, or None if no dated topics are available."""
+        source = self.topics_df if self.topics_df is not None else self.sentiment_df
+        if source is None or 'datetime' not in source.columns:
+            return None
+        
+        if source is self.topics_df and self.sentiment_df is not None:
+            sentiment = self.sentiment_df[['id', 'sentiment_score', 'sentiment_label']].drop_duplicates('id')
+            source = source.drop(columns=['sentiment_score', 'sentiment_label'], errors='ignore')
+            source = source.merge(sentiment, on='id', how='left')
+        return source
+    
+    @property
+    def cube(self):
+        """
+        Rollup cube of the context data, built in one pass on first access.
+        
+        Topics are joined with their sentiment so activity and sentiment measures share one cube.
+        """
+        if self._cube is None:
+            source = self._scored_topics()
+            if source is None:
+                return None
+            self._cube = build_cube(source)
+        return self._cube
+    
+    @property
+    def sketches(self):
+        """
+        Streaming summaries (sentiment quantiles and moments, distinct authors), built on
+        first access from the same scored topics as the cube.
+        """
+        if self._sketches is None:
+            source = self._scored_topics()
+            if source is None:
+                return None
+            self._sketches = TrendSketches.from_posts(posts_for_sketches(source, self.replies_df))
+        return self._sketches
+    
+    @staticmethod
+    def input_paths(processed_dir=PROCESSED_DATA_DIR):
+        """
+        Get the processed files a context is loaded from, without reading them.
+        
+        Args:
+            processed_dir (str): Directory containing the processed data files
+        
+        Returns:
+            dict: Input name ('topics', 'sentiment', 'categories', 'topic_assignments', 'replies') to path
+        """
+        input_files = {}
+        for name, filename in [('topics', "topics.csv"), ('sentiment', "topics_sentiment.csv"),
+                               ('categories', "categories.csv"), ('topic_assignments', "topic_assignments.csv")]:
+            path = os.path.join(processed_dir, filename)
+            if os.path.exists(path):
+                input_files[name] = path
+        
+        # Topic assignments are only used merged into the topics
+        if 'topics' not in input_files:
+            input_files.pop('topic_assignments', None)
+        
+        # Prefer replies with sentiment scores
+        for filename in ["replies_sentiment.csv", "replies.csv"]:
+            path = os.path.join(processed_dir, filename)
+            if os.path.exists(path):
+                input_files['replies'] = path
+                break
+        return input_files
+    
+    @classmethod
+    def from_csv(cls, processed_dir=PROCESSED_DATA_DIR, inputs=None):
+        """
+        Load the context from the processed CSV files.
+        
+        Post texts are not used by the trend analyses and are skipped under a memory budget.
+        
+        Args:
+            processed_dir (str): Directory containing the processed data files
+            inputs (iterable, optional): Names of the inputs to load (see input_paths). If None, loads all of them.
+        
+        Returns:
+            AnalysisContext: The loaded context
+        """
+        input_files = cls.input_paths(processed_dir)
+        if inputs is not None:
+            input_files = {name: path for name, path in input_files.items() if name in inputs}
+        
+        frames = {}
+        for name in ['topics', 'sentiment', 'categories', 'replies']:
+            if name in input_files:
+                frames[f'{name}_df'] = read_analysis_csv(input_files[name])
+        
+        # Merge the dominant topic of every post, written separately by topic analysis
+        if 'topic_assignments' in input_files and 'topics_df' in frames:
+            assignments = pd.read_csv(input_files['topic_assignments']).drop_duplicates('id')
+            frames['topics_df'] = frames['topics_df'].drop(columns=['dominant_topic', 'topic_probability'], errors='ignore')
+            frames['topics_df'] = frames['topics_df'].merge(assignments, on='id', how='left')
+        else:
+            input_files.pop('topic_assignments', None)
+        
+        logger.info(f"Loaded analysis context from {processed_dir}")
+        context = cls(**frames)
+        context.input_files = input_files
+        return context
+    
+    @staticmethod
+    def _prepare(df):
+        """Parse datetimes and add one bucketed column per period."""
+        if df is None or 'datetime' not in df.columns:
+            return df
+        
+        df = df.copy()
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        for period in PERIODS:
+            df[f'period_{period}'] = bucket_periods(df['datetime'], period)
+        return df
+    
+    def _index_replies(self, replies_df):
+        """
+        Sort replies by topic id and attach the category and title of their topic.
+        
+        Topics are sorted once and each reply finds its topic by binary search, so the
+        join stays O(n log m) without building a merged copy of both tables.
+        """
+        if replies_df is None or 'topic_id' not in replies_df.columns:
+            return replies_df
+        
+        replies_df = replies_df.sort_values('topic_id', kind='stable').reset_index(drop=True)
+        topics_df = self.topics_df if self.topics_df is not None else self.sentiment_df
+        if topics_df is None or topics_df.empty:
+            return replies_df
+        
+        topics_df = topics_df.drop_duplicates('id').sort_values('id')
+        topic_ids = topics_df['id'].to_numpy()
+        reply_topic_ids = replies_df['topic_id'].to_numpy()
+        positions = np.searchsorted(topic_ids, reply_topic_ids).clip(max=len(topic_ids) - 1)
+        found = topic_ids[positions] == reply_topic_ids
+        
+        for column, target in [('category', 'category'), ('title', 'topic_title')]:
+            if column in topics_df.columns:
+                replies_df[target] = pd.Series(topics_df[column].to_numpy()[positions]).where(found)
+        return replies_df
+
+def get_context(context=None):
+    """
+    Return the given analysis context, or load one from the processed CSV files.
     
-    # Flatten multi-level columns
-    sentiment_by_category.columns = ['category', 'avg_sentiment', 'median_sentiment', 
-                                   'std_sentiment', 'topic_count', 'pct_positive']
+    Args:
+        context (AnalysisContext, optional): Existing context
     
-    # Save results
-    sentiment_by_category.to_csv(os.path.join(PROCESSED_DATA_DIR, "sentiment_by_category.csv"), index=False)
-    logger.info(f"Saved sentiment by category analysis to {os.path.join(PROCESSED_DATA_DIR, 'sentiment_by_category.csv')}")
+    Returns:
+        AnalysisContext: The analysis context
+    """
+    return context if context is not None else AnalysisContext.from_csv()
+
+def plot_sentiment_by_category(sentiment_by_category):
+    """
+    Plot average sentiment per forum category.
     
-    # Create visualization
+    Args:
+        sentiment_by_category (pandas.DataFrame): Table returned by analyze_sentiment_by_category
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, "sentiment_by_category.png")
+    key = figure_key(sentiment_by_category, figure='sentiment_by_category')
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
     plt.figure(figsize=(12, 8))
     sns.set_style("whitegrid")
     
@@ -78,65 +295,69 @@ def analyze_sentiment_by_category():
     plt.tight_layout()
     
     # Save plot
-    plt.savefig(os.path.join(VISUALIZATIONS_DIR, "sentiment_by_category.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    return sentiment_by_category
+    save_figure(output_path, key)
 
-def analyze_activity_trends(period='week'):
+def analyze_sentiment_by_category(context=None, render=True):
     """
-    Analyze activity trends over time.
+    Analyze sentiment distribution across different forum categories.
     
     Args:
-        period (str): Time period for aggregation ('day', 'week', 'month')
-        
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
+    
     Returns:
-        pandas.DataFrame: DataFrame with activity trends
+        pandas.DataFrame: DataFrame with sentiment analysis by category
     """
-    # Load processed topics
-    topics_path = os.path.join(PROCESSED_DATA_DIR, "topics.csv")
-    
-    if not os.path.exists(topics_path):
-        logger.error(f"Topics file not found: {topics_path}")
-        return None
-        
-    topics_df = pd.read_csv(topics_path)
-    
-    # Ensure datetime column is datetime type
-    if 'datetime' in topics_df.columns:
-        topics_df['datetime'] = pd.to_datetime(topics_df['datetime'])
-    else:
-        logger.error("Datetime column not found in topics data")
-        return None
+    # Load processed data
+    context = get_context(context)
     
-    # Group by time period
-    if period == 'day':
-        topics_df['period'] = topics_df['datetime'].dt.date
-    elif period == 'week':
-        topics_df['period'] = topics_df['datetime'].dt.to_period('W').dt.start_time.dt.date
-    elif period == 'month':
-        topics_df['period'] = topics_df['datetime'].dt.to_period('M').dt.start_time.dt.date
-    else:
-        logger.error(f"Invalid period: {period}")
+    if context.sentiment_df is None or context.categories_df is None or context.cube is None:
+        logger.error("Required files for sentiment by category analysis not found")
         return None
     
-    # Count topics and engagement by period
-    activity_trends = topics_df.groupby('period').agg({
-        'id': 'count',
-        'replies': 'sum',
-        'views': 'sum'
-    }).reset_index()
+    # Serve sentiment statistics per category from the rollup cube
+    by_category = query_cube(context.cube, 'day', by=('category',))
+    by_category = by_category[by_category['sentiment_count'] > 0].copy()
+    category_names = context.categories_df.set_index('id')['name']
     
-    activity_trends.columns = ['period', 'topic_count', 'reply_count', 'view_count']
+    # Medians and standard deviations come from the mergeable streaming summaries
+    summaries = context.sketches.query('day', by=('category',)).set_index('category')
+    by_category['median_sentiment'] = by_category['category'].map(summaries['median_sentiment'])
+    by_category['std_sentiment'] = by_category['category'].map(summaries['std_sentiment'])
+    by_category['distinct_authors'] = by_category['category'].map(summaries['distinct_authors'])
+    by_category['category'] = by_category['category'].map(category_names)
+    by_category = by_category.dropna(subset=['category'])
     
-    # Calculate engagement ratio (replies/topic)
-    activity_trends['engagement_ratio'] = activity_trends['reply_count'] / activity_trends['topic_count']
+    sentiment_by_category = by_category.drop(columns='topic_count').rename(columns={'sentiment_count': 'topic_count'})[
+        ['category', 'avg_sentiment', 'median_sentiment', 'std_sentiment', 'topic_count', 'pct_positive', 'distinct_authors']
+    ].sort_values('category').reset_index(drop=True)
     
     # Save results
-    activity_trends.to_csv(os.path.join(PROCESSED_DATA_DIR, f"activity_trends_{period}.csv"), index=False)
-    logger.info(f"Saved activity trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'activity_trends_{period}.csv')}")
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "sentiment_by_category.csv")) as temp_path:
+        sentiment_by_category.to_csv(temp_path, index=False)
+    logger.info(f"Saved sentiment by category analysis to {os.path.join(PROCESSED_DATA_DIR, 'sentiment_by_category.csv')}")
     
     # Create visualization
+    if render:
+        plot_sentiment_by_category(sentiment_by_category)
+    
+    return sentiment_by_category
+
+def plot_activity_trends(activity_trends, period):
+    """
+    Plot topic counts and engagement ratio over time.
+    
+    Args:
+        activity_trends (pandas.DataFrame): Table returned by analyze_activity_trends
+        period (str): Time period of the table ('day', 'week', 'month')
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, f"activity_trends_{period}.png")
+    key = figure_key(activity_trends, figure='activity_trends', period=period)
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
     plt.figure(figsize=(14, 8))
     sns.set_style("whitegrid")
     
@@ -164,133 +385,174 @@ def analyze_activity_trends(period='week'):
     plt.tight_layout()
     
     # Save plot
-    plt.savefig(os.path.join(VISUALIZATIONS_DIR, f"activity_trends_{period}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    return activity_trends
+    save_figure(output_path, key)
 
-def analyze_trending_topics(n_days=30, top_n=10):
+def analyze_activity_trends(period='week', context=None, render=True):
     """
-    Identify trending topics based on recent engagement.
+    Analyze activity trends over time.
     
     Args:
-        n_days (int): Number of days to consider for recent trends
-        top_n (int): Number of top topics to return
-        
+        period (str): Time period for aggregation ('day', 'week', 'month')
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
+    
     Returns:
-        pandas.DataFrame: DataFrame with trending topics
+        pandas.DataFrame: DataFrame with activity trends
     """
-    # Load processed topics with sentiment
-    sentiment_path = os.path.join(PROCESSED_DATA_DIR, "topics_sentiment.csv")
+    # Load processed topics
+    context = get_context(context)
+    topics_df = context.topics_df
     
-    if not os.path.exists(sentiment_path):
-        logger.error(f"Topics with sentiment file not found: {sentiment_path}")
+    if topics_df is None:
+        logger.error("Topics data not found")
         return None
-        
-    topics_df = pd.read_csv(sentiment_path)
     
-    # Ensure datetime column is datetime type
-    if 'datetime' in topics_df.columns:
-        topics_df['datetime'] = pd.to_datetime(topics_df['datetime'])
-    else:
+    if 'datetime' not in topics_df.columns:
         logger.error("Datetime column not found in topics data")
         return None
     
-    # Filter for recent topics
-    cutoff_date = datetime.now() - timedelta(days=n_days)
-    recent_topics = topics_df[topics_df['datetime'] >= cutoff_date].copy()
-    
-    if len(recent_topics) == 0:
-        logger.warning(f"No topics found within the last {n_days} days")
-        return pd.DataFrame()
-    
-    # Calculate engagement score
-    recent_topics['engagement_score'] = (recent_topics['replies'] * 3) + (recent_topics['views'] * 0.5)
+    if period not in PERIODS:
+        logger.error(f"Invalid period: {period}")
+        return None
     
-    # Sort by engagement score
-    trending_topics = recent_topics.sort_values('engagement_score', ascending=False).head(top_n)
+    # Serve topic counts, engagement and engagement ratio (replies/topic) from the rollup cube
+    activity_trends = query_cube(context.cube, period).rename(columns={
+        'reply_sum': 'reply_count',
+        'view_sum': 'view_count'
+    })[['period', 'topic_count', 'reply_count', 'view_count', 'engagement_ratio']]
     
-    # Select relevant columns
-    trending_topics = trending_topics[['id', 'title', 'author', 'datetime', 'replies', 
-                                     'views', 'engagement_score', 'sentiment_score', 'sentiment_label']]
+    # Distinct topic and reply authors come from the mergeable streaming summaries
+    distinct_authors = context.sketches.query(period).set_index('period')['distinct_authors']
+    activity_trends['distinct_authors'] = activity_trends['period'].map(distinct_authors)
+    activity_trends['period'] = activity_trends['period'].dt.date
     
     # Save results
-    trending_topics.to_csv(os.path.join(PROCESSED_DATA_DIR, "trending_topics.csv"), index=False)
-    logger.info(f"Saved trending topics to {os.path.join(PROCESSED_DATA_DIR, 'trending_topics.csv')}")
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, f"activity_trends_{period}.csv")) as temp_path:
+        activity_trends.to_csv(temp_path, index=False)
+    logger.info(f"Saved activity trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'activity_trends_{period}.csv')}")
     
     # Create visualization
+    if render:
+        plot_activity_trends(activity_trends, period)
+    
+    return activity_trends
+
+def plot_trending_topics(trending_topics):
+    """
+    Plot the time-decayed engagement of the top trending topics.
+    
+    Args:
+        trending_topics (pandas.DataFrame): Table returned by analyze_trending_topics
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, "trending_topics.png")
+    key = figure_key(trending_topics, figure='trending_topics')
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
     plt.figure(figsize=(14, 10))
     sns.set_style("whitegrid")
     
     # Sort for visualization
-    plot_data = trending_topics.sort_values('engagement_score')
+    plot_data = trending_topics.sort_values('trending_score')
     
     # Create horizontal bar chart
-    bars = plt.barh(plot_data['title'], plot_data['engagement_score'], color=sns.color_palette("viridis", len(plot_data)))
+    bars = plt.barh(plot_data['title'], plot_data['trending_score'], color=sns.color_palette("viridis", len(plot_data)))
     
     plt.title('Top Trending Forum Topics', fontsize=16)
-    plt.xlabel('Engagement Score', fontsize=12)
+    plt.xlabel('Trending Score (Time-Decayed Engagement)', fontsize=12)
     plt.ylabel('Topic', fontsize=12)
     plt.tight_layout()
     
     # Save plot
-    plt.savefig(os.path.join(VISUALIZATIONS_DIR, "trending_topics.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-    
-    return trending_topics
+    save_figure(output_path, key)
 
-def analyze_sentiment_trends(period='week'):
+def analyze_trending_topics(n_days=30, top_n=10, context=None, render=True):
     """
-    Analyze sentiment trends over time.
+    Identify trending topics based on time-decayed engagement.
+    
+    The persisted TrendingEngine is updated with the current engagement snapshot and
+    queried for its top topics, overall and per category.
     
     Args:
-        period (str): Time period for aggregation ('day', 'week', 'month')
-        
+        n_days (int): Only topics created within this many days feed new engagement into the engine
+        top_n (int): Number of top topics to return
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
+    
     Returns:
-        pandas.DataFrame: DataFrame with sentiment trends
+        pandas.DataFrame: DataFrame with trending topics
     """
     # Load processed topics with sentiment
-    sentiment_path = os.path.join(PROCESSED_DATA_DIR, "topics_sentiment.csv")
+    context = get_context(context)
+    topics_df = context.sentiment_df
     
-    if not os.path.exists(sentiment_path):
-        logger.error(f"Topics with sentiment file not found: {sentiment_path}")
+    if topics_df is None:
+        logger.error("Topics with sentiment data not found")
         return None
-        
-    topics_df = pd.read_csv(sentiment_path)
     
-    # Ensure datetime column is datetime type
-    if 'datetime' in topics_df.columns:
-        topics_df['datetime'] = pd.to_datetime(topics_df['datetime'])
-    else:
+    if 'datetime' not in topics_df.columns:
         logger.error("Datetime column not found in topics data")
         return None
     
-    # Group by time period
-    if period == 'day':
-        topics_df['period'] = topics_df['datetime'].dt.date
-    elif period == 'week':
-        topics_df['period'] = topics_df['datetime'].dt.to_period('W').dt.start_time.dt.date
-    elif period == 'month':
-        topics_df['period'] = topics_df['datetime'].dt.to_period('M').dt.start_time.dt.date
-    else:
-        logger.error(f"Invalid period: {period}")
-        return None
+    # Feed the engagement of recent topics into the trending engine
+    cutoff_date = datetime.now() - timedelta(days=n_days)
+    recent_topics = topics_df[topics_df['datetime'] >= cutoff_date]
+    
+    # Track at least as many topics as requested, whatever the engine was saved with
+    engine = TrendingEngine.load(top_n=max(top_n, TRENDING_TOP_N))
+    if len(recent_topics) > 0:
+        engine.update(recent_topics)
+        engine.save()
+    
+    # Query the current top topics
+    columns = ['id', 'title', 'author', 'datetime', 'replies', 'views',
+               'engagement_score', 'trending_score', 'sentiment_score', 'sentiment_label']
+    trending_topics = engine.top(top_n)
+    
+    if trending_topics.empty:
+        logger.warning(f"No trending topics found within the last {n_days} days")
+        return pd.DataFrame()
     
-    # Calculate sentiment statistics by period
-    sentiment_trends = topics_df.groupby('period').agg({
-        'sentiment_score': ['mean', 'median', 'std', 'count'],
-        'sentiment_label': lambda x: (x == 'positive').mean() * 100,  # % positive
-    }).reset_index()
+    trending_topics['engagement_score'] = engagement_score(trending_topics['replies'], trending_topics['views'])
+    trending_topics = trending_topics[columns]
     
-    # Flatten multi-level columns
-    sentiment_trends.columns = ['period', 'avg_sentiment', 'median_sentiment', 
-                             'std_sentiment', 'topic_count', 'pct_positive']
+    trending_by_category = pd.concat(
+        [engine.top(top_n, category=category).assign(category=category) for category in sorted(engine.categories())],
+        ignore_index=True
+    )
+    trending_by_category['engagement_score'] = engagement_score(trending_by_category['replies'], trending_by_category['views'])
     
     # Save results
-    sentiment_trends.to_csv(os.path.join(PROCESSED_DATA_DIR, f"sentiment_trends_{period}.csv"), index=False)
-    logger.info(f"Saved sentiment trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'sentiment_trends_{period}.csv')}")
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "trending_topics.csv")) as temp_path:
+        trending_topics.to_csv(temp_path, index=False)
+    logger.info(f"Saved trending topics to {os.path.join(PROCESSED_DATA_DIR, 'trending_topics.csv')}")
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "trending_topics_by_category.csv")) as temp_path:
+        trending_by_category[['category'] + columns].to_csv(temp_path, index=False)
+    logger.info(f"Saved trending topics by category to {os.path.join(PROCESSED_DATA_DIR, 'trending_topics_by_category.csv')}")
     
     # Create visualization
+    if render:
+        plot_trending_topics(trending_topics)
+    
+    return trending_topics
+
+def plot_sentiment_trends(sentiment_trends, period):
+    """
+    Plot average sentiment and share of positive posts over time.
+    
+    Args:
+        sentiment_trends (pandas.DataFrame): Table returned by analyze_sentiment_trends
+        period (str): Time period of the table ('day', 'week', 'month')
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, f"sentiment_trends_{period}.png")
+    key = figure_key(sentiment_trends, figure='sentiment_trends', period=period)
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
     plt.figure(figsize=(14, 8))
     sns.set_style("whitegrid")
     
@@ -320,80 +582,644 @@ def analyze_sentiment_trends(period='week'):
     plt.tight_layout()
     
     # Save plot
-    plt.savefig(os.path.join(VISUALIZATIONS_DIR, f"sentiment_trends_{period}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
+    save_figure(output_path, key)
+
+def analyze_sentiment_trends(period='week', context=None, render=True):
+    """
+    Analyze sentiment trends over time.
+    
+    Args:
+        period (str): Time period for aggregation ('day', 'week', 'month')
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
+    
+    Returns:
+        pandas.DataFrame: DataFrame with sentiment trends
+    """
+    # Load processed topics with sentiment
+    context = get_context(context)
+    topics_df = context.sentiment_df
+    
+    if topics_df is None:
+        logger.error("Topics with sentiment data not found")
+        return None
+    
+    if 'datetime' not in topics_df.columns:
+        logger.error("Datetime column not found in topics data")
+        return None
+    
+    if period not in PERIODS:
+        logger.error(f"Invalid period: {period}")
+        return None
+    
+    # Serve sentiment statistics by period from the rollup cube
+    sentiment_trends = query_cube(context.cube, period)
+    sentiment_trends = sentiment_trends[sentiment_trends['sentiment_count'] > 0].copy()
+    sentiment_trends['period'] = sentiment_trends['period'].dt.date
+    
+    # Medians and standard deviations come from the mergeable streaming summaries
+    summaries = context.sketches.query(period)
+    summaries = summaries.set_index(summaries['period'].dt.date)
+    sentiment_trends['median_sentiment'] = sentiment_trends['period'].map(summaries['median_sentiment'])
+    sentiment_trends['std_sentiment'] = sentiment_trends['period'].map(summaries['std_sentiment'])
+    
+    sentiment_trends = sentiment_trends.drop(columns='topic_count').rename(columns={'sentiment_count': 'topic_count'})[
+        ['period', 'avg_sentiment', 'median_sentiment', 'std_sentiment', 'topic_count', 'pct_positive']
+    ].reset_index(drop=True)
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, f"sentiment_trends_{period}.csv")) as temp_path:
+        sentiment_trends.to_csv(temp_path, index=False)
+    logger.info(f"Saved sentiment trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'sentiment_trends_{period}.csv')}")
+    
+    # Create visualization
+    if render:
+        plot_sentiment_trends(sentiment_trends, period)
     
     return sentiment_trends
 
-def generate_trend_report():
+def plot_topic_trends(topic_trends, period):
     """
-    Generate a comprehensive trend analysis report.
+    Plot post counts per dominant topic over time.
+    
+    Args:
+        topic_trends (pandas.DataFrame): Table returned by analyze_topic_trends
+        period (str): Time period of the table ('day', 'week', 'month')
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, f"topic_trends_{period}.png")
+    key = figure_key(topic_trends, figure='topic_trends', period=period)
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
+    plt.figure(figsize=(14, 8))
+    sns.set_style("whitegrid")
+    
+    for topic in topic_trends.columns[1:]:
+        plt.plot(topic_trends['period'].astype(str), topic_trends[topic], marker='o', linewidth=2, label=topic)
+    
+    plt.title(f'Topic Trends by {period.capitalize()}', fontsize=16)
+    plt.xlabel(f'Time ({period.capitalize()})', fontsize=12)
+    plt.ylabel('Number of Posts', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.legend(loc='upper left')
+    plt.tight_layout()
+    
+    # Save plot
+    save_figure(output_path, key)
+
+def analyze_topic_trends(period='week', context=None, render=True):
+    """
+    Analyze how the dominant topics of forum posts evolve over time.
+    
+    Args:
+        period (str): Time period for aggregation ('day', 'week', 'month')
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
     
     Returns:
-        str: Path to the generated report
+        pandas.DataFrame: DataFrame with post counts per topic and period
     """
-    # Run all analyses
-    logger.info("Running trend analyses to generate comprehensive report")
+    # Load processed topics with topic assignments
+    context = get_context(context)
+    topics_df = context.topics_df
+    
+    if topics_df is None:
+        logger.error("Topics data not found")
+        return None
     
-    sentiment_by_category = analyze_sentiment_by_category()
-    activity_trends_week = analyze_activity_trends(period='week')
-    trending_topics = analyze_trending_topics(n_days=30, top_n=10)
-    sentiment_trends_week = analyze_sentiment_trends(period='week')
-    
-    # Create report content
-    report_content = []
-    report_content.append("# DVD Retail Business Forum Analysis Report")
-    report_content.append(f"## Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
-    
-    # Add trending topics section
-    report_content.append("## Top Trending Topics (Last 30 Days)")
-    if trending_topics is not None and not trending_topics.empty:
-        report_content.append("| Topic | Author | Replies | Views | Sentiment |")
-        report_content.append("|-------|--------|---------|-------|-----------|")
-        for _, row in trending_topics.iterrows():
-            report_content.append(f"| {row['title']} | {row['author']} | {row['replies']} | {row['views']} | {row['sentiment_label']} |")
+    if 'dominant_topic' not in topics_df.columns:
+        logger.error("Dominant topic column not found in topics data; run topic analysis first")
+        return None
+    
+    if 'datetime' not in topics_df.columns:
+        logger.error("Datetime column not found in topics data")
+        return None
+    
+    if period not in PERIODS:
+        logger.error(f"Invalid period: {period}")
+        return None
+    
+    # Count posts per dominant topic and period
+    topic_trends = pd.crosstab(topics_df[f'period_{period}'], topics_df['dominant_topic'])
+    topic_trends.columns = [f'Topic {topic}' for topic in topic_trends.columns]
+    topic_trends = topic_trends.rename_axis('period').reset_index()
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, f"topic_trends_{period}.csv")) as temp_path:
+        topic_trends.to_csv(temp_path, index=False)
+    logger.info(f"Saved topic trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'topic_trends_{period}.csv')}")
+    
+    # Create visualization
+    if render:
+        plot_topic_trends(topic_trends, period)
+    
+    return topic_trends
+
+def sum_sorted_runs(keys, values):
+    """
+    Sum values over runs of equal keys in a sorted key array.
+    
+    Args:
+        keys (numpy.ndarray): Sorted keys
+        values (numpy.ndarray): Values of shape (len(keys), n_measures)
+    
+    Returns:
+        tuple: (run keys, run start positions, summed values per run)
+    """
+    if len(keys) == 0:
+        return keys, np.array([], dtype=int), np.empty((0, values.shape[1]))
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], starts, np.add.reduceat(values, starts, axis=0)
+
+def reply_sentiment_measures(replies_df):
+    """Additive reply measures: count, scored count, score sum and positive count."""
+    if 'sentiment_score' in replies_df.columns:
+        score = replies_df['sentiment_score'].astype(float)
     else:
-        report_content.append("No trending topics data available.")
-    report_content.append("")
-    
-    # Add sentiment by category section
-    report_content.append("## Sentiment Analysis by Category")
-    if sentiment_by_category is not None and not sentiment_by_category.empty:
-        report_content.append("| Category | Topic Count | Average Sentiment | % Positive |")
-        report_content.append("|----------|-------------|-------------------|------------|")
-        for _, row in sentiment_by_category.sort_values('avg_sentiment', ascending=False).iterrows():
-            report_content.append(f"| {row['category']} | {row['topic_count']} | {row['avg_sentiment']:.4f} | {row['pct_positive']:.1f}% |")
+        score = pd.Series(np.nan, index=replies_df.index)
+    if 'sentiment_label' in replies_df.columns:
+        positive = (replies_df['sentiment_label'] == 'positive').astype(float)
     else:
-        report_content.append("No sentiment by category data available.")
-    report_content.append("")
-    
-    # Add activity trends section
-    report_content.append("## Activity Trends (Weekly)")
-    if activity_trends_week is not None and not activity_trends_week.empty:
-        report_content.append("| Week | Topics | Replies | Views | Engagement Ratio |")
-        report_content.append("|------|--------|---------|-------|------------------|")
-        for _, row in activity_trends_week.iterrows():
-            report_content.append(f"| {row['period']} | {row['topic_count']} | {row['reply_count']} | {row['view_count']} | {row['engagement_ratio']:.2f} |")
+        positive = pd.Series(0.0, index=replies_df.index)
+    
+    return np.column_stack([
+        np.ones(len(replies_df)),
+        score.notna().to_numpy(dtype=float),
+        score.fillna(0.0).to_numpy(),
+        positive.to_numpy()
+    ])
+
+def add_reply_sentiment_stats(table):
+    """Derive the average reply sentiment and share of positive replies from summed measures."""
+    scored = table['scored_count'].where(table['scored_count'] > 0)
+    table['avg_reply_sentiment'] = table['sentiment_sum'] / scored
+    table['pct_positive_replies'] = table['positive_count'] / scored * 100
+    return table.drop(columns=['scored_count', 'sentiment_sum', 'positive_count'])
+
+def plot_reply_trends(reply_trends, period):
+    """
+    Plot reply volume and average reply sentiment over time.
+    
+    Args:
+        reply_trends (pandas.DataFrame): Table returned by analyze_reply_trends
+        period (str): Time period of the table ('day', 'week', 'month')
+    """
+    output_path = os.path.join(VISUALIZATIONS_DIR, f"reply_trends_{period}.png")
+    key = figure_key(reply_trends, figure='reply_trends', period=period)
+    if is_figure_current(output_path, key):
+        return
+    
+    plt = get_pyplot()
+    import seaborn as sns
+    plt.figure(figsize=(14, 8))
+    sns.set_style("whitegrid")
+    
+    # Plot reply count as bars
+    ax1 = plt.gca()
+    ax1.bar(reply_trends['period'].astype(str), reply_trends['reply_count'], color='steelblue', alpha=0.7, label='Replies')
+    ax1.set_xlabel(f'Time ({period.capitalize()})', fontsize=12)
+    ax1.set_ylabel('Number of Replies', fontsize=12, color='steelblue')
+    ax1.tick_params(axis='y', labelcolor='steelblue')
+    
+    # Plot average reply sentiment as line on secondary y-axis
+    ax2 = ax1.twinx()
+    ax2.plot(reply_trends['period'].astype(str), reply_trends['avg_reply_sentiment'], color='green', marker='o', label='Avg Reply Sentiment')
+    ax2.set_ylabel('Average Reply Sentiment Score', fontsize=12, color='green')
+    ax2.tick_params(axis='y', labelcolor='green')
+    
+    plt.title(f'Reply Activity by {period.capitalize()}', fontsize=16)
+    plt.xticks(rotation=45, ha='right')
+    
+    # Add legend
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+    
+    plt.tight_layout()
+    
+    # Save plot
+    save_figure(output_path, key)
+
+def analyze_reply_trends(period='week', context=None, render=True):
+    """
+    Analyze reply volume and reply sentiment over time.
+    
+    Args:
+        period (str): Time period for aggregation ('day', 'week', 'month')
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+        render (bool): Whether to render the chart
+    
+    Returns:
+        pandas.DataFrame: DataFrame with reply trends
+    """
+    context = get_context(context)
+    replies_df = context.replies_df
+    
+    if replies_df is None or replies_df.empty:
+        logger.error("Replies data not found")
+        return None
+    
+    if 'datetime' not in replies_df.columns:
+        logger.error("Datetime column not found in replies data")
+        return None
+    
+    if period not in PERIODS:
+        logger.error(f"Invalid period: {period}")
+        return None
+    
+    # Aggregate the additive reply measures per period
+    measures = pd.DataFrame(reply_sentiment_measures(replies_df),
+                            columns=['reply_count', 'scored_count', 'sentiment_sum', 'positive_count'])
+    measures['period'] = replies_df[f'period_{period}']
+    reply_trends = measures.groupby('period', as_index=False).sum()
+    reply_trends['reply_count'] = reply_trends['reply_count'].astype(int)
+    
+    # Number of distinct topics and authors replied to / replying per period
+    grouped = replies_df.groupby(f'period_{period}')
+    reply_trends['active_topics'] = reply_trends['period'].map(grouped['topic_id'].nunique())
+    if 'author' in replies_df.columns:
+        reply_trends['active_authors'] = reply_trends['period'].map(grouped['author'].nunique())
+    reply_trends = add_reply_sentiment_stats(reply_trends)
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, f"reply_trends_{period}.csv")) as temp_path:
+        reply_trends.to_csv(temp_path, index=False)
+    logger.info(f"Saved reply trends by {period} to {os.path.join(PROCESSED_DATA_DIR, f'reply_trends_{period}.csv')}")
+    
+    # Create visualization
+    if render:
+        plot_reply_trends(reply_trends, period)
+    
+    return reply_trends
+
+def reply_topic_stats(replies_df):
+    """
+    Aggregate reply measures per topic in one linear pass over the topic-sorted replies.
+    
+    Args:
+        replies_df (pandas.DataFrame): Replies sorted by 'topic_id' (see AnalysisContext)
+    
+    Returns:
+        pandas.DataFrame: Summed reply measures per topic with its category and title
+    """
+    topic_ids, starts, sums = sum_sorted_runs(replies_df['topic_id'].to_numpy(), reply_sentiment_measures(replies_df))
+    
+    stats = pd.DataFrame(sums, columns=['reply_count', 'scored_count', 'sentiment_sum', 'positive_count'])
+    stats.insert(0, 'topic_id', topic_ids)
+    for column in ['topic_title', 'category']:
+        if column in replies_df.columns:
+            stats.insert(1, column, replies_df[column].to_numpy()[starts])
+    stats['reply_count'] = stats['reply_count'].astype(int)
+    return stats
+
+def analyze_reply_sentiment_by_topic(context=None):
+    """
+    Analyze reply volume and reply sentiment per topic.
+    
+    Args:
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+    
+    Returns:
+        pandas.DataFrame: DataFrame with reply statistics per topic, most replied first
+    """
+    context = get_context(context)
+    replies_df = context.replies_df
+    
+    if replies_df is None or replies_df.empty or 'topic_id' not in replies_df.columns:
+        logger.error("Replies data not found")
+        return None
+    
+    reply_sentiment_by_topic = add_reply_sentiment_stats(reply_topic_stats(replies_df))
+    reply_sentiment_by_topic = reply_sentiment_by_topic.sort_values(['reply_count', 'topic_id'], ascending=[False, True])
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "reply_sentiment_by_topic.csv")) as temp_path:
+        reply_sentiment_by_topic.to_csv(temp_path, index=False)
+    logger.info(f"Saved reply sentiment by topic to {os.path.join(PROCESSED_DATA_DIR, 'reply_sentiment_by_topic.csv')}")
+    
+    return reply_sentiment_by_topic
+
+def analyze_reply_sentiment_by_category(context=None):
+    """
+    Analyze reply volume and reply sentiment per forum category.
+    
+    Args:
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+    
+    Returns:
+        pandas.DataFrame: DataFrame with reply statistics per category
+    """
+    context = get_context(context)
+    replies_df = context.replies_df
+    
+    if replies_df is None or replies_df.empty or 'category' not in replies_df.columns:
+        logger.error("Replies data with topic categories not found")
+        return None
+    
+    # Roll the per-topic sums up to categories
+    topic_stats = reply_topic_stats(replies_df)
+    reply_sentiment_by_category = topic_stats.groupby('category', as_index=False).agg(
+        reply_count=('reply_count', 'sum'),
+        topic_count=('topic_id', 'count'),
+        scored_count=('scored_count', 'sum'),
+        sentiment_sum=('sentiment_sum', 'sum'),
+        positive_count=('positive_count', 'sum')
+    )
+    reply_sentiment_by_category = add_reply_sentiment_stats(reply_sentiment_by_category)
+    
+    # Show category names instead of ids
+    if context.categories_df is not None:
+        category_names = dict(zip(context.categories_df['id'], context.categories_df['name']))
+        reply_sentiment_by_category['category'] = reply_sentiment_by_category['category'].map(
+            lambda category: category_names.get(category, category))
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, "reply_sentiment_by_category.csv")) as temp_path:
+        reply_sentiment_by_category.to_csv(temp_path, index=False)
+    logger.info(f"Saved reply sentiment by category to {os.path.join(PROCESSED_DATA_DIR, 'reply_sentiment_by_category.csv')}")
+    
+    return reply_sentiment_by_category
+
+def analyze_activity_bursts(period='day', context=None):
+    """
+    Detect bursts in the activity and sentiment series of every category.
+    
+    Topic counts, reply volume and average sentiment per category (plus an 'All'
+    series) are scored together in one vectorized pass.
+    
+    Args:
+        period (str): Time period of the series ('day', 'week', 'month')
+        context (AnalysisContext, optional): Shared analysis data. If None, loads the processed CSV files.
+    
+    Returns:
+        pandas.DataFrame: DataFrame with detected bursts
+    """
+    context = get_context(context)
+    
+    if context.cube is None:
+        logger.error("Topics data with datetimes not found")
+        return None
+    
+    if period not in PERIODS:
+        logger.error(f"Invalid period: {period}")
+        return None
+    
+    # Series per category and for the whole forum, served from the rollup cube
+    metrics = list(BURST_METRICS)
+    by_category = query_cube(context.cube, period, by=('period', 'category')).dropna(subset=['category'])
+    overall = query_cube(context.cube, period).assign(category='All')
+    table = pd.concat([by_category, overall], ignore_index=True)
+    table['category'] = table['category'].astype(str)
+    
+    matrix = series_matrix(table[['period', 'category'] + metrics], period, metrics)
+    if matrix.empty:
+        bursts = pd.DataFrame(columns=['period', 'category', 'metric', 'value', 'baseline', 'zscore', 'direction'])
     else:
-        report_content.append("No activity trends data available.")
-    report_content.append("")
+        bursts = detect_bursts(matrix).rename(columns={'series': 'category'})
+        bursts['period'] = bursts['period'].dt.date
     
-    # Add visualizations reference
-    report_content.append("## Visualizations")
-    report_content.append("Please refer to the visualizations directory for graphical representations of these trends.")
+    # Show category names instead of ids
+    if context.categories_df is not None:
+        category_names = dict(zip(context.categories_df['id'].astype(str), context.categories_df['name']))
+        bursts['category'] = bursts['category'].map(lambda category: category_names.get(category, category))
+    
+    # Save results
+    with atomic_path(os.path.join(PROCESSED_DATA_DIR, f"activity_bursts_{period}.csv")) as temp_path:
+        bursts.to_csv(temp_path, index=False)
+    logger.info(f"Saved activity bursts by {period} to {os.path.join(PROCESSED_DATA_DIR, f'activity_bursts_{period}.csv')}")
     
-    # Join content and save report
-    report_text = "\n".join(report_content)
-    report_path = os.path.join(REPORTS_DIR, f"forum_trend_report_{datetime.now().strftime('%Y%m%d')}.md")
+    return bursts
+
+# Analyses included in the trend report: name -> (analysis, kwargs, plot, plot kwargs); plot is None for tables only
+REPORT_ANALYSES = {
+    'sentiment_by_category': (analyze_sentiment_by_category, {}, plot_sentiment_by_category, {}),
+    'activity_trends_week': (analyze_activity_trends, {'period': 'week'}, plot_activity_trends, {'period': 'week'}),
+    'trending_topics': (analyze_trending_topics, {'n_days': 30, 'top_n': 10}, plot_trending_topics, {}),
+    'sentiment_trends_week': (analyze_sentiment_trends, {'period': 'week'}, plot_sentiment_trends, {'period': 'week'}),
+    'topic_trends_week': (analyze_topic_trends, {'period': 'week'}, plot_topic_trends, {'period': 'week'}),
+    'activity_bursts_day': (analyze_activity_bursts, {'period': 'day'}, None, {}),
+    'reply_trends_week': (analyze_reply_trends, {'period': 'week'}, plot_reply_trends, {'period': 'week'}),
+    'reply_sentiment_by_topic': (analyze_reply_sentiment_by_topic, {}, None, {}),
+    'reply_sentiment_by_category': (analyze_reply_sentiment_by_category, {}, None, {}),
+}
+
+# Analysis context of a report worker process, set once per worker by the pool initializer
+_worker_context = None
+
+def _init_report_worker(context):
+    """Store the shared analysis context in a report worker process."""
+    global _worker_context
+    _worker_context = context
+
+def run_report_analysis(name, context=None):
+    """
+    Run one report analysis and render its chart.
     
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(report_text)
+    Rendering failures are returned instead of raised so a broken chart does not fail the report.
     
+    Args:
+        name (str): Name of the analysis in REPORT_ANALYSES
+        context (AnalysisContext, optional): Shared analysis data. If None, uses the worker's context.
+    
+    Returns:
+        tuple: (name, table, render_error)
+    """
+    analysis, kwargs, plot, plot_kwargs = REPORT_ANALYSES[name]
+    context = context if context is not None else _worker_context
+    if plot is None:
+        with span(name) as record:
+            table = analysis(context=context, **kwargs)
+            record.set_rows(rows_out=len(table) if table is not None else 0)
+        return name, table, None
+    with span(name) as record:
+        table = analysis(context=context, render=False, **kwargs)
+        record.set_rows(rows_out=len(table) if table is not None else 0)
+    
+    render_error = None
+    if table is not None and not table.empty:
+        try:
+            with span(f"plot_{name}"):
+                plot(table, **plot_kwargs)
+        except Exception as e:
+            render_error = str(e)
+        finally:
+            close_figures()
+    
+    return name, table, render_error
+
+def _run_report_analysis_in_worker(name):
+    """Run one report analysis in a worker process and return its telemetry spans with the result."""
+    collect_spans()
+    result = run_report_analysis(name)
+    return result, collect_spans()
+
+# Input files each report analysis reads (see AnalysisContext.input_paths)
+ANALYSIS_INPUTS = {
+    'trending_topics': ('sentiment', 'categories'),
+    'sentiment_by_category': ('topics', 'sentiment', 'categories', 'replies'),
+    'activity_trends_week': ('topics', 'sentiment', 'replies'),
+    'sentiment_trends_week': ('topics', 'sentiment', 'replies'),
+    'topic_trends_week': ('topics', 'topic_assignments'),
+    'activity_bursts_day': ('topics', 'sentiment', 'categories'),
+    'reply_trends_week': ('replies',),
+    'reply_sentiment_by_topic': ('topics', 'sentiment', 'replies'),
+    'reply_sentiment_by_category': ('topics', 'sentiment', 'categories', 'replies'),
+}
+
+# Analyses that depend on the current time and are never served from the section cache
+UNCACHED_ANALYSES = ('trending_topics',)
+
+# Inputs the rollup cube is built from
+CUBE_INPUTS = ('topics', 'sentiment')
+
+# Analyses served from the streaming summaries of the context
+SKETCH_ANALYSES = ('sentiment_by_category', 'activity_trends_week', 'sentiment_trends_week')
+
+# Sections of the trend report, in order
+REPORT_SECTIONS = [
+    ReportSection("Top Trending Topics (Last 30 Days)", 'trending_topics', [
+        ('title', 'Topic', None), ('author', 'Author', None), ('replies', 'Replies', None),
+        ('views', 'Views', None), ('sentiment_label', 'Sentiment', None)
+    ], "No trending topics data available."),
+    ReportSection("Sentiment Analysis by Category", 'sentiment_by_category', [
+        ('category', 'Category', None), ('topic_count', 'Topic Count', None),
+        ('avg_sentiment', 'Average Sentiment', '%.4f'), ('pct_positive', '% Positive', '%.1f%%')
+    ], "No sentiment by category data available.", sort_by='avg_sentiment', ascending=False),
+    ReportSection("Activity Trends (Weekly)", 'activity_trends_week', [
+        ('period', 'Week', None), ('topic_count', 'Topics', None), ('reply_count', 'Replies', None),
+        ('view_count', 'Views', None), ('engagement_ratio', 'Engagement Ratio', '%.2f')
+    ], "No activity trends data available."),
+    ReportSection("Reply Activity (Weekly)", 'reply_trends_week', [
+        ('period', 'Week', None), ('reply_count', 'Replies', None), ('active_topics', 'Active Topics', None),
+        ('avg_reply_sentiment', 'Avg Reply Sentiment', '%.4f'), ('pct_positive_replies', '% Positive Replies', '%.1f%%')
+    ], "No reply activity data available."),
+    ReportSection("Most Discussed Topics", 'reply_sentiment_by_topic', [
+        ('topic_title', 'Topic', None), ('reply_count', 'Replies', None),
+        ('avg_reply_sentiment', 'Avg Reply Sentiment', '%.4f'), ('pct_positive_replies', '% Positive Replies', '%.1f%%')
+    ], "No reply data available.", limit=10),
+    ReportSection("Reply Sentiment by Category", 'reply_sentiment_by_category', [
+        ('category', 'Category', None), ('reply_count', 'Replies', None), ('topic_count', 'Topics Replied To', None),
+        ('avg_reply_sentiment', 'Avg Reply Sentiment', '%.4f'), ('pct_positive_replies', '% Positive Replies', '%.1f%%')
+    ], "No reply sentiment by category data available.", sort_by='reply_count', ascending=False),
+    ReportSection("Topic Trends (Weekly)", 'topic_trends_week', [
+        ('period', 'Week', None)
+    ], "No topic trends data available.", other_columns=True),
+    ReportSection("Activity Bursts (Daily)", 'activity_bursts_day', [
+        ('period', 'Day', None), ('category', 'Category', None), ('metric', 'Metric', None),
+        ('value', 'Value', '%.2f'), ('baseline', 'Baseline', '%.2f'), ('zscore', 'Z-Score', '%.2f'),
+        ('direction', 'Direction', None)
+    ], "No activity bursts detected."),
+]
+
+def generate_trend_report(max_workers=REPORT_WORKERS, formats=REPORT_FORMATS):
+    """
+    Generate a comprehensive trend analysis report.
+    
+    Analyses whose inputs did not change since the previous report are served from the
+    section cache; the others and their chart renders run concurrently in a process pool.
+    The report is rendered from the resulting tables once all of them are available.
+    
+    Args:
+        max_workers (int, optional): Number of worker processes
+        formats (tuple): Report output formats ('md', 'html', 'json')
+    
+    Returns:
+        str: Path to the generated report (the markdown report if requested)
+    """
+    # Run all analyses
+    logger.info("Running trend analyses to generate comprehensive report")
+    
+    # Reuse the tables of analyses whose input files did not change
+    cache = SectionCache()
+    fingerprints = {name: file_fingerprint(path) for name, path in AnalysisContext.input_paths().items()}
+    dependencies = report_dependencies()
+    cache_keys = {}
+    tables = {}
+    render_errors = {}
+    for name, inputs in ANALYSIS_INPUTS.items():
+        if name in UNCACHED_ANALYSES:
+            continue
+        cache_keys[name] = cache.key(name, {source: fingerprints.get(source) for source in inputs},
+                                     REPORT_ANALYSES[name][1], dependencies)
+        cached = cache.get(name, cache_keys[name])
+        if cached is not None:
+            tables[name] = cached
+    
+    pending = [name for name in REPORT_ANALYSES if name not in tables]
+    if pending:
+        # Only load the inputs of the analyses to run; the cube follows changes to its inputs
+        inputs = {source for name in pending for source in ANALYSIS_INPUTS[name]}
+        refresh_cube = any(name not in UNCACHED_ANALYSES for name in pending) or not os.path.exists(ROLLUP_CUBE_PATH)
+        if refresh_cube:
+            inputs.update(CUBE_INPUTS)
+        
+        with span('load_analysis_context') as record:
+            context = AnalysisContext.from_csv(inputs=inputs)
+            if refresh_cube and context.cube is not None:
+                save_cube(context.cube)
+            # Build the summaries once here, so the workers receive them with the context
+            if any(name in SKETCH_ANALYSES for name in pending):
+                context.sketches
+            record.set_rows(rows_out=len(context.topics_df) if context.topics_df is not None else 0)
+        
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_report_worker, initargs=(context,)) as executor:
+            futures = {executor.submit(_run_report_analysis_in_worker, name): name for name in pending}
+            
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    (_, tables[name], render_error), worker_spans = future.result()
+                    add_spans(worker_spans)
+                except Exception as e:
+                    logger.error(f"Error running {name} analysis: {str(e)}")
+                    tables[name] = None
+                    continue
+                
+                if name in cache_keys:
+                    cache.put(name, cache_keys[name], tables[name])
+                
+                if render_error is not None:
+                    render_errors[name] = render_error
+                    logger.error(f"Error rendering {name} chart: {render_error}")
+                else:
+                    logger.info(f"Completed {name} analysis")
+    
+    # Charts of cached sections are only re-rendered if missing (see the figure cache)
+    for name in REPORT_ANALYSES:
+        _, _, plot, plot_kwargs = REPORT_ANALYSES[name]
+        if name in pending or plot is None or tables[name] is None or tables[name].empty:
+            continue
+        try:
+            plot(tables[name], **plot_kwargs)
+        except Exception as e:
+            render_errors[name] = str(e)
+            logger.error(f"Error rendering {name} chart: {str(e)}")
+        finally:
+            close_figures()
+    
+    # Add visualizations reference
+    visualization_notes = ["Please refer to the visualizations directory for graphical representations of these trends."]
+    if render_errors:
+        visualization_notes += ["", "The following charts could not be rendered:"]
+        visualization_notes += [f"- {name}: {error}" for name, error in sorted(render_errors.items())]
+    sections = REPORT_SECTIONS + [ReportSection("Visualizations", text=visualization_notes)]
+    
+    # Render and save the report
+    output_stem = os.path.join(REPORTS_DIR, f"forum_trend_report_{datetime.now().strftime('%Y%m%d')}")
+    with span('render_report'):
+        paths = render_report("DVD Retail Business Forum Analysis Report",
+                              f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                              sections, tables, output_stem, formats)
+    
+    report_path = paths.get('md', next(iter(paths.values()), None))
     logger.info(f"Saved comprehensive trend report to {report_path}")
     
     return report_path
 
 if __name__ == "__main__":
     # Execute if run as a script
+    ensure_directories()
     report_path = generate_trend_report()
     print(f"Trend analysis report generated at: {report_path}") 
\ No newline at end of file
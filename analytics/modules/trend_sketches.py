@@ -0,0 +1,179 @@
+"""
+Streaming trend statistics module for forum posts.
+
+This module keeps mergeable summaries per (day, category) bucket: a t-digest for
+sentiment quantiles, a Welford accumulator for sentiment mean and standard deviation,
+and a HyperLogLog sketch for distinct authors. Coarser periods and groupings are
+answered by merging bucket summaries. The summaries are built on every run from the same
+scored posts as the rollup cube, so they always reflect the current dates, scores and
+sentiment model.
+"""
+import os
+import sys
+import pandas as pd
+import numpy as np
+import logging
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modules.sketches import TDigest, WelfordAccumulator, HyperLogLog
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class BucketSummary:
+    """
+    Mergeable summary of the posts in one bucket.
+    """
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.sentiment_digest = TDigest()
+        self.sentiment_moments = WelfordAccumulator()
+        self.authors = HyperLogLog()
+    
+    def update(self, scores, authors):
+        """
+        Add posts to the summary.
+        
+        Args:
+            scores (array-like): Sentiment scores of the posts (NaN for unscored posts)
+            authors (array-like): Authors of the posts
+        """
+        self.sentiment_digest.update(scores)
+        self.sentiment_moments.update(scores)
+        self.authors.update(authors)
+    
+    def merge(self, other):
+        """
+        Merge another summary into this one.
+        
+        Args:
+            other (BucketSummary): Summary to merge
+        """
+        self.sentiment_digest.merge(other.sentiment_digest)
+        self.sentiment_moments.merge(other.sentiment_moments)
+        self.authors.merge(other.authors)
+
+class TrendSketches:
+    """
+    Per (day, category) summaries of forum posts.
+    """
+    def __init__(self):
+        """Initialize empty summaries."""
+        self.buckets = {}
+    
+    @classmethod
+    def from_posts(cls, posts):
+        """
+        Build the summaries of a set of posts.
+        
+        Args:
+            posts (pandas.DataFrame): Posts (see update)
+        
+        Returns:
+            TrendSketches: The summaries
+        """
+        sketches = cls()
+        sketches.update(posts)
+        return sketches
+    
+    def update(self, posts):
+        """
+        Merge posts into their bucket summaries.
+        
+        Args:
+            posts (pandas.DataFrame): Posts with 'datetime', 'category', 'author' and
+                optional 'sentiment_score' columns
+        """
+        if posts.empty:
+            return
+        
+        if 'sentiment_score' not in posts.columns:
+            posts = posts.assign(sentiment_score=np.nan)
+        days = posts['datetime'].dt.normalize()
+        
+        for (day, category), group in posts.groupby([days, posts['category']], dropna=False, sort=False):
+            key = (None if pd.isna(day) else day, None if pd.isna(category) else category)
+            self.buckets.setdefault(key, BucketSummary()).update(group['sentiment_score'], group['author'])
+        
+        logger.info(f"Merged {len(posts)} posts into {len(self.buckets)} trend sketch buckets")
+    
+    def query(self, level, by=('period',)):
+        """
+        Merge bucket summaries along the requested dimensions.
+        
+        Args:
+            level (str): Time period ('day', 'week', 'month')
+            by (tuple): Dimensions to group by ('period', 'category')
+        
+        Returns:
+            pandas.DataFrame: One row per group with median_sentiment, avg_sentiment,
+                std_sentiment, sentiment_count and distinct_authors columns
+        """
+        groups = {}
+        for (day, category), summary in self.buckets.items():
+            if 'period' in by and day is None:
+                continue
+            
+            key = []
+            for dimension in by:
+                if dimension == 'period':
+                    key.append(_period_start(day, level))
+                elif dimension == 'category':
+                    key.append(category)
+                else:
+                    raise ValueError(f"Invalid sketch dimension: {dimension}")
+            
+            merged = groups.setdefault(tuple(key), BucketSummary())
+            merged.merge(summary)
+        
+        rows = []
+        for key, summary in groups.items():
+            rows.append(dict(zip(by, key),
+                             median_sentiment=summary.sentiment_digest.quantile(0.5),
+                             avg_sentiment=summary.sentiment_moments.mean if summary.sentiment_moments.count else np.nan,
+                             std_sentiment=summary.sentiment_moments.std,
+                             sentiment_count=summary.sentiment_moments.count,
+                             distinct_authors=summary.authors.count()))
+        
+        columns = list(by) + ['median_sentiment', 'avg_sentiment', 'std_sentiment', 'sentiment_count', 'distinct_authors']
+        return pd.DataFrame(rows, columns=columns).sort_values(list(by)).reset_index(drop=True)
+
+def _period_start(day, level):
+    """Return the start of the period containing a day."""
+    if level == 'day':
+        return day
+    elif level == 'week':
+        return day - pd.Timedelta(days=day.dayofweek)
+    elif level == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Invalid period: {level}")
+
+def posts_for_sketches(topics_df, replies_df=None):
+    """
+    Combine topics and replies into the post frame expected by TrendSketches.
+    
+    Args:
+        topics_df (pandas.DataFrame): Topics with 'id', 'datetime', 'category', 'author'
+            and optional 'sentiment_score' columns
+        replies_df (pandas.DataFrame, optional): Replies with 'id', 'topic_id', 'datetime',
+            'author' and optional 'category' columns
+    
+    Returns:
+        pandas.DataFrame: Posts
+    """
+    columns = ['datetime', 'category', 'author', 'sentiment_score']
+    posts = [topics_df.reindex(columns=columns)]
+    
+    if replies_df is not None:
+        # Replies count as authors only, so the sentiment summaries stay comparable with the
+        # topic-level trends
+        posts.append(replies_df.drop(columns='sentiment_score', errors='ignore').reindex(columns=columns))
+    
+    posts = pd.concat(posts, ignore_index=True)
+    posts['datetime'] = pd.to_datetime(posts['datetime'])
+    return posts
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+Trending topics engine for forum posts.
+
+This module keeps exponentially time-decayed engagement scores for forum topics.
+Scores are updated incrementally from engagement snapshots, and a bounded heap of
+the current top-N topics is maintained overall and per category, so trending
+queries do not need to rescan or re-sort the whole forum. The scores are persisted
+between pipeline runs with the settings that produced them.
+"""
+import os
+import sys
+import heapq
+import pickle
+import pandas as pd
+import numpy as np
+import logging
+from datetime import datetime
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import (
+    MODELS_DIR,
+    TRENDING_HALF_LIFE_DAYS,
+    TRENDING_TOP_N
+)
+from modules.checkpoint import atomic_open
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TRENDING_STATE_PATH = os.path.join(MODELS_DIR, "trending_state.pkl")
+
+# Topic fields kept in the engine state for display
+TOPIC_FIELDS = ['title', 'author', 'datetime', 'category', 'replies', 'views',
+                'sentiment_score', 'sentiment_label']
+
+# Renormalize the forward-decay landmark before weights grow too large for floats
+MAX_DECAY_EXPONENT = 50.0
+
+def engagement_score(replies, views):
+    """
+    Calculate the raw engagement score of topics.
+    
+    Args:
+        replies: Number of replies (scalar or array-like)
+        views: Number of views (scalar or array-like)
+    
+    Returns:
+        Engagement score (replies * 3 + views * 0.5)
+    """
+    return (replies * 3) + (views * 0.5)
+
+def to_days(timestamps):
+    """Convert naive timestamps to fractional days since the epoch."""
+    return pd.to_datetime(timestamps).astype('int64') / 86400e9
+
+class TopNHeap:
+    """
+    Bounded min-heap of the N highest-scoring items.
+    
+    Scores may only increase, so an item outside the heap can only enter by
+    beating the current minimum.
+    """
+    def __init__(self, n):
+        """
+        Initialize the heap.
+        
+        Args:
+            n (int): Number of items to keep
+        """
+        self.n = n
+        self.scores = {}
+        self.heap = []
+    
+    def update(self, item, score):
+        """
+        Offer an item with its new score.
+        
+        Args:
+            item: Item identifier
+            score (float): New (non-decreasing) score of the item
+        """
+        if item in self.scores or len(self.scores) < self.n:
+            self.scores[item] = score
+            heapq.heappush(self.heap, (score, item))
+        elif score > self._min_score():
+            _, evicted = heapq.heappop(self.heap)
+            del self.scores[evicted]
+            self.scores[item] = score
+            heapq.heappush(self.heap, (score, item))
+        
+        # Drop stale entries once they dominate the heap
+        if len(self.heap) > 4 * self.n:
+            self.rebuild()
+    
+    def _min_score(self):
+        """Return the smallest current score, dropping stale heap entries."""
+        while self.heap and self.scores.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else 0.0
+    
+    def rescale(self, factor):
+        """Multiply every score by a positive factor."""
+        self.scores = {item: score * factor for item, score in self.scores.items()}
+        self.rebuild()
+    
+    def rebuild(self):
+        """Rebuild the heap from the current scores."""
+        self.heap = [(score, item) for item, score in self.scores.items()]
+        heapq.heapify(self.heap)
+    
+    def top(self, n=None):
+        """
+        Get the highest-scoring items.
+        
+        Args:
+            n (int, optional): Number of items to return
+        
+        Returns:
+            list: List of (item, score) tuples, highest first
+        """
+        return sorted(self.scores.items(), key=lambda x: -x[1])[:n]
+
+class TrendingEngine:
+    """
+    Stateful engine for time-decayed trending topic scores.
+    
+    Uses forward decay: engagement gained at time t is stored with weight
+    exp(rate * (t - landmark)), so existing scores never need to be decayed on
+    update and rankings stay valid. The decay to the query time is applied when
+    results are read.
+    """
+    def __init__(self, half_life_days=TRENDING_HALF_LIFE_DAYS, top_n=TRENDING_TOP_N):
+        """
+        Initialize the engine.
+        
+        Args:
+            half_life_days (float): Days after which engagement counts half as much
+            top_n (int): Number of topics kept in each top-N heap
+        """
+        self.half_life_days = half_life_days
+        self.decay_rate = np.log(2) / half_life_days
+        self.top_n = top_n
+        self.landmark = None
+        self.state = pd.DataFrame(columns=TOPIC_FIELDS + ['score'])
+        self.heaps = {'all': TopNHeap(top_n)}
+    
+    def update(self, snapshot, snapshot_time=None):
+        """
+        Update scores from an engagement snapshot.
+        
+        New topics are credited with their engagement at creation time; for known topics
+        only the growth in replies and views since the previous snapshot is credited.
+        
+        Args:
+            snapshot (pandas.DataFrame): Topics with 'id', 'replies', 'views', 'datetime',
+                'category' and optional display columns
+            snapshot_time (datetime, optional): Time of the snapshot. Defaults to now.
+        """
+        now = to_days(pd.Series([snapshot_time or datetime.now()])).iloc[0]
+        if self.landmark is None:
+            self.landmark = now
+        if self.decay_rate * (now - self.landmark) > MAX_DECAY_EXPONENT:
+            self._renormalize(now)
+        
+        snapshot = snapshot.drop_duplicates('id').set_index('id')
+        snapshot = snapshot.reindex(columns=TOPIC_FIELDS)
+        previous = self.state.reindex(snapshot.index)
+        is_new = previous['score'].isna().to_numpy()
+        
+        # Engagement gained since the previous snapshot (counts never decrease the score)
+        gained = engagement_score(snapshot['replies'] - previous['replies'].fillna(0),
+                                  snapshot['views'] - previous['views'].fillna(0))
+        gained = gained.astype(float).fillna(0).clip(lower=0).to_numpy()
+        
+        created = to_days(snapshot['datetime']).fillna(now).clip(upper=now).to_numpy()
+        event_time = np.where(is_new, created, now)
+        weighted_gain = gained * np.exp(self.decay_rate * (event_time - self.landmark))
+        
+        updated = snapshot.assign(score=previous['score'].fillna(0).to_numpy() + weighted_gain)
+        if self.state.empty:
+            self.state = updated
+        else:
+            self.state = pd.concat([self.state.drop(index=updated.index, errors='ignore'), updated])
+        
+        # Only topics whose score grew can change the top-N heaps
+        changed = updated[weighted_gain > 0]
+        for topic_id, score, category in zip(changed.index, changed['score'], changed['category']):
+            self.heaps['all'].update(topic_id, score)
+            if not pd.isna(category):
+                self.heaps.setdefault(category, TopNHeap(self.top_n)).update(topic_id, score)
+        
+        logger.info(f"Updated trending scores from {len(snapshot)} topics ({len(changed)} with new engagement)")
+    
+    def _renormalize(self, now):
+        """Move the forward-decay landmark to now and rescale all stored scores."""
+        factor = np.exp(-self.decay_rate * (now - self.landmark))
+        self.state['score'] = self.state['score'] * factor
+        for heap in self.heaps.values():
+            heap.rescale(factor)
+        self.landmark = now
+    
+    def top(self, n=None, category=None, query_time=None):
+        """
+        Get the current top trending topics.
+        
+        Args:
+            n (int, optional): Number of topics to return (at most top_n are tracked)
+            category (optional): Category id. If None, returns the overall ranking.
+            query_time (datetime, optional): Time to decay scores to. Defaults to now.
+        
+        Returns:
+            pandas.DataFrame: Top topics with their display fields and 'trending_score'
+        """
+        heap = self.heaps.get('all' if category is None else category)
+        if heap is None or self.landmark is None:
+            return pd.DataFrame(columns=['id'] + TOPIC_FIELDS + ['trending_score'])
+        
+        ranked = heap.top(n)
+        if n is not None and len(ranked) < n:
+            if n > self.top_n:
+                logger.warning(f"Only the top {self.top_n} trending topics are tracked, returning {len(ranked)} of the {n} requested")
+            else:
+                logger.info(f"Only {len(ranked)} topics have trending engagement, fewer than the {n} requested")
+        now = to_days(pd.Series([query_time or datetime.now()])).iloc[0]
+        decay = np.exp(-self.decay_rate * (now - self.landmark))
+        
+        result = self.state.loc[[topic_id for topic_id, _ in ranked], TOPIC_FIELDS]
+        result['trending_score'] = [score * decay for _, score in ranked]
+        return result.rename_axis('id').reset_index()
+    
+    def categories(self):
+        """Return the categories with a top-N heap."""
+        return [key for key in self.heaps if key != 'all']
+    
+    def _rebuild_heaps(self):
+        """Rebuild the top-N heaps from the stored scores."""
+        self.heaps = {'all': TopNHeap(self.top_n)}
+        scored = self.state[self.state['score'] > 0]
+        groups = [('all', scored)] + list(scored.groupby('category'))
+        for key, group in groups:
+            heap = self.heaps.setdefault(key, TopNHeap(self.top_n))
+            heap.scores = group['score'].astype(float).nlargest(self.top_n).to_dict()
+            heap.rebuild()
+    
+    def save(self, path=TRENDING_STATE_PATH):
+        """
+        Persist the scores and the settings that produced them.
+        
+        Args:
+            path (str): Output path
+        """
+        with atomic_open(path, 'wb') as f:
+            pickle.dump({'half_life_days': self.half_life_days, 'landmark': self.landmark, 'state': self.state},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.info(f"Saved trending state to {path}")
+    
+    @classmethod
+    def load(cls, path=TRENDING_STATE_PATH, half_life_days=TRENDING_HALF_LIFE_DAYS, top_n=TRENDING_TOP_N):
+        """
+        Load the persisted scores into an engine with the given settings.
+        
+        The top-N heaps are rebuilt from the scores, so top_n may change between runs.
+        Scores decayed with another half-life cannot be converted and are discarded.
+        
+        Args:
+            path (str): Path to the persisted state
+            half_life_days (float): Days after which engagement counts half as much
+            top_n (int): Number of topics kept in each top-N heap
+        
+        Returns:
+            TrendingEngine: The engine
+        """
+        engine = cls(half_life_days, top_n)
+        if not os.path.exists(path):
+            return engine
+        
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Error loading trending state from {path}: {str(e)}")
+            return engine
+        if isinstance(saved, TrendingEngine):
+            # Earlier versions pickled the whole engine
+            saved = {'half_life_days': np.log(2) / saved.decay_rate, 'landmark': saved.landmark, 'state': saved.state}
+        
+        if not np.isclose(saved['half_life_days'], half_life_days):
+            logger.warning(f"Trending half-life changed from {saved['half_life_days']:g} to {half_life_days:g} days, " +
+                           "resetting the trending scores")
+            return engine
+        engine.landmark = saved['landmark']
+        engine.state = saved['state']
+        engine._rebuild_heaps()
+        return engine
\ No newline at end of file
@@ -3,14 +3,53 @@ Main script to run the DVD retail business analytics pipeline.
 
 This script orchestrates the entire analytics pipeline including:
 1. Data ingestion from forum
-2. Sentiment analysis
-3. Topic modeling and text analysis
-4. Trend analysis and reporting
+2. Near-duplicate detection
+3. Sentiment analysis
+4. Topic modeling and text analysis
+5. Author analytics
+6. Trend analysis and reporting
+
+Each step is a stage declaring the files it reads and writes. Stages run as a
+dependency graph, so independent stages (e.g. sentiment and topic analysis) run
+concurrently in separate processes, and the critical path is reported at the end.
+Stages whose input files, config values and code did not change since their last
+run are skipped; use --force to rerun them and --only to run selected stages.
+If a run fails or is interrupted, --resume continues it after its last completed
+stage, with the options it was started with.
+With --partitioned, topics and replies are ingested, preprocessed and scored per
+time shard by a pool of worker processes (see modules/partitioning.py) and merged
+before the remaining stages run.
+With MEMORY_BUDGET_MB set in config.py, every stage processes its data in chunks
+that fit the budget (see modules/memory_budget.py); the peak RSS of every stage is
+reported either way.
+With --profile, every stage that runs is profiled (see modules/profiling.py).
+With --watch, the script keeps running and reruns the affected stages whenever the
+forum export files change.
 """
 import os
+import argparse
 import logging
 import time
 from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    FORUM_TOPICS_FILE,
+    FORUM_REPLIES_FILE,
+    FORUM_CATEGORIES_FILE,
+    FORUM_STATS_FILE,
+    PROCESSED_DATA_DIR,
+    DEDUP_ENABLED,
+    PIPELINE_WORKERS,
+    WATCH_POLL_SECONDS,
+    WATCH_DEBOUNCE_SECONDS,
+    PARTITION_WORKERS,
+    MEMORY_BUDGET_MB,
+    ensure_directories
+)
+from modules.pipeline_dag import Stage, run_stages
+from modules.telemetry import span, current_span, collect_spans, save_run_telemetry
 
 # Configure logging
 logging.basicConfig(
@@ -23,39 +62,211 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_pipeline():
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules")
+
+def _processed(filename):
+    """Return the path of a processed data file."""
+    return os.path.join(PROCESSED_DATA_DIR, filename)
+
+def _modules(*names):
+    """Return the source paths of analysis modules."""
+    return [os.path.join(MODULES_DIR, f"{name}.py") for name in names]
+
+TOPICS_CSV = _processed("topics.csv")
+REPLIES_CSV = _processed("replies.csv")
+CATEGORIES_CSV = _processed("categories.csv")
+TOPICS_SENTIMENT_CSV = _processed("topics_sentiment.csv")
+REPLIES_SENTIMENT_CSV = _processed("replies_sentiment.csv")
+TOPIC_ASSIGNMENTS_CSV = _processed("topic_assignments.csv")
+
+# Stages replaced by the shard workers in partitioned runs
+PARTITIONED_STAGES = ('ingest_topics', 'ingest_replies')
+
+def ingest_topics():
+    """Load the raw forum topics into topics.csv (step 1)."""
+    from modules.data_ingestion import ingest_topics as ingest
+    topics_df = ingest()
+    if topics_df is None:
+        raise RuntimeError("No forum topics were loaded")
+    current_span().set_rows(rows_out=len(topics_df))
+    return f"Loaded {len(topics_df)} topics"
+
+def ingest_replies():
+    """Load the raw forum replies into replies.csv (step 1)."""
+    from modules.data_ingestion import ingest_replies as ingest
+    replies_df = ingest()
+    current_span().set_rows(rows_out=len(replies_df) if replies_df is not None else 0)
+    return f"Loaded {len(replies_df) if replies_df is not None else 0} replies"
+
+def ingest_categories():
+    """Load the raw forum categories into categories.csv (step 1)."""
+    from modules.data_ingestion import ingest_categories as ingest
+    categories_df = ingest()
+    return f"Loaded {len(categories_df) if categories_df is not None else 0} categories"
+
+def deduplicate_posts():
+    """Cluster near-duplicate topics (step 2)."""
+    from modules.deduplication import detect_near_duplicates
+    dedup_df = detect_near_duplicates()
+    if dedup_df is None:
+        return None
+    current_span().set_rows(rows_in=len(dedup_df), rows_out=dedup_df['is_representative'].sum())
+    return f"Grouped {len(dedup_df)} topics into {dedup_df['is_representative'].sum()} near-duplicate clusters"
+
+def analyze_sentiment():
+    """Score the sentiment of topics and replies (step 3)."""
+    from modules.sentiment_analysis import analyze_forum_sentiment
+    sentiment_df = analyze_forum_sentiment()
+    if sentiment_df is not None:
+        current_span().set_rows(rows_in=len(sentiment_df), rows_out=len(sentiment_df))
+    return f"Completed sentiment analysis on {len(sentiment_df) if sentiment_df is not None else 0} forum posts"
+
+def analyze_topics(refit=False):
+    """Fit topic models or assign new posts to the saved ones, and extract keywords (step 4)."""
+    from modules.topic_analysis import analyze_forum_topics
+    analyze_forum_topics(refit=refit)
+    return "Completed topic modeling and text analysis"
+
+def analyze_author_activity():
+    """Compute author statistics and similarity (step 5)."""
+    from modules.author_analysis import analyze_authors
+    author_results = analyze_authors()
+    if author_results is not None:
+        current_span().set_rows(rows_out=len(author_results['author_stats']))
+    return f"Completed author analytics for {len(author_results['author_stats']) if author_results is not None else 0} authors"
+
+def analyze_trends():
+    """Run the trend analyses and write the report (step 6)."""
+    from modules.trend_analysis import generate_trend_report
+    report_path = generate_trend_report()
+    if report_path is None:
+        raise RuntimeError("No trend analysis report was generated")
+    return report_path
+
+def build_stages(refit_models=False):
+    """
+    Declare the pipeline stages with the files they read and write.
+    
+    Args:
+        refit_models (bool): Refit the topic models even if the saved ones can be reused
+    
+    Returns:
+        list: Stage objects in pipeline order
+    """
+    # Each export file is ingested separately, so a change to one file only reruns its dependents
+    stages = [
+        Stage('ingest_topics', ingest_topics, inputs=[FORUM_TOPICS_FILE], outputs=[TOPICS_CSV],
+              code=_modules('data_ingestion')),
+        Stage('ingest_replies', ingest_replies, inputs=[FORUM_REPLIES_FILE], outputs=[REPLIES_CSV],
+              code=_modules('data_ingestion')),
+        Stage('ingest_categories', ingest_categories, inputs=[FORUM_CATEGORIES_FILE], outputs=[CATEGORIES_CSV],
+              code=_modules('data_ingestion'))
+    ]
+    if DEDUP_ENABLED:
+        stages.append(Stage('deduplication', deduplicate_posts,
+                            inputs=[TOPICS_CSV],
+                            outputs=[TOPICS_CSV, _processed("near_duplicate_clusters.csv")],
+                            config=['DEDUP_SHINGLE_SIZE', 'DEDUP_NUM_PERM', 'DEDUP_LSH_BANDS', 'DEDUP_THRESHOLD'],
+                            code=_modules('deduplication')))
+    stages.extend([
+        Stage('sentiment', analyze_sentiment,
+              inputs=[TOPICS_CSV, REPLIES_CSV],
+              outputs=[TOPICS_SENTIMENT_CSV, REPLIES_SENTIMENT_CSV],
+              config=['SENTIMENT_MODEL', 'SENTIMENT_MAX_LENGTH', 'DEDUP_ENABLED'],
+              code=_modules('sentiment_analysis', 'deduplication'), resident=True),
+        Stage('topics', partial(analyze_topics, refit=refit_models),
+              inputs=[TOPICS_CSV],
+              outputs=[TOPIC_ASSIGNMENTS_CSV, _processed("forum_key_topics.csv"),
+                       _processed("forum_top_keywords.csv"), _processed("forum_top_phrases.csv")],
+              config=['TOPIC_OUT_OF_CORE', 'TOPIC_METHOD', 'TOPIC_CHUNK_SIZE', 'TOPIC_HASHING_N_FEATURES',
+                      'TOPIC_TRACKED_TERMS', 'TOPIC_PER_CATEGORY', 'TOPIC_CATEGORY_MIN_DOCS', 'DEDUP_ENABLED',
+                      'SKETCH_WIDTH', 'SKETCH_DEPTH', 'SKETCH_TOP_K', 'MEMORY_BUDGET_MB', 'TOPIC_REFIT_DAYS'],
+              code=_modules('topic_analysis', 'deduplication', 'sketches', 'figure_cache'), resident=True),
+        Stage('authors', analyze_author_activity,
+              inputs=[TOPICS_CSV, REPLIES_CSV, TOPICS_SENTIMENT_CSV, REPLIES_SENTIMENT_CSV],
+              outputs=[_processed("author_stats.csv"), _processed("author_similarity.csv")],
+              config=['AUTHOR_SIMILAR_TOP_K', 'AUTHOR_MIN_SHARED_TOPICS', 'AUTHOR_MAX_TOPIC_AUTHORS'],
+              code=_modules('author_analysis', 'trending')),
+        Stage('trends', analyze_trends,
+              inputs=[TOPICS_CSV, REPLIES_CSV, CATEGORIES_CSV, TOPICS_SENTIMENT_CSV,
+                      REPLIES_SENTIMENT_CSV, TOPIC_ASSIGNMENTS_CSV],
+              outputs=[_processed("sentiment_by_category.csv"), _processed("trending_topics.csv")],
+              config=['REPORT_FORMATS', 'TRENDING_HALF_LIFE_DAYS', 'TRENDING_TOP_N', 'BURST_METHOD', 'BURST_WINDOW',
+                      'BURST_EWMA_SPAN', 'BURST_MIN_PERIODS', 'BURST_Z_THRESHOLD', 'SKETCH_TDIGEST_COMPRESSION',
+                      'SKETCH_HLL_PRECISION'],
+              code=_modules('trend_analysis', 'rollup_cube', 'trending', 'figure_cache', 'trend_sketches',
+                            'sketches', 'report_renderer', 'burst_detection'))
+    ])
+    return stages
+
+def run_pipeline(force=False, only=None, profile=False, executor=None, resume=False,
+                 partitioned=False, shard_workers=PARTITION_WORKERS, model_executor=None):
     """
     Run the complete analytics pipeline.
+    
+    Args:
+        force (bool): Rerun stages even if their inputs, config and code did not change, and
+            refit the topic models
+        only (list, optional): Names of the stages to run (default: all stages)
+        profile (bool): Run the stages under cProfile and tracemalloc and report the hottest functions
+        executor (ProcessPoolExecutor, optional): Long-lived pool to run the stages in (see watch_pipeline)
+        resume (bool): Continue the last run that failed or was interrupted (force and only are
+            taken from that run)
+        partitioned (bool): Ingest, preprocess and score topics and replies per time shard in
+            worker processes, merge the shards and then run the remaining stages
+        shard_workers (int, optional): Local shard worker processes (None = number of CPUs)
+        model_executor (ProcessPoolExecutor, optional): Long-lived pool to run the model-bearing
+            stages in (see watch_pipeline)
+    
+    Returns:
+        bool: True if every stage completed or was up to date
     """
     start_time = time.time()
+    ensure_directories()
     logger.info("Starting DVD retail business analytics pipeline")
     
     try:
-        # Step 1: Data Ingestion
-        logger.info("Step 1: Data Ingestion")
-        from modules.data_ingestion import get_forum_data
-        topics_df, replies_df, categories_df, stats_data = get_forum_data()
-        logger.info(f"Loaded {len(topics_df) if topics_df is not None else 0} topics, " + 
-                    f"{len(replies_df) if replies_df is not None else 0} replies, " + 
-                    f"{len(categories_df) if categories_df is not None else 0} categories")
+        profile_dir = None
+        if profile:
+            from modules.profiling import PROFILE_DIR
+            profile_dir = os.path.join(PROFILE_DIR, datetime.now().strftime('%Y%m%d_%H%M%S'))
         
-        # Step 2: Sentiment Analysis
-        logger.info("Step 2: Sentiment Analysis")
-        from modules.sentiment_analysis import analyze_forum_sentiment
-        sentiment_df = analyze_forum_sentiment()
-        logger.info(f"Completed sentiment analysis on {len(sentiment_df) if sentiment_df is not None else 0} forum posts")
+        results = None
+        try:
+            with span('pipeline', category='pipeline'):
+                if partitioned:
+                    from modules.partitioning import run_partitioned_ingestion
+                    with span('partitioned_ingestion', category='stage') as record:
+                        n_topics, n_replies = run_partitioned_ingestion(max_workers=shard_workers)
+                        record.set_rows(rows_out=n_topics + n_replies)
+                    only = [stage.name for stage in build_stages() if stage.name not in PARTITIONED_STAGES]
+                results = run_stages(build_stages(refit_models=force), max_workers=PIPELINE_WORKERS, force=force, only=only,
+                                     profile_dir=profile_dir, executor=executor, resume=resume,
+                                     resident_executor=model_executor)
+        finally:
+            # Save the per-stage metrics and trace of this run, whether or not it succeeded
+            # (a run that raised only has the spans recorded in this process)
+            run_info = {'completed': results is not None}
+            if results is not None:
+                run_info.update({key: results[key] for key in ['succeeded', 'cached', 'failed', 'skipped', 'critical_path',
+                                                               'critical_path_seconds', 'wall_seconds']})
+            try:
+                metrics_path, trace_path = save_run_telemetry(
+                    (results['spans'] if results is not None else []) + collect_spans(), run_info=run_info)
+            except Exception as e:
+                logger.error(f"Error saving run telemetry: {str(e)}")
+                metrics_path, trace_path = None, None
         
-        # Step 3: Topic Analysis
-        logger.info("Step 3: Topic Modeling and Text Analysis")
-        from modules.topic_analysis import analyze_forum_topics
-        topic_results = analyze_forum_topics()
-        logger.info("Completed topic modeling and text analysis")
+        if profile:
+            from modules.profiling import format_profile_summary
+            print("\nHottest functions (own time) across profiled stages:")
+            print(format_profile_summary(results['profiles']))
+            print(f"Profiles and allocation sites saved in: {profile_dir}\n")
         
-        # Step 4: Trend Analysis
-        logger.info("Step 4: Trend Analysis and Reporting")
-        from modules.trend_analysis import generate_trend_report
-        report_path = generate_trend_report()
-        logger.info(f"Generated trend analysis report: {report_path}")
+        if results['failed'] or results['skipped']:
+            raise RuntimeError(f"Stages failed: {', '.join(results['failed'])}; " +
+                               f"skipped: {', '.join(results['skipped']) or 'none'}")
+        report_path = results['summaries'].get('trends')
         
         # Calculate total runtime
         end_time = time.time()
@@ -65,6 +276,17 @@ def run_pipeline():
         print("\n" + "="*50)
         print(f"DVD Retail Business Analytics Pipeline Complete")
         print(f"Report generated at: {report_path}")
+        print(f"Stages run: {', '.join(results['succeeded']) or 'none'}")
+        if results['critical_path']:
+            print(f"Critical path: {' -> '.join(results['critical_path'])} ({results['critical_path_seconds']:.2f} seconds)")
+        stage_memory = [f"{record['name']} {record['peak_rss_mb']:.0f} MB" for record in results['spans']
+                        if record['category'] == 'stage' and record['peak_rss_mb'] is not None]
+        if stage_memory:
+            print(f"Peak RSS per stage: {', '.join(stage_memory)}" +
+                  (f" (memory budget {MEMORY_BUDGET_MB} MB)" if MEMORY_BUDGET_MB is not None else ""))
+        if trace_path is not None:
+            print(f"Stage metrics: {metrics_path}")
+            print(f"Trace (open in chrome://tracing): {trace_path}")
         print(f"Run dashboard with: python -m analytics.dashboard.app")
         print("="*50 + "\n")
         
@@ -86,5 +308,88 @@ def run_pipeline():
         
         return False
 
+def _watched_files_state():
+    """Return the modification time and size of every forum export file."""
+    state = {}
+    for path in [FORUM_TOPICS_FILE, FORUM_REPLIES_FILE, FORUM_CATEGORIES_FILE, FORUM_STATS_FILE]:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            state[path] = None
+    return state
+
+def watch_pipeline(poll_seconds=WATCH_POLL_SECONDS, debounce_seconds=WATCH_DEBOUNCE_SECONDS, profile=False):
+    """
+    Keep the analytics up to date with the forum export files.
+    
+    Runs the pipeline once, then polls the export files and reruns the pipeline after
+    they change. A burst of writes triggers a single run once the files have been quiet
+    for debounce_seconds. Only stages whose inputs changed run (see the stage manifest),
+    and stages run in pools that live as long as the watcher. The sentiment and topics
+    stages always run in the same single-worker pool, so one process keeps the sentiment
+    model and the topic model loaded between runs, only scores new texts and only assigns
+    topics to new posts until the topic model is due for a refit (see TOPIC_REFIT_DAYS).
+    
+    Args:
+        poll_seconds (float): Interval between checks of the export files
+        debounce_seconds (float): Quiet time required after the last change before a run
+        profile (bool): Profile every run (see run_pipeline)
+    """
+    logger.info(f"Watching forum export files (polling every {poll_seconds}s, debounce {debounce_seconds}s)")
+    
+    with ProcessPoolExecutor(max_workers=PIPELINE_WORKERS) as executor, \
+            ProcessPoolExecutor(max_workers=1) as model_executor:
+        try:
+            state = _watched_files_state()
+            run_pipeline(profile=profile, executor=executor, model_executor=model_executor)
+            
+            while True:
+                time.sleep(poll_seconds)
+                current = _watched_files_state()
+                if current == state:
+                    continue
+                
+                # Wait until the export has stopped changing
+                changed_at = time.time()
+                while time.time() - changed_at < debounce_seconds:
+                    time.sleep(min(poll_seconds, debounce_seconds))
+                    latest = _watched_files_state()
+                    if latest != current:
+                        current, changed_at = latest, time.time()
+                
+                changed = [os.path.basename(path) for path in current if current[path] != state[path]]
+                logger.info(f"Forum export changed ({', '.join(changed)}), updating analytics")
+                state = current
+                run_pipeline(profile=profile, executor=executor, model_executor=model_executor)
+        except KeyboardInterrupt:
+            logger.info("Stopped watching forum export files")
+
 if __name__ == "__main__":
-    run_pipeline() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the DVD retail business analytics pipeline")
+    parser.add_argument("--force", action="store_true",
+                        help="Rerun stages even if their inputs, config and code did not change, and refit the topic models")
+    parser.add_argument("--only", nargs="+", metavar="STAGE",
+                        choices=[stage.name for stage in build_stages()],
+                        help="Run only the given stages, using the current outputs of the others")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile every stage that runs (cProfile and tracemalloc) and print the hottest functions")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and update the analytics whenever the forum export files change")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the last failed or interrupted run after its last completed stage")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Ingest, preprocess and score the forum posts per time shard in worker processes")
+    parser.add_argument("--shard-workers", type=int, default=PARTITION_WORKERS, metavar="N",
+                        help="Local shard worker processes for --partitioned (default: number of CPUs)")
+    args = parser.parse_args()
+    if args.resume and (args.force or args.only or args.watch or args.partitioned):
+        parser.error("--resume reuses the options of the interrupted run and cannot be combined with --force, --only, --watch or --partitioned")
+    if args.partitioned and (args.only or args.watch):
+        parser.error("--partitioned cannot be combined with --only or --watch")
+    
+    if args.watch:
+        watch_pipeline(profile=args.profile)
+    else:
+        run_pipeline(force=args.force, only=args.only, profile=args.profile, resume=args.resume,
+                     partitioned=args.partitioned, shard_workers=args.shard_workers) 
\ No newline at end of file
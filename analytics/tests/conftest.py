@@ -0,0 +1,7 @@
+"""
+Shared test setup: the analytics modules import each other as top-level packages.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Tests for atomic output writes.
+"""
+import os
+import pytest
+
+from modules.checkpoint import atomic_open, atomic_path
+
+def test_atomic_write_replaces_the_file_once_complete(tmp_path):
+    path = tmp_path / 'out.csv'
+    path.write_text('old')
+    with atomic_path(str(path)) as temp_path:
+        assert temp_path.endswith('.csv') and temp_path != str(path)
+        with open(temp_path, 'w') as f:
+            f.write('new')
+        assert path.read_text() == 'old'
+    assert path.read_text() == 'new'
+    assert os.listdir(tmp_path) == ['out.csv']
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    path = tmp_path / 'out.json'
+    path.write_text('old')
+    with pytest.raises(RuntimeError):
+        with atomic_open(str(path), 'w') as f:
+            f.write('partial')
+            raise RuntimeError('writer died')
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['out.json']
\ No newline at end of file
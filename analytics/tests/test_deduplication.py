@@ -0,0 +1,56 @@
+"""
+Tests for MinHash/LSH near-duplicate detection.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.deduplication import MinHasher, find_near_duplicate_clusters, select_representatives, shingle_text
+
+BASE = "selling my entire criterion collection dvd box sets all in mint condition message me for prices"
+
+def _jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+def test_shingles_are_word_ngrams():
+    assert shingle_text("The Thing, the THING!", k=2) == {'the thing', 'thing the'}
+    assert shingle_text("short", k=3) == {'short'}
+    assert shingle_text(None) == set()
+
+def test_minhash_estimates_jaccard_similarity():
+    hasher = MinHasher(num_perm=256)
+    words = BASE.split()
+    pairs = [(BASE, ' '.join(words[:-2])), (BASE, ' '.join(words[3:] + ['today'])), (BASE, "best anime of the season so far")]
+    for first, second in pairs:
+        first_shingles, second_shingles = shingle_text(first), shingle_text(second)
+        estimate = np.mean(hasher.signature(first_shingles) == hasher.signature(second_shingles))
+        # Standard error of the estimate is at most 0.5 / sqrt(num_perm)
+        assert estimate == pytest.approx(_jaccard(first_shingles, second_shingles), abs=3 * 0.5 / np.sqrt(256))
+
+def test_signatures_are_deterministic():
+    texts = [BASE, "another post"]
+    assert np.array_equal(MinHasher(seed=1).signatures(texts), MinHasher(seed=1).signatures(texts))
+
+def test_lsh_clusters_near_duplicates_onto_the_first_post():
+    words = BASE.split()
+    texts = [
+        "where can i buy the new remaster of alien",
+        BASE,
+        BASE + " thanks",
+        "anyone watched the director's cut of blade runner recently",
+        ' '.join(words[:-1]),
+        BASE.upper()
+    ]
+    clusters = find_near_duplicate_clusters(MinHasher(num_perm=128).signatures(texts), bands=32, threshold=0.7)
+    assert clusters.tolist() == [0, 1, 1, 3, 1, 1]
+
+def test_lsh_keeps_dissimilar_posts_apart():
+    texts = [f"post number {i} about film {i * 7} and its {i % 5} sequels" for i in range(50)]
+    clusters = find_near_duplicate_clusters(MinHasher().signatures(texts), threshold=0.8)
+    assert len(set(clusters.tolist())) == 50
+
+def test_representatives_carry_cluster_size():
+    posts = pd.DataFrame({'id': [1, 2, 3], 'duplicate_cluster': [1, 1, 3], 'cluster_size': [2, 2, 1],
+                          'is_representative': [True, False, True]})
+    assert select_representatives(posts)['id'].tolist() == [1, 3]
+    assert select_representatives(posts[['id']])['cluster_size'].tolist() == [1, 1, 1]
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Tests for writing CSV files chunk by chunk.
+"""
+import pandas as pd
+import pytest
+
+from modules.memory_budget import csv_chunk_writer
+
+def test_unexpected_columns_raise(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with pytest.raises(ValueError, match="extra"):
+        with csv_chunk_writer(path) as writer:
+            writer.write(pd.DataFrame({'id': [1], 'title': ['a']}))
+            writer.write(pd.DataFrame({'id': [2], 'title': ['b'], 'extra': [True]}))
+
+def test_declared_columns_fill_missing_values(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with csv_chunk_writer(path, columns=['id', 'title', 'views']) as writer:
+        writer.write(pd.DataFrame({'id': [1], 'title': ['a']}))
+        writer.write(pd.DataFrame({'views': [5], 'id': [2]}))
+    
+    result = pd.read_csv(path)
+    assert list(result.columns) == ['id', 'title', 'views']
+    assert result['id'].tolist() == [1, 2]
+    assert result['views'].isna().tolist() == [True, False]
+
+def test_widening_keeps_earlier_rows(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with csv_chunk_writer(path, widen=True) as writer:
+        writer.write(pd.DataFrame({'id': [1, 2], 'title': ['a, quoted', '']}))
+        writer.write(pd.DataFrame({'id': [3], 'title': ['c'], 'pinned': [True]}))
+    
+    result = pd.read_csv(path, keep_default_na=False)
+    assert list(result.columns) == ['id', 'title', 'pinned']
+    assert result['title'].tolist() == ['a, quoted', '', 'c']
+    assert result['pinned'].tolist() == ['', '', 'True']
+    assert writer.rows == 3
\ No newline at end of file
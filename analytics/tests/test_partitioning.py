@@ -0,0 +1,118 @@
+"""
+Tests for the shard claim protocol and the shard merge of partitioned runs.
+"""
+import os
+import json
+import time
+import pandas as pd
+import numpy as np
+import pytest
+
+from modules import partitioning
+from modules.partitioning import claim_shard, live_claims, merge_shards, plan_shards, run_shard_worker, shard_state
+from modules.sentiment_analysis import ScoreCache
+
+def _write_plan(shard_dir, shards):
+    """Write a plan with empty shard directories."""
+    for name in shards:
+        os.makedirs(os.path.join(shard_dir, name))
+    plan = {'reference_time': '2024-03-01T00:00:00', 'period': 'month', 'shards': shards}
+    with open(os.path.join(shard_dir, partitioning.PLAN_FILE), 'w', encoding='utf-8') as f:
+        json.dump(plan, f)
+
+def _expire(claim_path, seconds=3600):
+    """Age a claim's heartbeat."""
+    past = time.time() - seconds
+    os.utime(claim_path, (past, past))
+
+def _scores(hashes, score):
+    """Score cache frame with one score for all hashes."""
+    return pd.DataFrame({'sentiment_score': score, 'sentiment_label': 'positive'},
+                        index=pd.Index(np.asarray(hashes, dtype=np.uint64)))
+
+def test_claim_is_exclusive_until_heartbeat_stops(tmp_path):
+    shard_path = str(tmp_path)
+    claim_path = claim_shard(shard_path, 'worker-a', timeout=60)
+    assert os.path.basename(claim_path) == 'claim.0'
+    assert claim_shard(shard_path, 'worker-b', timeout=60) is None
+    
+    _expire(claim_path)
+    takeover_path = claim_shard(shard_path, 'worker-b', timeout=60)
+    assert os.path.basename(takeover_path) == 'claim.1'
+    with open(takeover_path, encoding='utf-8') as f:
+        assert json.load(f)['worker'] == 'worker-b'
+    assert claim_shard(shard_path, 'worker-a', timeout=60) is None
+
+def test_finished_shards_are_not_claimed(tmp_path):
+    for state in ('done', 'failed'):
+        shard_path = tmp_path / state
+        shard_path.mkdir()
+        (shard_path / f"{state}.json").write_text('{}')
+        assert shard_state(str(shard_path)) == state
+        assert claim_shard(str(shard_path), 'worker-a', timeout=0) is None
+
+def test_failed_shard_does_not_stop_the_worker(tmp_path, monkeypatch):
+    shard_dir = str(tmp_path)
+    _write_plan(shard_dir, ['2024-01', '2024-02', '2024-03'])
+    
+    def process_shard(shard_path, reference_time):
+        if shard_path.endswith('2024-02'):
+            raise ValueError('bad shard')
+        return {'topics': 1, 'replies': 0, 'texts_scored': 1}
+    monkeypatch.setattr(partitioning, 'process_shard', process_shard)
+    
+    processed, _ = run_shard_worker(shard_dir, timeout=60)
+    assert processed == ['2024-01', '2024-03']
+    states = {name: shard_state(os.path.join(shard_dir, name)) for name in ['2024-01', '2024-02', '2024-03']}
+    assert states == {'2024-01': 'done', '2024-02': 'failed', '2024-03': 'done'}
+    with open(os.path.join(shard_dir, '2024-02', 'failed.json'), encoding='utf-8') as f:
+        assert json.load(f)['error'] == 'bad shard'
+    
+    # Failed shards are reported, not retried by the next worker
+    assert run_shard_worker(shard_dir, timeout=60)[0] == []
+
+def test_merge_follows_shard_order(tmp_path):
+    shard_dir, output_dir = tmp_path / 'shards', tmp_path / 'processed'
+    output_dir.mkdir()
+    shards = ['2024-01', '2024-02', 'undated']
+    _write_plan(str(shard_dir), shards)
+    
+    # Write the shards in reverse order, as a worker that finished last might
+    for i, name in reversed(list(enumerate(shards))):
+        pd.DataFrame({'id': [10 * i, 10 * i + 1], 'title': [name, name]}).to_csv(shard_dir / name / 'topics.csv', index=False)
+        if name != 'undated':
+            pd.DataFrame({'id': [i], 'topic_id': [10 * i]}).to_csv(shard_dir / name / 'replies.csv', index=False)
+        ScoreCache(str(shard_dir / name / 'sentiment_scores')).append(_scores([i + 1], 0.1 * i))
+    
+    main_cache = ScoreCache(str(tmp_path / 'scores'))
+    main_cache.append(_scores([1], 0.9))
+    n_topics, n_replies = merge_shards(str(shard_dir), str(output_dir), score_cache=main_cache)
+    
+    assert (n_topics, n_replies) == (6, 2)
+    topics = pd.read_csv(output_dir / 'topics.csv')
+    assert topics['id'].tolist() == [0, 1, 10, 11, 20, 21]
+    assert topics['title'].tolist() == ['2024-01', '2024-01', '2024-02', '2024-02', 'undated', 'undated']
+    assert pd.read_csv(output_dir / 'replies.csv')['topic_id'].tolist() == [0, 10]
+    
+    # Scores already in the main cache win over shard copies
+    scores, found = ScoreCache(str(tmp_path / 'scores')).get(np.array([1, 2, 3], dtype=np.uint64))
+    assert found.all()
+    assert scores['sentiment_score'].tolist() == pytest.approx([0.9, 0.1, 0.2])
+
+def test_replanning_waits_for_live_claims(tmp_path):
+    topics_file, replies_file = tmp_path / 'topics.json', tmp_path / 'replies.json'
+    topics_file.write_text(json.dumps([{'id': 1, 'date': '2 days ago'}, {'id': 2, 'date': None}]))
+    replies_file.write_text(json.dumps({'1': [{'id': 1}]}))
+    shard_dir = str(tmp_path / 'shards')
+    
+    plan = plan_shards(str(topics_file), str(replies_file), shard_dir, period='month', timeout=60)
+    assert plan['shards'][-1] == partitioning.UNDATED_SHARD
+    claim_path = claim_shard(os.path.join(shard_dir, plan['shards'][0]), 'worker-a', timeout=60)
+    assert live_claims(shard_dir, timeout=60) == [plan['shards'][0]]
+    with pytest.raises(RuntimeError):
+        plan_shards(str(topics_file), str(replies_file), shard_dir, period='month', timeout=60)
+    assert os.path.exists(claim_path)
+    
+    _expire(claim_path)
+    assert live_claims(shard_dir, timeout=60) == []
+    assert plan_shards(str(topics_file), str(replies_file), shard_dir, period='month', timeout=60)['shards'] == plan['shards']
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Tests for the stage DAG: dependencies, skipping up-to-date stages, failures and resuming.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+import config
+from modules.pipeline_dag import Stage, critical_path, load_manifest, resolve_dependencies, run_stages
+
+class Pipeline:
+    """Two dependent stages (source -> upper -> count) and an independent one (other)."""
+    def __init__(self, directory):
+        self.directory = directory
+        self.calls = []
+        self.failing = set()
+        self.manifest_path = str(directory / 'manifest.json')
+        self.checkpoint_path = str(directory / 'checkpoint.json')
+        (directory / 'source.txt').write_text('a b c')
+    
+    def path(self, name):
+        return str(self.directory / name)
+    
+    def _stage(self, name, inputs, output, transform, config=()):
+        def run():
+            self.calls.append(name)
+            if name in self.failing:
+                raise RuntimeError(f"{name} failed")
+            text = open(self.path(inputs[0])).read() if inputs else ''
+            with open(self.path(output), 'w') as f:
+                f.write(transform(text))
+            return f"ran {name}"
+        return Stage(name, run, inputs=[self.path(path) for path in inputs], outputs=[self.path(output)],
+                     config=config)
+    
+    def stages(self):
+        return [
+            self._stage('upper', ['source.txt'], 'upper.txt', str.upper, config=['TRENDING_TOP_N']),
+            self._stage('count', ['upper.txt'], 'count.txt', lambda text: str(len(text.split()))),
+            self._stage('other', [], 'other.txt', lambda text: 'other')
+        ]
+    
+    def run(self, **kwargs):
+        self.calls = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return run_stages(self.stages(), executor=executor, manifest_path=self.manifest_path,
+                              checkpoint_path=self.checkpoint_path, **kwargs)
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'TRENDING_TOP_N', 10)
+    return Pipeline(tmp_path)
+
+def test_dependencies_follow_declared_files():
+    stages = [
+        Stage('ingest', None, inputs=['export.json'], outputs=['topics.csv']),
+        Stage('dedup', None, inputs=['topics.csv'], outputs=['topics.csv', 'clusters.csv']),
+        Stage('sentiment', None, inputs=['topics.csv'], outputs=['sentiment.csv']),
+        Stage('topics', None, inputs=['topics.csv'], outputs=['assignments.csv']),
+        Stage('trends', None, inputs=['sentiment.csv', 'assignments.csv'], outputs=['report.md'])
+    ]
+    assert resolve_dependencies(stages) == {
+        'ingest': set(),
+        'dedup': {'ingest'},
+        'sentiment': {'dedup'},
+        'topics': {'dedup'},
+        'trends': {'sentiment', 'topics'}
+    }
+
+def test_critical_path_is_the_longest_chain():
+    dependencies = {'a': set(), 'b': {'a'}, 'c': {'a'}, 'd': {'b', 'c'}}
+    path, seconds = critical_path(dependencies, {'a': 1.0, 'b': 5.0, 'c': 2.0, 'd': 1.0})
+    assert path == ['a', 'b', 'd']
+    assert seconds == pytest.approx(7.0)
+
+def test_up_to_date_stages_are_skipped(pipeline):
+    results = pipeline.run()
+    assert sorted(results['succeeded']) == ['count', 'other', 'upper']
+    assert open(pipeline.path('count.txt')).read() == '3'
+    assert set(load_manifest(pipeline.manifest_path)) == {'count', 'other', 'upper'}
+    
+    results = pipeline.run()
+    assert pipeline.calls == []
+    assert sorted(results['cached']) == ['count', 'other', 'upper']
+    assert results['summaries']['count'] == 'ran count'
+
+def test_changed_inputs_config_and_missing_outputs_rerun_stages(pipeline, monkeypatch):
+    pipeline.run()
+    
+    (pipeline.directory / 'source.txt').write_text('a b c d')
+    pipeline.run()
+    assert pipeline.calls == ['upper', 'count']
+    assert open(pipeline.path('count.txt')).read() == '4'
+    
+    # The same output bytes leave dependent stages up to date
+    monkeypatch.setattr(config, 'TRENDING_TOP_N', 20)
+    pipeline.run()
+    assert pipeline.calls == ['upper']
+    
+    os.remove(pipeline.path('other.txt'))
+    pipeline.run()
+    assert pipeline.calls == ['other']
+    
+    pipeline.run(force=True, only=['count'])
+    assert pipeline.calls == ['count']
+
+def test_failed_stage_skips_only_its_dependents(pipeline):
+    pipeline.failing = {'upper'}
+    results = pipeline.run()
+    assert results['failed'] == ['upper']
+    assert results['skipped'] == ['count']
+    assert results['succeeded'] == ['other']
+    assert 'upper' not in load_manifest(pipeline.manifest_path)
+
+def test_unknown_stage_names_are_rejected(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.run(only=['missing'])
+
+def test_resume_continues_after_completed_stages(pipeline):
+    pipeline.failing = {'count'}
+    results = pipeline.run(force=True)
+    assert results['failed'] == ['count']
+    assert os.path.exists(pipeline.checkpoint_path)
+    
+    # Completed stages are not rerun, although the interrupted run was forced
+    pipeline.failing = set()
+    results = pipeline.run(resume=True)
+    assert pipeline.calls == ['count']
+    assert sorted(results['cached']) == ['other', 'upper']
+    assert not os.path.exists(pipeline.checkpoint_path)
+    
+    # Without a checkpoint, resuming starts a normal run
+    pipeline.run(resume=True)
+    assert pipeline.calls == []
+
+def test_resume_reruns_completed_stages_whose_inputs_changed(pipeline):
+    pipeline.failing = {'count'}
+    pipeline.run()
+    
+    pipeline.failing = set()
+    (pipeline.directory / 'source.txt').write_text('x y')
+    pipeline.run(resume=True)
+    assert pipeline.calls == ['upper', 'count']
+    assert open(pipeline.path('count.txt')).read() == '2'
\ No newline at end of file
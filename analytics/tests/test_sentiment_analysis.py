@@ -0,0 +1,71 @@
+"""
+Tests for the sentiment score cache.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import sentiment_analysis
+from modules.sentiment_analysis import ScoreCache, score_texts
+
+class FakeAnalyzer:
+    """Scores a text by its length and records what it scored."""
+    def __init__(self, fail_after=None):
+        self.scored = []
+        self.fail_after = fail_after
+    
+    def predict_sentiment(self, texts):
+        if self.fail_after is not None and len(self.scored) >= self.fail_after:
+            raise RuntimeError('model crashed')
+        self.scored.extend(texts)
+        scores = np.array([len(text) / 100 for text in texts])
+        return pd.DataFrame({'sentiment_score': scores, 'sentiment_label': np.where(scores > 0.05, 'positive', 'negative')})
+
+TEXTS = ['great box set', 'bad', 'great box set', 'worst transfer ever', 'ok']
+
+def test_only_new_texts_are_scored(tmp_path):
+    cache = ScoreCache(str(tmp_path))
+    analyzer = FakeAnalyzer()
+    results = score_texts(TEXTS, analyzer, cache=cache, checkpoint_texts=2)
+    assert sorted(analyzer.scored) == sorted(set(TEXTS))
+    assert results['sentiment_score'].tolist() == pytest.approx([len(text) / 100 for text in TEXTS])
+    
+    # A new cache over the same directory reads the flushed segments
+    analyzer = FakeAnalyzer()
+    results = score_texts(TEXTS + ['new post'], analyzer, cache=ScoreCache(str(tmp_path)))
+    assert analyzer.scored == ['new post']
+    assert results['sentiment_label'].tolist() == ['positive', 'negative', 'positive', 'positive', 'negative', 'positive']
+
+def test_crash_keeps_the_flushed_batches(tmp_path):
+    with pytest.raises(RuntimeError):
+        score_texts(TEXTS, FakeAnalyzer(fail_after=2), cache=ScoreCache(str(tmp_path)), checkpoint_texts=2)
+    
+    analyzer = FakeAnalyzer()
+    score_texts(TEXTS, analyzer, cache=ScoreCache(str(tmp_path)), checkpoint_texts=2)
+    assert len(analyzer.scored) == len(set(TEXTS)) - 2
+
+def test_compaction_merges_segments(tmp_path):
+    cache = ScoreCache(str(tmp_path))
+    expected = score_texts(TEXTS, FakeAnalyzer(), cache=cache, checkpoint_texts=1)
+    assert len(os.listdir(tmp_path)) == len(set(TEXTS))
+    
+    cache.compact()
+    assert len(os.listdir(tmp_path)) == 1
+    analyzer = FakeAnalyzer()
+    pd.testing.assert_frame_equal(score_texts(TEXTS, analyzer, cache=ScoreCache(str(tmp_path))), expected)
+    assert analyzer.scored == []
+
+def test_scores_of_other_model_settings_are_ignored(tmp_path, monkeypatch):
+    score_texts(TEXTS, FakeAnalyzer(), cache=ScoreCache(str(tmp_path)))
+    
+    monkeypatch.setattr(sentiment_analysis, 'SENTIMENT_MODEL', 'another-model')
+    analyzer = FakeAnalyzer()
+    cache = ScoreCache(str(tmp_path))
+    score_texts(TEXTS, analyzer, cache=cache)
+    assert sorted(analyzer.scored) == sorted(set(TEXTS))
+    
+    # Compaction drops the stale segments
+    cache.compact()
+    assert len(os.listdir(tmp_path)) == 1
+    assert len(list(ScoreCache(str(tmp_path)).iter_chunks())[0]) == len(set(TEXTS))
\ No newline at end of file
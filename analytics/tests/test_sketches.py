@@ -0,0 +1,185 @@
+"""
+Tests for the streaming sketches and their error bounds.
+"""
+import math
+from collections import Counter
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.sketches import CountMinSketch, HeavyHitters, TDigest, WelfordAccumulator, HyperLogLog
+from modules.trend_sketches import TrendSketches
+from modules.topic_analysis import load_keyword_sketches, new_duplicate_clusters, update_keyword_sketches
+
+def zipf_stream(n_items=2000, size=50000, seed=7):
+    """Word stream with Zipf-distributed frequencies."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.3, size=size * 2)
+    return [f"word{rank}" for rank in ranks[ranks <= n_items][:size]]
+
+def test_count_min_error_bound():
+    stream = zipf_stream()
+    true_counts = Counter(stream)
+    epsilon = 0.01
+    sketch = CountMinSketch(width=math.ceil(math.e / epsilon), depth=5)
+    for item, count in true_counts.items():
+        sketch.add(item, count)
+    
+    errors = np.array([sketch.estimate(item) - count for item, count in true_counts.items()])
+    assert errors.min() >= 0
+    # Each estimate is within epsilon * N with probability 1 - exp(-depth)
+    assert (errors <= epsilon * len(stream)).mean() >= 1 - math.exp(-5)
+    assert sketch.estimate('never seen') <= epsilon * len(stream)
+
+def test_heavy_hitters_find_the_most_frequent_items():
+    stream = zipf_stream()
+    tracker = HeavyHitters(k=50, width=2000, depth=5)
+    for item in stream:
+        tracker.update(item)
+    
+    top = tracker.top(10)
+    assert [item for item, _ in top] == [item for item, _ in Counter(stream).most_common(10)]
+    assert len(tracker.top()) <= 50
+    for item, estimate in top:
+        assert 0 <= estimate - stream.count(item) <= len(stream) * math.e / 2000
+
+def test_heavy_hitters_heap_stays_bounded():
+    tracker = HeavyHitters(k=10, width=500, depth=4)
+    tracker.update_many({f"word{i}": i for i in range(1, 5000)})
+    assert len(tracker.counts) == 10
+    assert len(tracker.heap) <= 40
+    assert all(estimate >= int(item[len('word'):]) for item, estimate in tracker.top())
+
+def _posts(ids, texts, clusters=None):
+    """Representative posts as spilled by topic analysis."""
+    posts = pd.DataFrame({'id': ids, 'processed_text': texts})
+    if clusters is not None:
+        posts['duplicate_cluster'] = clusters
+        posts['cluster_size'] = pd.Series(clusters).map(pd.Series(clusters).value_counts()).to_numpy()
+    return posts
+
+def test_keyword_sketches_count_each_post_once(tmp_path):
+    path = str(tmp_path / 'keywords.pkl')
+    state = load_keyword_sketches(path)
+    state = update_keyword_sketches(state, _posts([1, 2], ['dvd box', 'dvd']), max_id=2, sketch_path=path)
+    assert dict(state['keywords'].top()) == {'dvd': 2, 'box': 1}
+    assert state['phrases'].top() == [('dvd box', 1)]
+    
+    # Posts at or below the high-water mark are not counted again
+    state = load_keyword_sketches(path)
+    assert state['max_id'] == 2
+    state = update_keyword_sketches(state, _posts([1, 2, 3], ['dvd box', 'dvd', 'box']), max_id=3, sketch_path=path)
+    assert dict(state['keywords'].top()) == {'dvd': 2, 'box': 2}
+
+def test_keyword_sketches_count_new_near_duplicates(tmp_path):
+    path = str(tmp_path / 'keywords.pkl')
+    # Post 1 and its near-duplicate 2 are represented by post 1
+    posts = pd.DataFrame({'id': [1, 2, 3], 'duplicate_cluster': [1, 1, 3], 'cluster_size': [2, 2, 1]})
+    state = load_keyword_sketches(path)
+    representatives = _posts([1, 3], ['spam offer', 'review'], clusters=[1, 3])
+    representatives['cluster_size'] = [2, 1]
+    state = update_keyword_sketches(state, representatives, max_id=3,
+                                    new_duplicates=new_duplicate_clusters(posts, state['max_id']), sketch_path=path)
+    assert dict(state['keywords'].top()) == {'spam': 2, 'offer': 2, 'review': 1}
+    
+    # A later near-duplicate of post 1 is counted with its representative's text
+    posts = pd.DataFrame({'id': [1, 2, 3, 4], 'duplicate_cluster': [1, 1, 3, 1], 'cluster_size': [3, 3, 1, 3]})
+    state = load_keyword_sketches(path)
+    representatives['cluster_size'] = [3, 1]
+    state = update_keyword_sketches(state, representatives, max_id=4,
+                                    new_duplicates=new_duplicate_clusters(posts, state['max_id']), sketch_path=path)
+    assert dict(state['keywords'].top()) == {'spam': 3, 'offer': 3, 'review': 1}
+    assert state['max_id'] == 4
+
+def test_keyword_sketches_convert_legacy_state(tmp_path):
+    from modules.sketches import save_sketch_state
+    path = str(tmp_path / 'keywords.pkl')
+    save_sketch_state({'keywords': HeavyHitters(), 'phrases': HeavyHitters(), 'seen_ids': {3, 9, 4}}, path)
+    state = load_keyword_sketches(path)
+    assert 'seen_ids' not in state
+    assert state['max_id'] == 9
+
+def _rank_error(values, estimate, q):
+    """Distance between q and the rank of an estimated quantile."""
+    return abs((values < estimate).mean() - q)
+
+def test_tdigest_quantile_rank_error():
+    values = np.random.default_rng(3).normal(size=20000)
+    digest = TDigest(compression=100)
+    for batch in np.array_split(values, 40):
+        digest.update(batch)
+    
+    assert digest.count == len(values)
+    assert len(digest.means) <= 100
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert _rank_error(values, digest.quantile(q), q) < 0.01
+    assert digest.quantile(0) == values.min() and digest.quantile(1) == values.max()
+
+def test_merged_tdigests_match_one_digest():
+    rng = np.random.default_rng(4)
+    parts = [rng.exponential(size=5000), rng.uniform(size=5000), [np.nan, np.nan]]
+    merged = TDigest()
+    for part in parts:
+        digest = TDigest()
+        digest.update(part)
+        merged.merge(digest)
+    
+    values = np.concatenate(parts[:2])
+    assert merged.count == len(values)
+    for q in (0.05, 0.5, 0.95):
+        assert _rank_error(values, merged.quantile(q), q) < 0.01
+
+def test_welford_merge_is_exact():
+    rng = np.random.default_rng(5)
+    parts = [rng.normal(10, 2, size=n) for n in (1, 50, 1000)]
+    merged = WelfordAccumulator()
+    for part in parts:
+        accumulator = WelfordAccumulator()
+        accumulator.update(np.r_[part, np.nan])
+        merged.merge(accumulator)
+    
+    values = np.concatenate(parts)
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.std == pytest.approx(values.std(ddof=1))
+    assert np.isnan(WelfordAccumulator().std)
+
+@pytest.mark.parametrize('n_distinct', [100, 5000, 50000])
+def test_hyperloglog_relative_error(n_distinct):
+    sketch = HyperLogLog(precision=12)
+    items = [f"author{i}" for i in range(n_distinct)]
+    sketch.update(items)
+    sketch.update(items[:n_distinct // 2])
+    # Three standard errors of 1.04 / sqrt(2 ** precision)
+    assert abs(sketch.count() - n_distinct) <= 3 * 1.04 / math.sqrt(2 ** 12) * n_distinct
+
+def test_merged_hyperloglogs_count_the_union():
+    first, second, union = HyperLogLog(precision=12), HyperLogLog(precision=12), HyperLogLog(precision=12)
+    first.update([f"author{i}" for i in range(3000)])
+    second.update([f"author{i}" for i in range(2000, 6000)])
+    union.update([f"author{i}" for i in range(6000)])
+    first.merge(second)
+    assert np.array_equal(first.registers, union.registers)
+
+def test_trend_sketches_answer_coarser_periods_by_merging_days():
+    rng = np.random.default_rng(6)
+    posts = pd.DataFrame({
+        'datetime': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60 * 24, size=3000), unit='h'),
+        'category': rng.integers(1, 4, size=3000),
+        'author': rng.integers(0, 400, size=3000).astype(str),
+        'sentiment_score': rng.uniform(-1, 1, size=3000)
+    })
+    posts.loc[::10, 'sentiment_score'] = np.nan
+    sketches = TrendSketches.from_posts(posts)
+    
+    weekly = sketches.query('week').set_index('period')
+    expected = posts.groupby(posts['datetime'].dt.to_period('W').dt.start_time)
+    assert weekly['sentiment_count'].tolist() == expected['sentiment_score'].count().tolist()
+    assert weekly['avg_sentiment'].to_numpy() == pytest.approx(expected['sentiment_score'].mean().to_numpy())
+    assert weekly['std_sentiment'].to_numpy() == pytest.approx(expected['sentiment_score'].std().to_numpy())
+    authors = expected['author'].nunique().to_numpy()
+    assert np.all(np.abs(weekly['distinct_authors'].to_numpy() - authors) <= 0.1 * authors)
+    
+    by_category = sketches.query('month', by=('category',)).set_index('category')
+    medians = posts.groupby('category')['sentiment_score'].median()
+    assert by_category['median_sentiment'].to_numpy() == pytest.approx(medians.to_numpy(), abs=0.05)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Tests for assigning topics with a saved topic model between refits.
+"""
+import numpy as np
+import pandas as pd
+
+import modules.topic_analysis as topic_analysis
+
+class CountingAssigner:
+    """Assigner putting every text in topic 2 and remembering what it was given."""
+    def __init__(self):
+        self.texts = []
+    
+    def transform(self, texts, preprocess=True):
+        self.texts.extend(texts)
+        return pd.DataFrame({'dominant_topic': np.full(len(texts), 2), 'topic_probability': np.full(len(texts), 0.5)})
+
+def test_only_new_posts_are_assigned(tmp_path, monkeypatch):
+    path = str(tmp_path / "topic_assignments.csv")
+    monkeypatch.setattr(topic_analysis, 'TOPIC_ASSIGNMENTS_PATH', path)
+    previous = pd.DataFrame({'dominant_topic': [1, 3], 'topic_probability': [0.9, 0.8]}, index=pd.Index([1, 2], name='id'))
+    texts = pd.DataFrame({'id': [1, 2, 3], 'processed_text': ['old one', 'old two', 'new three']})
+    
+    assigner = CountingAssigner()
+    assert topic_analysis.assign_topics_to_posts(texts, assigner, previous=previous) == 3
+    assert assigner.texts == ['new three']
+    
+    assignments = topic_analysis.load_topic_assignments(path)
+    assert assignments['dominant_topic'].to_dict() == {1: 1, 2: 3, 3: 2}
+
+def test_refit_when_settings_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(topic_analysis, 'load_topic_model_info',
+                        lambda: {'fitted': '2024-06-01T00:00:00', 'settings': {'out_of_core': False}})
+    monkeypatch.setattr(topic_analysis, 'PROCESSED_DATA_DIR', str(tmp_path))
+    (tmp_path / "forum_key_topics.csv").write_text("Topic 1\nword\n")
+    
+    assert topic_analysis.topic_refit_reason({'out_of_core': True}, refit_days=1e6) == "topic model settings changed"
+    assert topic_analysis.topic_refit_reason({'out_of_core': False}, refit_days=1e6) is None
+    assert topic_analysis.topic_refit_reason({'out_of_core': False}, refit_days=1) is not None
+    assert topic_analysis.topic_refit_reason({'out_of_core': False}, refit_days=None) is not None
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Tests for the persisted trending state and its settings.
+"""
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+from modules.trending import TrendingEngine
+
+NOW = datetime(2024, 6, 1)
+
+def snapshot(n_topics=20, seed=3):
+    """Engagement snapshot of topics created over the last week."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': range(n_topics),
+        'title': [f"topic {i}" for i in range(n_topics)],
+        'datetime': [NOW - timedelta(hours=int(h)) for h in rng.integers(0, 168, n_topics)],
+        'category': rng.integers(1, 4, n_topics),
+        'replies': rng.integers(0, 50, n_topics),
+        'views': rng.integers(0, 1000, n_topics)
+    })
+
+def test_larger_top_n_is_rebuilt_from_state(tmp_path):
+    path = str(tmp_path / "trending.pkl")
+    engine = TrendingEngine(half_life_days=7, top_n=5)
+    engine.update(snapshot(), snapshot_time=NOW)
+    engine.save(path)
+    
+    loaded = TrendingEngine.load(path, half_life_days=7, top_n=10)
+    reference = TrendingEngine(half_life_days=7, top_n=10)
+    reference.update(snapshot(), snapshot_time=NOW)
+    assert len(loaded.top(10, query_time=NOW)) == 10
+    assert list(loaded.top(10, query_time=NOW)['id']) == list(reference.top(10, query_time=NOW)['id'])
+    for category in reference.categories():
+        assert (list(loaded.top(10, category=category, query_time=NOW)['id']) ==
+                list(reference.top(10, category=category, query_time=NOW)['id']))
+
+def test_changed_half_life_resets_scores(tmp_path):
+    path = str(tmp_path / "trending.pkl")
+    engine = TrendingEngine(half_life_days=7, top_n=5)
+    engine.update(snapshot(), snapshot_time=NOW)
+    engine.save(path)
+    
+    assert len(TrendingEngine.load(path, half_life_days=7, top_n=5).state) == 20
+    reset = TrendingEngine.load(path, half_life_days=3, top_n=5)
+    assert reset.half_life_days == 3
+    assert reset.state.empty and reset.landmark is None
+
+def test_short_result_is_logged(caplog):
+    engine = TrendingEngine(half_life_days=7, top_n=5)
+    engine.update(snapshot(), snapshot_time=NOW)
+    with caplog.at_level(logging.WARNING, logger='modules.trending'):
+        assert len(engine.top(10, query_time=NOW)) == 5
+    assert "returning 5 of the 10 requested" in caplog.text
\ No newline at end of file